@@ -1,8 +1,10 @@
+import os
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./decade_journey.db"
+# Overridable so tests can run against a throwaway database
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./decade_journey.db")
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
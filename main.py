@@ -25,7 +25,7 @@ from services import config as config_service
 logger.setup_logging()
 
 # Routers
-from routers import timeline, auth, admin, map, capsule, people, memories, chat, faces
+from routers import timeline, auth, admin, map, capsule, people, memories, chat, faces, media
 
 # Config Service (Inject into Templates)
 from services.config import config
@@ -60,6 +60,10 @@ async def lifespan(app: FastAPI):
 
     # Self-Healing: Check for interrupted tasks
     tasks.reprocess_orphans()
+
+    # Watch for handlers that block the event loop
+    from services.executors import loop_monitor, shutdown_pools
+    loop_monitor.start()
     
     # Startup: Preload AI Models (Blocking Main Thread) -> Safer for macOS
     # if config.get("ai_provider") == "local":
@@ -69,6 +73,9 @@ async def lifespan(app: FastAPI):
     yield
     
     # Shutdown logic
+    loop_monitor.stop()
+    shutdown_pools()
+
     print("🛑 Shutting down Huey Consumer...")
     huey_process.terminate()
     try:
@@ -121,6 +128,7 @@ app.include_router(chat.router)
 app.include_router(faces.router)
 app.include_router(people.router)
 app.include_router(map.router)
+app.include_router(media.router)
 # Admin/Manage Routes
 app.include_router(admin.router)
 app.include_router(capsule.router)
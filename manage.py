@@ -17,8 +17,15 @@ def main():
         "reset-faces": ("WARNING: Delete all faces/persons and re-scan", commands.reset_faces),
         "backfill-captions": ("Generate AI captions for photos", lambda: commands.backfill_captions(force=True)),
         "backfill-phash": ("Generate perceptual hashes for fuzzy duplicate detection", commands.backfill_phash),
+        "backfill-geocache": ("Warm the reverse-geocode cache from existing locations", commands.warm_geocode_cache),
+        "backfill-weather": ("Fetch historical weather in batched location/date ranges", commands.backfill_weather),
         "backfill-rag": ("Re-index all memories into ChromaDB for Search", commands.backfill_rag),
+        "rag-sync": ("Re-index only changed memories and drop vectors of deleted ones", commands.sync_rag),
+        "rag-fts-rebuild": ("Rebuild the keyword (FTS5) index used by hybrid search", commands.rebuild_rag_fts),
+        "rag-optimize": ("Build/rebuild ANN vector indexes and compact LanceDB tables", commands.optimize_rag),
         "retry-analysis": ("Retry failed AI analysis for incomplete events", commands.retry_failures),
+        "backfill-transcodes": ("Queue web/preview renditions and posters for existing videos", commands.backfill_transcodes),
+        "prune-media": ("Delete orphaned video renditions and trim the vision payload cache", commands.prune_media_caches),
         "backup": ("Create a zip backup of DB and Uploads", commands.create_backup),
         "reset": ("DANGER: Delete all data and files", commands.cleanup_all),
         "all": ("Run all maintenance tasks in sequence", lambda: commands.process_all_media(force=False)),
@@ -49,6 +49,13 @@ def run_migrations():
         ("timeline_events", "file_hash", "VARCHAR"),
         ("timeline_events", "phash", "VARCHAR"),
         ("timeline_events", "summary", "TEXT"),
+        ("timeline_events", "rag_indexed_at", "DATETIME"),
+        ("timeline_events", "rag_content_hash", "VARCHAR"),
+        ("timeline_events", "video_web_url", "VARCHAR"),
+        ("timeline_events", "video_preview_url", "VARCHAR"),
+        ("timeline_events", "video_sprite_url", "VARCHAR"),
+        ("timeline_events", "video_duration", "FLOAT"),
+        ("timeline_events", "transcode_status", "VARCHAR"),
         ("time_capsules", "capsule_type", "VARCHAR DEFAULT 'custom'"),
         ("time_capsules", "prompt_question", "VARCHAR"),
         ("time_capsules", "is_read", "INTEGER DEFAULT 0"),
@@ -342,6 +349,7 @@ def backfill_captions(force: bool = False):
         print(f"Found {len(events)} photos. Processing...")
         processed = 0
         
+        pending = []
         for event in events:
             # Skip if exists and not forced
             if event.summary and not force:
@@ -352,32 +360,90 @@ def backfill_captions(force: bool = False):
                 file_path = os.path.join("static/uploads", filename)
                 
                 if os.path.exists(file_path):
-                    print(f"  Captioning Event {event.id}...")
-                    try:
-                        # Collect names for this event
-                        names = []
-                        faces = db.query(models.Face).filter(models.Face.event_id == event.id).all()
-                        for f in faces:
-                            if f.person:
-                                names.append(f.person.name)
-                        
-                        unique_names = list(set(names))
-                        if unique_names:
-                            print(f"    Context: {unique_names}")
-                        
-                        caption = analyzer.generate_caption(file_path, names=unique_names)
-                        if caption:
-                            event.summary = caption
-                            processed += 1
-                            print(f"    -> '{caption}'")
-                    except Exception as e:
-                        print(f"    -> Error: {e}")
+                    # Collect names for this event
+                    unique_names = list({f.person.name for f in event.faces if f.person})
+                    pending.append((event, file_path, unique_names))
+
+        # Micro-batches: one generate() call per VISION_BATCH_SIZE photos, committed as they finish
+        from services.config import VISION_BATCH_SIZE
+        for start in range(0, len(pending), VISION_BATCH_SIZE):
+            chunk = pending[start:start + VISION_BATCH_SIZE]
+            print(f"  Captioning Events {', '.join(str(event.id) for event, _, _ in chunk)}...")
+            try:
+                captions = analyzer.generate_captions_batch([(path, names) for _, path, names in chunk])
+            except Exception as e:
+                print(f"    -> Error: {e}")
+                continue
+            for (event, _, names), caption in zip(chunk, captions):
+                if caption:
+                    event.summary = caption
+                    processed += 1
+                    if names:
+                        print(f"    Context: {names}")
+                    print(f"    -> '{caption}'")
+            db.commit()
         
-        db.commit()
         print(f"✅ Caption Backfill complete. Updated {processed} events.")
     finally:
         db.close()
 
+def warm_geocode_cache():
+    """
+    Warm the reverse-geocode cache from existing location_name values.
+    Each geohash cell takes the most common name among its events.
+    """
+    print("🗺️  Warming Geocode Cache from existing locations...")
+    from collections import Counter
+    from services.config import GEOCODE_CACHE_PRECISION
+    from utils.geo import geohash_encode
+
+    db = SessionLocal()
+    try:
+        rows = db.query(
+            models.TimelineEvent.latitude,
+            models.TimelineEvent.longitude,
+            models.TimelineEvent.location_name
+        ).filter(
+            models.TimelineEvent.latitude != None,
+            models.TimelineEvent.longitude != None,
+            models.TimelineEvent.location_name != None,
+            models.TimelineEvent.location_name != ""
+        ).all()
+
+        cells = {}
+        for lat, lon, name in rows:
+            cell = geohash_encode(lat, lon, GEOCODE_CACHE_PRECISION)
+            cells.setdefault(cell, Counter())[name] += 1
+
+        existing = {g for (g,) in db.query(models.GeocodeCache.geohash).all()}
+        added = 0
+        for cell, names in cells.items():
+            if cell in existing:
+                continue
+            name, _ = names.most_common(1)[0]
+            db.add(models.GeocodeCache(geohash=cell, location_name=name, source="backfill"))
+            added += 1
+
+        db.commit()
+        print(f"✅ Geocode cache warmed. {added} new cells from {len(rows)} located events.")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error warming geocode cache: {e}")
+    finally:
+        db.close()
+
+def backfill_weather():
+    """
+    Fill missing weather for located events using batched archive requests.
+    """
+    print("☁️  Backfilling Weather (batched per location/date range)...")
+    try:
+        from services.weather import weather_service
+        updated = weather_service.enrich_pending()
+        print(f"✅ Weather Backfill complete. Updated {updated} events.")
+    except Exception as e:
+        print(f"❌ Error during weather backfill: {e}")
+
 def create_backup():
     """
     Create a backup of the database and uploads directory.
@@ -450,6 +516,58 @@ def backfill_rag():
     except Exception as e:
         print(f"❌ Error during RAG indexing: {e}")
 
+def sync_rag():
+    """
+    Incremental RAG sync: re-embed only changed/never-indexed events
+    and delete vectors of events that no longer exist.
+    """
+    print("🔁  Syncing RAG index with the database...")
+    try:
+        from services.rag import Indexer
+    except ImportError as e:
+        print(f"❌ RAG service error (missing dependencies?): {e}")
+        return
+
+    try:
+        stats = Indexer.sync()
+        print(f"✅ RAG Sync complete. Checked {stats['checked']}, re-indexed {stats['reindexed']}, removed {stats['removed']} orphan vectors.")
+    except Exception as e:
+        print(f"❌ Error during RAG sync: {e}")
+
+def optimize_rag():
+    """
+    Build/rebuild ANN indexes and compact the LanceDB tables now.
+    """
+    print("🏗️  Optimizing RAG vector indexes...")
+    try:
+        from services.rag import memory_vector_store
+        from services.vector_index import vector_index
+    except ImportError as e:
+        print(f"❌ RAG service error (missing dependencies?): {e}")
+        return
+
+    for table in (memory_vector_store.table_local, memory_vector_store.table_gemini):
+        action = vector_index.maintain(table, force=True)
+        print(f"  {table.name}: {action}")
+    print("✅ RAG index optimization complete.")
+
+def rebuild_rag_fts():
+    """
+    Rebuild the SQLite FTS5 keyword index used by hybrid search.
+    """
+    print("🔤  Rebuilding RAG keyword index...")
+    try:
+        from services.rag import Indexer
+    except ImportError as e:
+        print(f"❌ RAG service error (missing dependencies?): {e}")
+        return
+
+    try:
+        count = Indexer.rebuild_lexical()
+        print(f"✅ Keyword index rebuilt ({count} memories).")
+    except Exception as e:
+        print(f"❌ Error rebuilding keyword index: {e}")
+
 def retry_failures():
     """
     Find events that are missing AI analysis (faces/tags/summary) and re-queue them.
@@ -457,36 +575,98 @@ def retry_failures():
     """
     print("🚑  Retrying failed analysis tasks...")
     try:
-        from services.tasks import enqueue_event
+        from services.tasks import bulk_enqueue, process_ai_for_event
     except ImportError:
         print("❌ Task service not available.")
         return
 
     db = SessionLocal()
     try:
-        # Find photos that are missing summary OR tags AND are not just "processing" (but we don't have a status flag yet)
+        # Find photos/videos that are missing summary OR tags AND are not just "processing" (but we don't have a status flag yet)
         # We assume if it's been a while and they are empty, it failed.
-        # Just selecting all photos with empty summary is a decent heuristic.
+        # Just selecting everything with an empty summary is a decent heuristic.
         events = db.query(models.TimelineEvent).filter(
-            models.TimelineEvent.media_type == "photo",
+            models.TimelineEvent.media_type.in_(["photo", "video"]),
             or_(models.TimelineEvent.summary == None, models.TimelineEvent.summary == ""),
             models.TimelineEvent.image_url != None
         ).all()
         
         print(f"Found {len(events)} potentially incomplete events.")
         
+        retry_ids = []
         for event in events:
              if event.image_url and os.path.exists(f"static/uploads/{event.image_url.split('/')[-1]}"):
-                 enqueue_event(event.id)
+                 retry_ids.append(event.id)
              else:
                  print(f"Skipping {event.id}: File missing")
                  
-        print(f"✅ Queued {len(events)} items for retry.")
+        counts = bulk_enqueue(process_ai_for_event, retry_ids, lane="bulk", source="cli-retry")
+        print(f"✅ Queued {counts['queued']} items for retry ({counts['already_queued']} already queued).")
     except Exception as e:
         print(f"❌ Error during retry: {e}")
     finally:
         db.close()
 
+def backfill_transcodes():
+    """
+    Queue web/preview renditions, sprite strips and posters for videos that
+    do not have them yet (uploaded before transcoding existed, or failed).
+    """
+    print("🎞️  Queueing video transcodes...")
+    try:
+        from services.tasks import bulk_enqueue, transcode_video
+    except ImportError:
+        print("❌ Task service not available.")
+        return
+
+    db = SessionLocal()
+    try:
+        events = db.query(models.TimelineEvent).filter(
+            models.TimelineEvent.media_type == "video",
+            models.TimelineEvent.image_url != None,
+            or_(models.TimelineEvent.transcode_status == None, models.TimelineEvent.transcode_status != "done")
+        ).all()
+
+        video_ids = [e.id for e in events if os.path.exists(e.image_url.lstrip("/"))]
+        print(f"Found {len(events)} videos without renditions ({len(events) - len(video_ids)} missing files).")
+
+        counts = bulk_enqueue(transcode_video, video_ids, lane="bulk", source="cli-transcode")
+        print(f"✅ Queued {counts['queued']} videos ({counts['already_queued']} already queued).")
+    except Exception as e:
+        print(f"❌ Error queueing transcodes: {e}")
+    finally:
+        db.close()
+
+def prune_media_caches():
+    """
+    Bound derived media on disk: delete rendition files no event references
+    (deleted events, replaced posters, interrupted transcodes) and trim the
+    cloud vision payload cache to VISION_PAYLOAD_CACHE_MB.
+    """
+    print("🧹 Pruning derived media...")
+    from services.transcode import transcode_service
+    from services.vision_payload import vision_payload
+
+    db = SessionLocal()
+    try:
+        referenced = set()
+        rows = db.query(
+            models.TimelineEvent.video_web_url, models.TimelineEvent.video_preview_url,
+            models.TimelineEvent.video_sprite_url, models.TimelineEvent.thumbnail_url
+        ).filter(models.TimelineEvent.media_type == "video").all()
+        for row in rows:
+            referenced.update(url for url in row if url)
+
+        removed, freed = transcode_service.prune_orphans(referenced)
+        print(f"✅ Renditions: removed {removed} orphaned files ({freed // (1024 * 1024)}MB).")
+
+        removed, freed = vision_payload.prune()
+        print(f"✅ Vision payloads: removed {removed} files ({freed // (1024 * 1024)}MB).")
+    except Exception as e:
+        print(f"❌ Error pruning media: {e}")
+    finally:
+        db.close()
+
 def process_all_media(force: bool = False):
     """
     Unified command to run the entire processing pipeline in the correct order.
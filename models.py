@@ -2,6 +2,7 @@ from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKe
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from database import Base
+from utils.http_range import media_url
 
 class Settings(Base):
     __tablename__ = "settings"
@@ -37,11 +38,32 @@ class TimelineEvent(Base):
     
     mood = Column(String, nullable=True) # AI Detected Atmosphere
 
+    # Vector index change tracking (NULL = never indexed or flagged stale)
+    rag_indexed_at = Column(DateTime, nullable=True)
+    rag_content_hash = Column(String, nullable=True) # sha256 of the indexed document
+
+    # Video renditions (services/transcode.py); thumbnail_url doubles as the poster
+    video_web_url = Column(String, nullable=True) # Faststart H.264/AAC MP4
+    video_preview_url = Column(String, nullable=True) # Low-bitrate MP4 for mobile/cinema
+    video_sprite_url = Column(String, nullable=True) # Horizontal strip of VIDEO_SPRITE_FRAMES tiles
+    video_duration = Column(Float, nullable=True) # Seconds
+    transcode_status = Column(String, nullable=True) # pending | done | failed | skipped
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     faces = relationship("Face", back_populates="event")
     interactions = relationship("MemoryInteraction", back_populates="event")
 
+    @property
+    def stream_url(self):
+        """Range-streamed URL for full playback (the web rendition once transcoded)."""
+        return media_url(self.video_web_url or self.image_url)
+
+    @property
+    def preview_stream_url(self):
+        """Range-streamed low-bitrate preview, or stream_url until it exists."""
+        return media_url(self.video_preview_url) if self.video_preview_url else self.stream_url
+
 class TimeCapsule(Base):
     __tablename__ = "time_capsules"
 
@@ -105,3 +127,59 @@ class SystemLog(Base):
     message = Column(Text)
     metadata_json = Column(Text, nullable=True) # JSON string for extra context
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class GeocodeCache(Base):
+    """
+    Reverse-geocode results bucketed by geohash cell.
+    Photos in the same cell resolve locally instead of calling Nominatim.
+    """
+    __tablename__ = "geocode_cache"
+
+    geohash = Column(String, primary_key=True, index=True)
+    location_name = Column(String, nullable=True) # Empty string = known "no address" (e.g. open sea)
+    source = Column(String, nullable=True) # nominatim, backfill
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class WeatherCache(Base):
+    """
+    Daily historical weather per rounded location (Open-Meteo archive).
+    Filled by multi-day range requests, read by context enrichment.
+    """
+    __tablename__ = "weather_cache"
+
+    lat_key = Column(Float, primary_key=True)
+    lon_key = Column(Float, primary_key=True)
+    date = Column(String, primary_key=True) # YYYY-MM-DD
+    weather_code = Column(Integer, nullable=True) # WMO code
+    temperature_max = Column(Float, nullable=True)
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class EmbeddingCache(Base):
+    """
+    Content-addressed embeddings: (model, sha256 of document text) -> float32 vector.
+    Unchanged documents are re-indexed without calling BGE-M3 or Gemini.
+    """
+    __tablename__ = "embedding_cache"
+
+    model = Column(String, primary_key=True)
+    text_hash = Column(String, primary_key=True)
+    dim = Column(Integer)
+    vector = Column(LargeBinary) # float32 bytes
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class VisionCache(Base):
+    """
+    Vision model outputs (captions, scene analyses) keyed by everything that shapes them:
+    image bytes, named people, prompt template version and provider/model.
+    Regenerating with unchanged inputs reuses the stored answer.
+    """
+    __tablename__ = "vision_cache"
+
+    cache_key = Column(String, primary_key=True) # sha256 of the fields below
+    file_hash = Column(String, index=True)
+    kind = Column(String) # caption, scene
+    names = Column(String) # JSON list, sorted
+    prompt_version = Column(String)
+    provider_model = Column(String) # e.g. local:Qwen/Qwen2-VL-2B-Instruct, gemini:gemini-2.0-flash
+    result = Column(Text) # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
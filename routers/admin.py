@@ -13,6 +13,7 @@ from database import get_db
 import models
 from services.media import process_upload_task
 from services.logger import get_logger
+from services.executors import run_db, run_io, loop_monitor, pool_stats
 from services.faces import reindex_faces, STATUS_FILE
 import threading
 
@@ -63,6 +64,14 @@ def manage_unknown_faces_page(request: Request, db: Session = Depends(get_db)):
 def add_event_form(request: Request):
     return templates.TemplateResponse("add_event.html", {"request": request})
 
+def _save_upload(src, dest_path: str):
+    with open(dest_path, "wb") as buffer:
+        shutil.copyfileobj(src, buffer)
+
+def _create_text_event(db: Session, **fields):
+    db.add(models.TimelineEvent(**fields))
+    db.commit()
+
 @router.post("/add")
 async def create_event(
     request: Request,
@@ -88,6 +97,10 @@ async def create_event(
             "tags": tags
         }
         
+        # One fair-share source per upload request: a later single photo is not
+        # queued behind the tail of an earlier large import
+        upload_source = f"upload:{uuid.uuid4().hex[:8]}"
+
         count = 0
         if files:
             for file in files:
@@ -97,8 +110,8 @@ async def create_event(
                     temp_filename = f"{uuid.uuid4()}{ext}"
                     temp_path = os.path.join(temp_dir, temp_filename)
                     
-                    with open(temp_path, "wb") as buffer:
-                        shutil.copyfileobj(file.file, buffer)
+                    # Large videos take seconds to copy; keep it off the event loop
+                    await run_io(_save_upload, file.file, temp_path)
                     
                     # Queue the task
                     # We pass original filename to preserve user's naming if needed (though we rename usually)
@@ -106,14 +119,16 @@ async def create_event(
                         process_upload_task, 
                         temp_path, 
                         file.filename, 
-                        metadata
+                        metadata,
+                        upload_source
                     )
                     count += 1
         
         # Handle Text-Only Events (Synchronous)
         if count == 0 and (title or description):
             event_date = date_form or date_cls.today().isoformat()
-            new_event = models.TimelineEvent(
+            await run_db(
+                _create_text_event, db,
                 title=title,
                 date=event_date,
                 description=description,
@@ -121,8 +136,6 @@ async def create_event(
                 tags=tags,
                 media_type="text"
             )
-            db.add(new_event)
-            db.commit()
             print("📝 Created text-only event")
 
         msg = "업로드가 시작되었습니다. 잠시 후 갤러리에 표시됩니다." if count > 0 else "기록이 저장되었습니다."
@@ -215,6 +228,36 @@ def view_system_logs(request: Request, db: Session = Depends(get_db)):
         "error_count": error_count
     })
 
+def _apply_event_update(db: Session, event_id: int, fields: dict) -> bool:
+    """
+    Applies the edit form to an event and queues a re-index if searchable text changed.
+    Returns False if the event does not exist.
+    """
+    event = db.query(models.TimelineEvent).filter(models.TimelineEvent.id == event_id).first()
+    if not event:
+        return False
+    
+    # Title, date, note and summary all feed the search document
+    indexed_fields = lambda: (event.title, event.date, event.description, event.summary)
+    before = indexed_fields()
+    
+    if fields["title"] is not None: event.title = fields["title"]
+    if fields["date"]: event.date = fields["date"]
+    if fields["description"] is not None: event.description = fields["description"]
+    if fields["tags"] is not None: event.tags = fields["tags"]
+    if fields["summary"] is not None: event.summary = fields["summary"]
+    
+    db.commit()
+    
+    if indexed_fields() != before:
+        try:
+            from services.rag import mark_rag_dirty
+            print(f"🔄 Queuing re-index for Event {event_id}...")
+            mark_rag_dirty([event_id])
+        except Exception as e:
+            print(f"❌ Failed to queue re-index for event {event_id}: {e}")
+    return True
+
 @router.post("/update/{event_id}")
 async def update_event(
     request: Request,
@@ -226,33 +269,9 @@ async def update_event(
     summary: str = Form(None),
     db: Session = Depends(get_db)
 ):
-    event = db.query(models.TimelineEvent).filter(models.TimelineEvent.id == event_id).first()
-    if not event:
+    fields = {"title": title, "date": date, "description": description, "tags": tags, "summary": summary}
+    if not await run_db(_apply_event_update, db, event_id, fields):
         return templates.TemplateResponse("404.html", {"request": request}, status_code=404)
-    
-    # Track if RAG update is needed
-    rag_update_needed = False
-    
-    if title is not None: event.title = title
-    if date: event.date = date
-    if description is not None: event.description = description
-    if tags is not None: event.tags = tags
-    
-    # Update AI Summary
-    if summary is not None and summary != event.summary:
-        event.summary = summary
-        rag_update_needed = True
-    
-    db.commit()
-    
-    # Re-index if summary changed
-    if rag_update_needed:
-        try:
-            from services.rag import memory_vector_store
-            print(f"🔄 Re-indexing Event {event_id} due to summary update...")
-            memory_vector_store.add_events([event])
-        except Exception as e:
-            print(f"❌ Failed to re-index event {event_id}: {e}")
             
     return RedirectResponse(url="/manage", status_code=303)
 
@@ -266,6 +285,18 @@ def delete_all_events(request: Request, db: Session = Depends(get_db)):
         print(f"Error deleting from DB: {e}")
         db.rollback()
 
+    try:
+        from services.rag import memory_vector_store
+        memory_vector_store.delete_events()
+    except Exception as e:
+        print(f"Error clearing search index: {e}")
+
+    try:
+        from services.vision_payload import vision_payload
+        vision_payload.prune(max_bytes=0)
+    except Exception as e:
+        print(f"Error clearing vision payload cache: {e}")
+
     upload_dir = "static/uploads"
     if os.path.exists(upload_dir):
         for filename in os.listdir(upload_dir):
@@ -305,46 +336,85 @@ def delete_event(event_id: int, db: Session = Depends(get_db)):
                 os.remove(thumbnail_path)
             except Exception as e:
                 print(f"Error deleting thumbnail {thumbnail_path}: {e}")
-    
+
+    if event.media_type == "video":
+        from services.transcode import transcode_service
+        transcode_service.remove_renditions(event)
+    elif event.file_hash:
+        from services.vision_payload import vision_payload
+        vision_payload.remove(event.file_hash)
+
     try:
         db.delete(event)
         db.commit()
     except Exception as e:
         db.rollback()
         return JSONResponse(content={"success": False, "error": str(e)}, status_code=500)
+
+    try:
+        from services.rag import memory_vector_store
+        memory_vector_store.delete_events([event_id])
+    except Exception as e:
+        print(f"Error removing event {event_id} from search index: {e}")
     
     return JSONResponse(content={"success": True})
 
+def _queue_analysis_retries(db: Session) -> dict:
+    from services.tasks import bulk_enqueue, process_ai_for_event, INTERACTIVE_MAX_TASKS
+    from sqlalchemy import or_
+    
+    # Find photos and videos missing summary
+    events = db.query(models.TimelineEvent).filter(
+        models.TimelineEvent.media_type.in_(["photo", "video"]),
+        or_(models.TimelineEvent.summary == None, models.TimelineEvent.summary == ""),
+        models.TimelineEvent.image_url != None
+    ).all()
+    
+    # Check file existence to avoid useless queueing
+    retry_ids = [
+        event.id for event in events
+        if event.image_url and os.path.exists(os.path.join("static/uploads", event.image_url.split('/')[-1]))
+    ]
+
+    # A handful of retries is a user waiting on a result; a mass retry is background work
+    lane = "interactive" if len(retry_ids) <= INTERACTIVE_MAX_TASKS else "bulk"
+    return bulk_enqueue(process_ai_for_event, retry_ids, lane=lane, source="admin-retry")
+
 @router.post("/admin/retry-analysis")
 async def admin_retry_analysis(db: Session = Depends(get_db)):
     """
     Trigger retry of failed AI analysis for incomplete events.
     """
     try:
-        from services.tasks import enqueue_event
-        from sqlalchemy import or_
-        
-        # Find photos missing summary
-        events = db.query(models.TimelineEvent).filter(
-            models.TimelineEvent.media_type == "photo",
-            or_(models.TimelineEvent.summary == None, models.TimelineEvent.summary == ""),
-            models.TimelineEvent.image_url != None
-        ).all()
-        
-        count = 0
-        for event in events:
-            # Check file existence to avoid useless queueing
-            if event.image_url:
-                filename = event.image_url.split('/')[-1]
-                if os.path.exists(os.path.join("static/uploads", filename)):
-                     enqueue_event(event.id)
-                     count += 1
+        # Full-table scan plus one stat() per photo; run it in the DB pool
+        counts = await run_db(_queue_analysis_retries, db)
+        count = counts["queued"]
         
-        return JSONResponse({"success": True, "count": count, "message": f"Queued {count} items for retry."})
+        return JSONResponse({
+            "success": True,
+            "count": count,
+            "already_queued": counts["already_queued"],
+            "message": f"Queued {count} items for retry ({counts['already_queued']} already queued)."
+        })
     except Exception as e:
         print(f"Error in admin retry: {e}")
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
+@router.get("/api/admin/loop-stats")
+def get_loop_stats():
+    """
+    Event-loop lag (time the loop was blocked) and executor pool backlog.
+    """
+    return JSONResponse({"loop": loop_monitor.stats(), "pools": pool_stats()})
+
+@router.get("/api/admin/model-stats")
+def get_model_stats():
+    """
+    Resident in-process models vs. the memory budget, with load/unload/hit counters.
+    """
+    from services.model_manager import model_manager
+    return JSONResponse(model_manager.stats())
+
 # Settings API
 from services.config import config as AppConfig
 from pydantic import BaseModel
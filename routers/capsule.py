@@ -4,6 +4,7 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from database import get_db
 import models
+from services.executors import run_db
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
@@ -110,7 +111,7 @@ async def create_capsule(
         prompt_question=prompt_question
     )
     db.add(new_capsule)
-    db.commit()
+    await run_db(db.commit)
     
     # Redirect to home with a success query param
     # We'll need to handle this query param in the index route (routers/timeline.py)
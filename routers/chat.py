@@ -1,79 +1,132 @@
 
 import os
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from services.rag import memory_vector_store
+from services.executors import run_ai, iterate_in
+from services.config import config as AppConfig, OLLAMA_CHAT_RESERVE_MB
 from typing import List, Optional
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+NO_HITS_ANSWER = "관련된 추억을 찾지 못했어요. 😢 다른 검색어로 시도해보시겠어요?"
+
+SYSTEM_PROMPT = (
+    "You are 'Decade', a warm and nostalgic personal memory assistant. "
+    "Your goal is to help the user relive their past moments using the provided context. "
+    "Guidelines:\n"
+    "1. Language: Always answer in polite Korean (존댓말/Honorifics), using a gentle and warm tone.\n"
+    "2. Tone: Sentimental, empathetic, and appreciative of family memories.\n"
+    "3. Content: Use specific details (Date, Location, People, Weather) from the context to tell a mini-story.\n"
+    "4. Honesty: If the context doesn't have the answer, say so. Do not make up facts."
+)
+
 class ChatQuery(BaseModel):
     text: str
+    reranker: Optional[str] = None # "llm", "cross-encoder" or "none"; defaults to the 'reranker' setting
 
 class ChatResponse(BaseModel):
     answer: str
     context_items: List[dict]
 
-@router.post("/query", response_model=ChatResponse)
-async def query_memories(query: ChatQuery):
-    print(f"DEBUG: Received Chat Query: {query.text}")
-
-    # 0. MEMORY OPTIMIZATION: Unload Vision Model to free RAM for LLM
+def _make_room_for_chat_llm():
+    # MEMORY OPTIMIZATION: the local LLM (Ollama, ~5GB) runs outside this process.
+    # Evict least recently used in-process models only as far as the budget requires,
+    # instead of always dropping the vision model.
+    if AppConfig.get("ai_provider") != "local":
+        return
     try:
-        from services.analyzer import analyzer
-        # Force unload if it's lingering (Smart Batching might keep it alive)
-        # We need the RAM for Llama 3.1 (5GB) + BGE-M3
-        print("DEBUG: Force unloading Vision Model for Chat...")
-        analyzer.unload_model() 
+        from services.model_manager import model_manager
+        model_manager.make_room(OLLAMA_CHAT_RESERVE_MB)
     except Exception as e:
-        print(f"DEBUG: Warning - Could not unload vision model: {e}")
+        print(f"DEBUG: Warning - Could not free model memory: {e}")
 
-    # 1. Retrieval
-    hits = memory_vector_store.search(query.text, k=5) or [] # Increased k to 5
+def _retrieve(text: str, reranker: Optional[str] = None):
+    """
+    Blocking: frees model memory for the chat LLM if needed, then runs hybrid search.
+    Returns (hits, context_items). Call via run_ai from async routes.
+    """
+    _make_room_for_chat_llm()
     
+    # 1. Retrieval
+    hits = memory_vector_store.search(text, k=5, reranker=reranker) or [] # Increased k to 5
     print(f"DEBUG: Search returned {len(hits)} hits.")
     
     # 2. Context Construction
-    context_items = []
-    
-    for hit in hits:
-        context_items.append({
-            "text": hit['text'],
-            "score": hit['score'],
-            "metadata": hit['metadata']
-        })
+    context_items = [{
+        "text": hit['text'],
+        "score": hit['score'],
+        "metadata": hit['metadata']
+    } for hit in hits]
     
     # Debug: Log the image URLs being returned
     print(f"DEBUG: Returning {len(context_items)} context items:")
     for i, item in enumerate(context_items):
         print(f"   [{i+1}] {item['metadata'].get('image_url', 'No Image')} (Score: {item['score']:.4f})")
+    return hits, context_items
+
+def _build_user_prompt(text: str, hits: List[dict]) -> str:
+    # Format context for the LLM
+    context_block = "\n".join([f"- [Memory {i+1}] {hit['text']}" for i, hit in enumerate(hits)])
+    return f"User Question: {text}\n\nRetrieved Memories:\n{context_block}\n\nPlease answer the question based on these memories."
+
+@router.post("/query", response_model=ChatResponse)
+async def query_memories(query: ChatQuery):
+    print(f"DEBUG: Received Chat Query: {query.text}")
+
+    # Retrieval and generation block for seconds; keep them off the event loop
+    hits, context_items = await run_ai(_retrieve, query.text, query.reranker)
         
     # 3. Generation
     if not hits:
         print("DEBUG: No hits found.")
-        answer = "관련된 추억을 찾지 못했어요. 😢 다른 검색어로 시도해보시겠어요?"
+        answer = NO_HITS_ANSWER
     else:
-        # Construct Prompt
-        system_prompt = (
-            "You are 'Decade', a warm and nostalgic personal memory assistant. "
-            "Your goal is to help the user relive their past moments using the provided context. "
-            "Guidelines:\n"
-            "1. Language: Always answer in polite Korean (존댓말/Honorifics), using a gentle and warm tone.\n"
-            "2. Tone: Sentimental, empathetic, and appreciative of family memories.\n"
-            "3. Content: Use specific details (Date, Location, People, Weather) from the context to tell a mini-story.\n"
-            "4. Honesty: If the context doesn't have the answer, say so. Do not make up facts."
-        )
-        
-        # Format context for the LLM
-        context_block = "\n".join([f"- [Memory {i+1}] {hit['text']}" for i, hit in enumerate(hits)])
-        
-        user_prompt_final = f"User Question: {query.text}\n\nRetrieved Memories:\n{context_block}\n\nPlease answer the question based on these memories."
-        
         from services.ai_service import ai_service
         
         # Delegate generation to the unified service
         # This automatically handles Provider Switching (Local/Gemini) and Model Selection (Best Local)
-        answer = ai_service.generate_response(system_prompt, user_prompt_final, temperature=0.7)
+        answer = await run_ai(
+            ai_service.generate_response, SYSTEM_PROMPT, _build_user_prompt(query.text, hits), 0.7
+        )
             
     print(f"DEBUG: Final Answer: {answer[:50]}...")
     return ChatResponse(answer=answer, context_items=context_items)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.get("/stream")
+async def stream_memories(q: str = Query(..., min_length=1), reranker: Optional[str] = None):
+    """
+    Server-Sent Events version of /chat/query.
+    Events: `context` (retrieved items, sent as soon as search finishes),
+    then `token` chunks of the answer as the LLM produces them, then `done`.
+    """
+    print(f"DEBUG: Received Streaming Chat Query: {q}")
+
+    async def event_stream():
+        try:
+            hits, context_items = await run_ai(_retrieve, q, reranker)
+            yield _sse("context", {"context_items": context_items})
+
+            if not hits:
+                yield _sse("token", {"text": NO_HITS_ANSWER})
+            else:
+                from services.ai_service import ai_service
+                tokens = ai_service.generate_response_stream(SYSTEM_PROMPT, _build_user_prompt(q, hits), 0.7)
+                # The provider SDKs are blocking iterators; pull each chunk in the AI pool
+                async for token in iterate_in("ai", tokens):
+                    yield _sse("token", {"text": token})
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}")
+            yield _sse("error", {"message": str(e)})
+        yield _sse("done", {})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import Response, StreamingResponse
+from email.utils import formatdate
+import mimetypes
+import os
+from services.config import MEDIA_CACHE_MAX_AGE
+from utils.http_range import parse_range, resolve_upload_path
+
+router = APIRouter()
+
+STREAM_CHUNK_SIZE = 256 * 1024
+
+def _iter_file(path: str, start: int, end: int):
+    # Sync generator: Starlette pulls it in the threadpool, so reads never block the loop
+    remaining = end - start + 1
+    with open(path, "rb") as f:
+        f.seek(start)
+        while remaining > 0:
+            chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@router.api_route("/media/{file_path:path}", methods=["GET", "HEAD"])
+def stream_media(file_path: str, request: Request):
+    """
+    Serves uploads (videos and their renditions) with byte-range support, so
+    players can start from the faststart moov atom and seek without fetching
+    the whole file, plus ETag/Cache-Control so repeat views come from cache.
+    """
+    path = resolve_upload_path(file_path)
+    if not path or not os.path.isfile(path):
+        return Response(status_code=404)
+
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={MEDIA_CACHE_MAX_AGE}",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None # File changed since the client's partial copy: send it all
+
+    try:
+        byte_range = parse_range(range_header, size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    else:
+        start, end = 0, size - 1
+        status_code = 200
+    headers["Content-Length"] = str(end - start + 1)
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+    return StreamingResponse(_iter_file(path, start, end), status_code=status_code, headers=headers, media_type=media_type)
@@ -97,10 +97,15 @@ def delete_person(person_id: int, db: Session = Depends(get_db)):
     # Note: If cascade delete is not set up in DB schema, we do it manually safely here.
     # The models.py Relationship doesn't explicitly state cascade="all, delete", so manual is safer.
     faces = db.query(models.Face).filter(models.Face.person_id == person_id).all()
+    affected_event_ids = {face.event_id for face in faces if face.event_id}
     for face in faces:
         db.delete(face)
         
     db.delete(person)
     db.commit()
     
+    # Drop the name from those photos' search documents
+    from services.rag import mark_rag_dirty
+    mark_rag_dirty(affected_event_ids)
+    
     return {"status": "success", "message": f"Person {person_id} deleted"}
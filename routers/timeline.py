@@ -6,6 +6,7 @@ from sqlalchemy import func, or_
 from datetime import date
 from typing import Optional
 from database import get_db
+from services.config import VIDEO_SPRITE_FRAMES
 import models
 import random
 import os
@@ -16,6 +17,7 @@ PROFILE_COOKIE_NAME = "decade_journey_profile"
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
+templates.env.globals["video_sprite_frames"] = VIDEO_SPRITE_FRAMES # Tiles per sprite strip (archive hover scrub)
 
 @router.get("/")
 def read_root(request: Request, db: Session = Depends(get_db)):
@@ -95,7 +97,11 @@ def read_cinema(request: Request, db: Session = Depends(get_db)):
     results = db.query(models.TimelineEvent, models.MemoryInteraction)\
         .join(models.MemoryInteraction, models.TimelineEvent.id == models.MemoryInteraction.event_id)\
         .filter(
-            models.TimelineEvent.media_type == "photo",
+            or_(
+                models.TimelineEvent.media_type == "photo",
+                # Videos join once their low-bitrate preview exists
+                models.TimelineEvent.video_preview_url != None
+            ),
             models.MemoryInteraction.is_answered == 1
         )\
         .order_by(models.TimelineEvent.date.desc())\
@@ -315,6 +321,16 @@ def get_event_detail(event_id: int, db: Session = Depends(get_db)):
         "lat": event.latitude,
         "lng": event.longitude
     }
+    if event.media_type == "video":
+        # Range-streamed renditions (originals until transcoding has finished)
+        data.update({
+            "video_url": event.stream_url,
+            "preview_url": event.preview_stream_url,
+            "poster_url": event.thumbnail_url,
+            "sprite_url": event.video_sprite_url,
+            "sprite_frames": VIDEO_SPRITE_FRAMES,
+            "duration": event.video_duration,
+        })
     return JSONResponse(content=data)
 
 @router.get("/api/events/stack/{stack_id}")
@@ -0,0 +1,73 @@
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.rag import memory_vector_store
+from services.vector_index import vector_index
+
+def exact_search(table, vector, k):
+    query = table.search(vector)
+    # Flat scan ground truth (skip the ANN index)
+    if hasattr(query, "bypass_vector_index"):
+        query = query.bypass_vector_index()
+    return [r["id"] for r in query.limit(k).to_list()]
+
+def sample_queries(table, n):
+    # Stored vectors are realistic queries: they follow the real embedding distribution
+    rows = table.head(max(n * 10, 100)).to_pylist()
+    random.shuffle(rows)
+    return [r["vector"] for r in rows[:n]]
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+def benchmark(table_name="local", queries=50, k=10):
+    table = memory_vector_store.table_local if table_name == "local" else memory_vector_store.table_gemini
+    rows = table.count_rows()
+    print(f"📏 Benchmarking {table.name}: {rows} rows, {queries} queries, recall@{k}")
+
+    if not vector_index.is_indexed(table):
+        print("⚠️ Table has no ANN index yet. Run `python manage.py rag-optimize` (needs RAG_ANN_MIN_ROWS rows).")
+
+    vectors = sample_queries(table, queries)
+    if not vectors:
+        print("❌ Table is empty.")
+        return
+
+    truth = []
+    exact_ms = 0.0
+    for v in vectors:
+        ids, ms = timed(lambda: exact_search(table, v, k))
+        truth.append(set(ids))
+        exact_ms += ms
+    print(f"\n{'nprobes':>8} {'refine':>7} {'recall':>8} {'avg ms':>8}")
+    print(f"{'exact':>8} {'-':>7} {1.0:>8.3f} {exact_ms / len(vectors):>8.2f}")
+
+    for nprobes in (5, 10, 20, 50, 100):
+        for refine in (0, 5, 10, 20):
+            hits = 0
+            total_ms = 0.0
+            for v, expected in zip(vectors, truth):
+                results, ms = timed(lambda: vector_index.search(table, v, k, nprobes=nprobes, refine_factor=refine).to_list())
+                total_ms += ms
+                hits += len(expected & {r["id"] for r in results})
+            recall = hits / max(1, sum(len(t) for t in truth))
+            print(f"{nprobes:>8} {refine:>7} {recall:>8.3f} {total_ms / len(vectors):>8.2f}")
+
+    print("\nPick the cheapest row with acceptable recall and set RAG_ANN_NPROBES / RAG_ANN_REFINE_FACTOR in .env")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ANN recall vs latency for the memory vector tables")
+    parser.add_argument("--table", choices=["local", "gemini"], default="local")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+    benchmark(args.table, args.queries, args.k)
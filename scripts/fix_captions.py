@@ -77,7 +77,8 @@ def fix_captions():
             names = list(set(names))
             
             try:
-                new_caption = analyzer.generate_caption(file_path, names)
+                # refresh: the cached caption is the broken one
+                new_caption = analyzer.generate_caption(file_path, names, refresh=True)
                 event.summary = new_caption
                 print(f"    [New] {new_caption.splitlines()[0]}...")
                 success_count += 1
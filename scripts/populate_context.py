@@ -6,9 +6,13 @@ sys.path.append(os.getcwd())
 from database import SessionLocal
 import models
 from services.context import context_service
+from services.weather import weather_service
 import time
 
 def populate_all():
+    # Weather first: one archive request per location/date range instead of one per photo
+    print(f"☁️ Weather enriched for {weather_service.enrich_pending()} events.")
+
     db = SessionLocal()
     try:
         events = db.query(models.TimelineEvent).filter(
@@ -50,15 +50,19 @@ def process_backlog():
 
         print(f"📋 Found {len(events)} events waiting for AI Code analysis.")
         
+        backlog_ids = []
         for event in events:
             file_path = event.image_url.lstrip("/")
             full_path = os.path.join(os.getcwd(), "static/uploads", os.path.basename(file_path))
             
             if os.path.exists(full_path):
                 print(f"   -> Queuing Event {event.id} ({os.path.basename(file_path)})")
-                tasks.enqueue_event(event.id)
+                backlog_ids.append(event.id)
             else:
                 print(f"   ⚠️ File missing for Event {event.id}: {full_path}")
+
+        counts = tasks.bulk_enqueue(tasks.process_ai_for_event, backlog_ids, lane="bulk", source="backlog")
+        print(f"   {counts['queued']} queued, {counts['already_queued']} already queued.")
         
         print("\n⏳  Processing... (This may take a while depending on model speed)")
         print("    Please wait until this script finishes.")
@@ -1,17 +1,14 @@
 
 import sys
 import os
-import time
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import SessionLocal
-import models
-from services.rag import memory_vector_store
+from services.rag import Indexer
 from services.config import config
 
-def reindex_safely():
+def reindex_safely(resume: bool = True):
     print("🧠 Starting Safe Dual-Indexing (Local + Gemini)...")
     
     # Ensure Gemini Key is present
@@ -20,31 +17,10 @@ def reindex_safely():
         print("   If you want Cloud Brain, set GEMINI_API_KEY in .env")
         # We continue anyway, as add_events handles missing keys gracefully (skips gemini)
     
-    db = SessionLocal()
     try:
-        # Fetch all events
-        events = db.query(models.TimelineEvent).all()
-        total = len(events)
-        print(f"📚 Found {total} memories to index.")
-        
-        chunk_size = 5
-        processed = 0
-        
-        for i in range(0, total, chunk_size):
-            chunk = events[i : i + chunk_size]
-            
-            print(f"🔄 Processing batch {i+1}-{min(i+chunk_size, total)} of {total}...")
-            memory_vector_store.add_events(chunk)
-            
-            processed += len(chunk)
-            
-            # Rate Limiting Sleep
-            # Free Tier (Flash) is 15 RPM for some endpoints.
-            # Processing 5 items per batch. 
-            # 5s sleep ensures we don't exceed ~60 requests/min even with overhead.
-            sleep_time = 5
-            print(f"⏳ Sleeping {sleep_time}s to respect API Rate Limits...")
-            time.sleep(sleep_time)
+        # Pages through events with a bounded read-ahead and checkpoints after each page,
+        # so an interrupted run picks up where it stopped.
+        processed = Indexer.index_all(resume=resume)
 
         print("\n✅ Re-indexing Complete!")
         print(f"   Total Processed: {processed}")
@@ -52,8 +28,7 @@ def reindex_safely():
 
     except Exception as e:
         print(f"❌ Error during re-indexing: {e}")
-    finally:
-        db.close()
+        print("   Run again to resume from the last checkpoint.")
 
 if __name__ == "__main__":
-    reindex_safely()
+    reindex_safely(resume="--restart" not in sys.argv)
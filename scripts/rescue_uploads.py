@@ -35,7 +35,7 @@ def rescue_uploads():
         print(f"Processing {filename}...")
         try:
             # Metadata is empty as we lost it in the queue
-            process_upload_task(temp_path, filename, metadata={})
+            process_upload_task(temp_path, filename, metadata={}, source="rescue-uploads")
             success_count += 1
         except Exception as e:
             print(f"❌ Failed to rescue {filename}: {e}")
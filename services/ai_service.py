@@ -250,5 +250,47 @@ class AIService:
             logger.error(f"AI Generation Error ({provider}): {e}")
             return f"오류가 발생했습니다: {str(e)}"
 
+    def generate_response_stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.7):
+        """
+        Streaming variant of generate_response: yields text chunks from the active provider.
+        """
+        provider = config.get("ai_provider")
+        
+        try:
+            if provider == "gemini":
+                from services.gemini import gemini_service
+                yield from gemini_service.chat_query_stream(system_prompt, user_prompt, temperature)
+            else:
+                # Local (Ollama)
+                from services.ollama_manager import ollama_manager
+                import ollama
+                
+                if not ollama_manager.ensure_running():
+                    yield "죄송합니다. 로컬 AI 서버(Ollama)가 응답하지 않습니다."
+                    return
+
+                model_name = ollama_manager.get_best_model()
+                stream = ollama.chat(
+                    model=model_name, 
+                    messages=[
+                        {'role': 'system', 'content': system_prompt},
+                        {'role': 'user', 'content': user_prompt}
+                    ],
+                    options={
+                        "temperature": temperature,
+                        "num_ctx": 4096,
+                        "keep_alive": "5m" 
+                    },
+                    stream=True
+                )
+                for chunk in stream:
+                    text = chunk['message']['content']
+                    if text:
+                        yield text
+                
+        except Exception as e:
+            logger.error(f"AI Streaming Error ({provider}): {e}")
+            yield f"오류가 발생했습니다: {str(e)}"
+
 # Singleton
 ai_service = AIService()
@@ -15,6 +15,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 UPLOAD_DIR = Path(os.getenv("DECADE_UPLOAD_DIR", BASE_DIR / "static/uploads"))
 CHROMA_DIR = Path(os.getenv("DECADE_CHROMA_DIR", BASE_DIR / "chroma_db"))
 BACKUP_DIR = Path(os.getenv("DECADE_BACKUP_DIR", BASE_DIR / "backups"))
+# GeoNames-style cities file for the offline reverse geocoder (optional, user-supplied)
+GAZETTEER_PATH = Path(os.getenv("DECADE_GAZETTEER_PATH", BASE_DIR / "data/geonames/cities15000.txt"))
 
 # Ensure dirs exist
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
@@ -29,6 +31,104 @@ MIN_FACE_RATIO = float(os.getenv("MIN_FACE_RATIO", "0.015"))
 # Ignore low-confidence detections (0.0 - 1.0)
 FACE_DETECTION_THRESHOLD = float(os.getenv("FACE_DETECTION_THRESHOLD", "0.6"))
 
+# Context Enrichment Tunables
+# Geohash length used to bucket reverse-geocode results (5 = ~5km cells, 6 = ~1km cells)
+GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", "5"))
+# Offline geocoder hits further than this from the nearest known place fall back to Nominatim
+GEOCODER_MAX_DISTANCE_KM = float(os.getenv("GEOCODER_MAX_DISTANCE_KM", "15"))
+# Decimal places used to round coordinates for weather lookups (1 = ~11km grid)
+WEATHER_GRID_DECIMALS = int(os.getenv("WEATHER_GRID_DECIMALS", "1"))
+# Split a location's dates into separate archive requests when they are further apart than this
+WEATHER_MAX_GAP_DAYS = int(os.getenv("WEATHER_MAX_GAP_DAYS", "14"))
+
+# RAG Indexing Tunables
+# Texts per SentenceTransformer.encode() mini-batch
+RAG_EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "32"))
+# Write-behind buffer: flush after this many dirty events or this many seconds
+RAG_FLUSH_SIZE = int(os.getenv("RAG_FLUSH_SIZE", "64"))
+RAG_FLUSH_INTERVAL = float(os.getenv("RAG_FLUSH_INTERVAL", "20"))
+# Full re-index: events read per DB page, and pages read ahead of the embedder
+RAG_INDEX_PAGE_SIZE = int(os.getenv("RAG_INDEX_PAGE_SIZE", "200"))
+RAG_INDEX_PREFETCH_PAGES = int(os.getenv("RAG_INDEX_PREFETCH_PAGES", "2"))
+
+# ANN vector index (LanceDB). Below RAG_ANN_MIN_ROWS a flat scan is fast enough.
+RAG_ANN_MIN_ROWS = int(os.getenv("RAG_ANN_MIN_ROWS", "5000"))
+RAG_ANN_INDEX_TYPE = os.getenv("RAG_ANN_INDEX_TYPE", "IVF_PQ") # IVF_PQ or IVF_HNSW_SQ
+# Optimize (compact fragments + fold new rows into the index) after this many inserts
+RAG_ANN_OPTIMIZE_EVERY = int(os.getenv("RAG_ANN_OPTIMIZE_EVERY", "500"))
+# Retrain partitions from scratch once the table grew by this fraction since the last build
+RAG_ANN_REBUILD_GROWTH = float(os.getenv("RAG_ANN_REBUILD_GROWTH", "0.5"))
+# Query-time recall/latency trade-off: partitions probed, and re-ranking of k * refine_factor candidates
+RAG_ANN_NPROBES = int(os.getenv("RAG_ANN_NPROBES", "20"))
+RAG_ANN_REFINE_FACTOR = int(os.getenv("RAG_ANN_REFINE_FACTOR", "10"))
+
+# Ensemble search: per-branch deadlines (seconds). A late branch is left out of the fusion.
+RAG_LOCAL_SEARCH_TIMEOUT = float(os.getenv("RAG_LOCAL_SEARCH_TIMEOUT", "10"))
+RAG_GEMINI_SEARCH_TIMEOUT = float(os.getenv("RAG_GEMINI_SEARCH_TIMEOUT", "3"))
+
+# Query-side caches: query embeddings (per model) and final result lists (per index version)
+RAG_QUERY_CACHE_SIZE = int(os.getenv("RAG_QUERY_CACHE_SIZE", "512"))
+RAG_QUERY_EMBED_TTL = float(os.getenv("RAG_QUERY_EMBED_TTL", "3600"))
+RAG_RESULT_CACHE_TTL = float(os.getenv("RAG_RESULT_CACHE_TTL", "600"))
+
+# Reranking: cross-encoder model, pairs per forward pass, and how long pair scores are cached
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "BAAI/bge-reranker-v2-m3")
+RERANKER_BATCH_SIZE = int(os.getenv("RERANKER_BATCH_SIZE", "16"))
+RERANKER_CACHE_TTL = float(os.getenv("RERANKER_CACHE_TTL", "86400"))
+
+# Gemini embedding batches (batchEmbedContents accepts up to 100 texts per request)
+GEMINI_EMBED_BATCH_SIZE = int(os.getenv("GEMINI_EMBED_BATCH_SIZE", "100"))
+# Batch requests in flight at once, and the overall request rate across them
+GEMINI_EMBED_CONCURRENCY = int(os.getenv("GEMINI_EMBED_CONCURRENCY", "2"))
+GEMINI_EMBED_RPM = int(os.getenv("GEMINI_EMBED_RPM", "300"))
+
+# Executor pools for async routes (blocking DB / file I/O / AI calls)
+EXECUTOR_DB_WORKERS = int(os.getenv("EXECUTOR_DB_WORKERS", "4"))
+EXECUTOR_IO_WORKERS = int(os.getenv("EXECUTOR_IO_WORKERS", "4"))
+EXECUTOR_AI_WORKERS = int(os.getenv("EXECUTOR_AI_WORKERS", "2"))
+# Event-loop lag monitor: sampling interval (s) and the lag (ms) that gets logged
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+LOOP_LAG_WARN_MS = float(os.getenv("LOOP_LAG_WARN_MS", "100"))
+
+# Model registry: RAM budget (MB) for in-process models and the ones never evicted
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "8000"))
+MODEL_PINNED = [m.strip() for m in os.getenv("MODEL_PINNED", "bge-m3").split(",") if m.strip()]
+# RAM the local chat LLM (Ollama) needs; in-process models are evicted to make room for it
+OLLAMA_CHAT_RESERVE_MB = int(os.getenv("OLLAMA_CHAT_RESERVE_MB", "5000"))
+
+# Local vision (Qwen2-VL): images per generate() call for captioning backfills
+VISION_BATCH_SIZE = int(os.getenv("VISION_BATCH_SIZE", "4"))
+
+# Cloud vision payloads: longest edge sent per provider (px) and JPEG quality
+VISION_GEMINI_MAX_EDGE = int(os.getenv("VISION_GEMINI_MAX_EDGE", "1536"))
+VISION_GROQ_MAX_EDGE = int(os.getenv("VISION_GROQ_MAX_EDGE", "1120"))
+VISION_JPEG_QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+# Disk budget for cached payloads (data/vision_payloads); least recently used files go first
+VISION_PAYLOAD_CACHE_MB = int(os.getenv("VISION_PAYLOAD_CACHE_MB", "512"))
+
+# Video analysis: frames sampled per second in the decode pass, histogram change
+# (Bhattacharyya distance, 0-1) that counts as a new scene, and keyframes kept
+VIDEO_SAMPLE_FPS = float(os.getenv("VIDEO_SAMPLE_FPS", "1.0"))
+VIDEO_SCENE_THRESHOLD = float(os.getenv("VIDEO_SCENE_THRESHOLD", "0.35"))
+VIDEO_MAX_KEYFRAMES = int(os.getenv("VIDEO_MAX_KEYFRAMES", "6"))
+
+# Video transcoding (ffmpeg): web rendition short edge/quality, low-bitrate preview,
+# sprite strip size, and how long browsers may cache streamed media (seconds)
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")
+VIDEO_WEB_HEIGHT = int(os.getenv("VIDEO_WEB_HEIGHT", "1080"))
+VIDEO_WEB_CRF = int(os.getenv("VIDEO_WEB_CRF", "23"))
+VIDEO_X264_PRESET = os.getenv("VIDEO_X264_PRESET", "medium")
+VIDEO_PREVIEW_HEIGHT = int(os.getenv("VIDEO_PREVIEW_HEIGHT", "360"))
+VIDEO_PREVIEW_KBPS = int(os.getenv("VIDEO_PREVIEW_KBPS", "400"))
+VIDEO_SPRITE_FRAMES = int(os.getenv("VIDEO_SPRITE_FRAMES", "10"))
+VIDEO_SPRITE_WIDTH = int(os.getenv("VIDEO_SPRITE_WIDTH", "160"))
+# ffmpeg time budget per second of source (capped), and the length above which a
+# source is encoded with a faster preset in the bulk lane
+VIDEO_TRANSCODE_SPEED_FACTOR = float(os.getenv("VIDEO_TRANSCODE_SPEED_FACTOR", "3"))
+VIDEO_TRANSCODE_MAX_SECONDS = int(os.getenv("VIDEO_TRANSCODE_MAX_SECONDS", "1800"))
+VIDEO_LONG_SOURCE_SECONDS = int(os.getenv("VIDEO_LONG_SOURCE_SECONDS", "300"))
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", "604800"))
+
 class ConfigService:
     _instance = None
     _lock = threading.Lock()
@@ -63,7 +163,9 @@ class ConfigService:
         "gemini_api_key": "GEMINI_API_KEY",
         "groq_api_key": "GROQ_API_KEY",
         "wedding_anniversary": "WEDDING_ANNIVERSARY", 
-        "gemini_model": "GEMINI_MODEL"
+        "gemini_model": "GEMINI_MODEL",
+        "geocoder_provider": "GEOCODER_PROVIDER",
+        "reranker": "RERANKER"
     }
 
     def get(self, key: str, default=None):
@@ -81,6 +183,7 @@ class ConfigService:
         if default is None:
             if key == "ai_provider": return "local"
             if key == "theme": return "classic"
+            if key == "geocoder_provider": return "nominatim"
         
         return default
 
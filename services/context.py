@@ -3,20 +3,79 @@ import time
 from database import SessionLocal
 import models
 from datetime import datetime
+from services.config import config, GEOCODE_CACHE_PRECISION
+from utils.geo import geohash_encode
 
 class ContextService:
     def __init__(self):
         self.headers = {
             "User-Agent": "DecadeJourney/1.0 (context@decadejourney.local)"
         }
+        # In-process memo on top of the geocode_cache table (geohash -> name)
+        self._geocode_memo = {}
+
+    def _lookup_geocode(self, cell: str):
+        """
+        Returns the cached name for a geohash cell ("" for a cached miss),
+        or None if the cell has never been resolved.
+        """
+        if cell in self._geocode_memo:
+            return self._geocode_memo[cell]
+
+        db = SessionLocal()
+        try:
+            row = db.query(models.GeocodeCache).filter(models.GeocodeCache.geohash == cell).first()
+            if row is None:
+                return None
+            self._geocode_memo[cell] = row.location_name or ""
+            return self._geocode_memo[cell]
+        except Exception as e:
+            print(f"⚠️ Geocode cache lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _store_geocode(self, cell: str, location_name: str, source: str):
+        self._geocode_memo[cell] = location_name or ""
+        db = SessionLocal()
+        try:
+            row = db.query(models.GeocodeCache).filter(models.GeocodeCache.geohash == cell).first()
+            if row is None:
+                db.add(models.GeocodeCache(geohash=cell, location_name=location_name or "", source=source))
+            else:
+                row.location_name = location_name or ""
+                row.source = source
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Geocode cache write failed: {e}")
+        finally:
+            db.close()
 
     def get_address(self, lat: float, lon: float) -> str:
         """
         Reverse geocoding using OpenStreetMap (Nominatim).
         Returns nicely formatted "City, Country" or "Town".
+        Results are cached per geohash cell, so nearby photos resolve locally.
+        With geocoder_provider=offline, the local gazetteer answers first and
+        Nominatim is only used for low-confidence hits.
         """
         if not lat or not lon:
             return None
+
+        cell = geohash_encode(lat, lon, GEOCODE_CACHE_PRECISION)
+        cached = self._lookup_geocode(cell)
+        if cached is not None:
+            return cached or None
+
+        if config.get("geocoder_provider") == "offline":
+            try:
+                from services.geocoder import offline_geocoder
+                address = offline_geocoder.resolve(lat, lon)
+                if address:
+                    return address
+            except Exception as e:
+                print(f"⚠️ Offline geocoder error (falling back to Nominatim): {e}")
             
         try:
             # Add delay to respect usage policy
@@ -35,7 +94,9 @@ class ContextService:
                 if city: parts.append(city)
                 if country: parts.append(country)
                 
-                return ", ".join(parts)
+                address = ", ".join(parts)
+                self._store_geocode(cell, address, "nominatim")
+                return address or None
         except Exception as e:
             print(f"⚠️ Geocoding error: {e}")
             return None
@@ -44,54 +105,15 @@ class ContextService:
     def get_weather(self, lat: float, lon: float, date_str: str) -> str:
         """
         Get historical weather from Open-Meteo.
-        Open-Meteo Historical Weather API.
+        Delegates to WeatherService, which fetches whole location/date ranges
+        in one archive request and serves the rest from the weather_cache table.
         """
-        if not lat or not lon or not date_str:
-            return None
-            
+        from services.weather import weather_service
         try:
-            # Open-Meteo requires YYYY-MM-DD
-            # And it's an archive API usually.
-            # Does it support 'today'? Yes, via forecast API, but we usually look at history.
-            
-            # Check if date is today/future? If so use forecast.
-            # But assume historical for now.
-            
-            url = f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}&start_date={date_str}&end_date={date_str}&daily=weathercode,temperature_2m_max&timezone=auto"
-            
-            resp = requests.get(url, timeout=5)
-            if resp.status_code == 200:
-                data = resp.json()
-                daily = data.get("daily", {})
-                
-                # Decode Weather Code (WMO)
-                code = daily.get("weathercode", [None])[0]
-                temp = daily.get("temperature_2m_max", [None])[0]
-                
-                condition = self._wmo_to_string(code)
-                
-                if condition and temp is not None:
-                    return f"{condition}, {temp}°C"
-                elif condition:
-                    return condition
-                    
+            return weather_service.get_weather(lat, lon, date_str)
         except Exception as e:
             print(f"⚠️ Weather fetch error: {e}")
             return None
-        return None
-        
-    def _wmo_to_string(self, code):
-        if code is None: return None
-        # Simplified WMO Table
-        if code == 0: return "Clear Sky ☀️"
-        if code in [1, 2, 3]: return "Partly Cloudy ⛅"
-        if code in [45, 48]: return "Foggy 🌫️"
-        if code in [51, 53, 55]: return "Drizzle 🌧️"
-        if code in [61, 63, 65]: return "Rain 🌧️"
-        if code in [71, 73, 75]: return "Snow ❄️"
-        if code in [80, 81, 82]: return "Rain Showers 🌦️"
-        if code in [95, 96, 99]: return "Thunderstorm ⚡"
-        return "Cloudy ☁️"
 
     def enrich_event(self, event_id: int):
         db = SessionLocal()
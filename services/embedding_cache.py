@@ -0,0 +1,85 @@
+import hashlib
+import numpy as np
+from database import SessionLocal
+import models
+from services.logger import get_logger
+
+logger = get_logger("embedding_cache")
+
+# Stay well under SQLite's bound-parameter limit for IN (...) lookups
+_LOOKUP_CHUNK = 500
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class EmbeddingCacheService:
+    """
+    Persistent embedding cache keyed by (model, text hash).
+    Vectors are stored as float32 bytes in the main database.
+    """
+    def get_many(self, model: str, hashes: list[str]) -> dict:
+        """
+        Returns {text_hash: vector (list of floats)} for the hashes already cached.
+        """
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        db = SessionLocal()
+        try:
+            for i in range(0, len(unique), _LOOKUP_CHUNK):
+                rows = db.query(models.EmbeddingCache).filter(
+                    models.EmbeddingCache.model == model,
+                    models.EmbeddingCache.text_hash.in_(unique[i:i + _LOOKUP_CHUNK])
+                ).all()
+                for row in rows:
+                    found[row.text_hash] = np.frombuffer(row.vector, dtype=np.float32).tolist()
+        except Exception as e:
+            logger.warning(f"⚠️ Embedding cache read failed: {e}")
+        finally:
+            db.close()
+        return found
+
+    def put_many(self, model: str, entries: dict):
+        """
+        Stores {text_hash: vector}. Existing entries are overwritten.
+        """
+        if not entries:
+            return
+        db = SessionLocal()
+        try:
+            for h, vector in entries.items():
+                arr = np.asarray(vector, dtype=np.float32)
+                db.merge(models.EmbeddingCache(
+                    model=model, text_hash=h, dim=int(arr.shape[0]), vector=arr.tobytes()
+                ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"⚠️ Embedding cache write failed: {e}")
+        finally:
+            db.close()
+
+    def embed(self, model: str, texts: list[str], embed_fn) -> list:
+        """
+        Returns embeddings aligned with `texts`, calling `embed_fn(list_of_texts)`
+        only for texts not cached under `model`. Misses that embed_fn returns as
+        None/empty stay None and are not cached.
+        """
+        hashes = [text_hash(t) for t in texts]
+        cached = self.get_many(model, hashes)
+
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+
+        if missing:
+            fresh = embed_fn(list(missing.values()))
+            new_entries = {h: v for h, v in zip(missing.keys(), fresh) if v is not None and len(v)}
+            self.put_many(model, new_entries)
+            cached.update(new_entries)
+
+        logger.info(f"🗃️ Embeddings [{model}]: {len(texts) - len(missing)} cached, {len(missing)} computed")
+        return [cached.get(h) for h in hashes]
+
+# Singleton
+embedding_cache = EmbeddingCacheService()
@@ -0,0 +1,108 @@
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from services.config import (
+    EXECUTOR_DB_WORKERS, EXECUTOR_IO_WORKERS, EXECUTOR_AI_WORKERS,
+    LOOP_LAG_INTERVAL, LOOP_LAG_WARN_MS
+)
+from services.logger import get_logger
+
+logger = get_logger("executors")
+
+# Separate pools so a few slow LLM calls can't take every thread a DB write or file copy needs
+POOLS = {
+    "db": ThreadPoolExecutor(max_workers=EXECUTOR_DB_WORKERS, thread_name_prefix="exec-db"),
+    "io": ThreadPoolExecutor(max_workers=EXECUTOR_IO_WORKERS, thread_name_prefix="exec-io"),
+    "ai": ThreadPoolExecutor(max_workers=EXECUTOR_AI_WORKERS, thread_name_prefix="exec-ai"),
+}
+
+async def run_in(pool: str, fn, *args, **kwargs):
+    """
+    Runs a blocking callable in the named pool and awaits its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(POOLS[pool], functools.partial(fn, *args, **kwargs))
+
+async def run_db(fn, *args, **kwargs):
+    return await run_in("db", fn, *args, **kwargs)
+
+async def run_io(fn, *args, **kwargs):
+    return await run_in("io", fn, *args, **kwargs)
+
+async def run_ai(fn, *args, **kwargs):
+    return await run_in("ai", fn, *args, **kwargs)
+
+async def iterate_in(pool: str, iterator):
+    """
+    Async-iterates a blocking iterator (e.g. an LLM token stream), pulling each item in the pool.
+    """
+    done = object()
+    it = iter(iterator)
+    while True:
+        item = await run_in(pool, next, it, done)
+        if item is done:
+            return
+        yield item
+
+def pool_stats() -> dict:
+    return {
+        name: {"workers": pool._max_workers, "queued": pool._work_queue.qsize()}
+        for name, pool in POOLS.items()
+    }
+
+def shutdown_pools():
+    for pool in POOLS.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed sleep.
+    Any lag means some handler ran blocking code on the loop; lags above
+    LOOP_LAG_WARN_MS are logged so the offender can be found.
+    """
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, warn_ms: float = LOOP_LAG_WARN_MS):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        self._task = None
+        self.samples = 0
+        self.blocked_events = 0
+        self.total_blocked_ms = 0.0
+        self.max_lag_ms = 0.0
+        self.last_lag_ms = 0.0
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self.samples += 1
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms >= self.warn_ms:
+                self.blocked_events += 1
+                self.total_blocked_ms += lag_ms
+                logger.warning(f"🐢 Event loop blocked for {lag_ms:.0f}ms")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"⏱️ Loop-lag monitor started (interval {self.interval}s, warn at {self.warn_ms:.0f}ms)")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "samples": self.samples,
+            "last_lag_ms": round(self.last_lag_ms, 1),
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "blocked_events": self.blocked_events,
+            "total_blocked_ms": round(self.total_blocked_ms, 1),
+            "warn_ms": self.warn_ms,
+        }
+
+# Singleton
+loop_monitor = LoopLagMonitor()
@@ -20,6 +20,7 @@ logging.getLogger("insightface").setLevel(logging.WARNING)
 from insightface.app import FaceAnalysis
 
 from starlette.concurrency import run_in_threadpool
+from services.model_manager import model_manager
 from database import get_db, SessionLocal
 import models
 from services.logger import get_logger
@@ -33,25 +34,35 @@ MATCH_THRESHOLD = FACE_SIMILARITY_THRESHOLD
 
 STATUS_FILE = "indexing_status.json"
 
+FACE_MODEL_NAME = "insightface"
+FACE_MODEL_MB = 400 # buffalo_l detection + recognition ONNX sessions
+
+def _load_face_app():
+    # Initialize InsightFace App (Buffalo_L is light and accurate)
+    # providers=['CPUExecutionProvider'] force CPU to avoid CUDA dependency hell issues if not set up
+    # If user has GPU, they can change this, but CPU is safer for general consumption.
+    # Context manager to suppress stdout/stderr from C++ libs (ONNXRuntime/InsightFace)
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
+            app.prepare(ctx_id=0, det_size=(640, 640))
+    
+    logger.info("✅ InsightFace: Ready (Buffalo_L)")
+    return app
+
+model_manager.register(FACE_MODEL_NAME, FACE_MODEL_MB, _load_face_app)
+
 class FaceIdentifier:
-    def __init__(self):
-        # Initialize InsightFace App (Buffalo_L is light and accurate)
-        # providers=['CPUExecutionProvider'] force CPU to avoid CUDA dependency hell issues if not set up
-        # If user has GPU, they can change this, but CPU is safer for general consumption.
+    @property
+    def app(self):
+        """
+        InsightFace app, loaded on first use and kept warm by the model manager.
+        """
         try:
-            # Context manager to suppress stdout/stderr from C++ libs (ONNXRuntime/InsightFace)
-            with open(os.devnull, 'w') as devnull:
-                with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
-                    self.app = FaceAnalysis(name='buffalo_l', providers=['CPUExecutionProvider'])
-                    self.app.prepare(ctx_id=0, det_size=(640, 640))
-            
-            logger.info("✅ InsightFace: Ready (Buffalo_L)")
-        except Exception as e:
-            logger.error(f"❌ Failed to load InsightFace: {e}")
-            self.app = None
+            return model_manager.acquire(FACE_MODEL_NAME)
         except Exception as e:
             logger.error(f"❌ Failed to load InsightFace: {e}")
-            self.app = None
+            return None
 
     def detect_faces(self, image_path: str):
          # Legacy Sync Wrapper
@@ -70,7 +81,8 @@ class FaceIdentifier:
         2. InsightFace Inference (Detect + Align + Embed)
         3. Return 512d embeddings
         """
-        if not self.app:
+        app = self.app
+        if not app:
             logger.error("InsightFace app not initialized.")
             return []
 
@@ -90,7 +102,8 @@ class FaceIdentifier:
             
             # 2. Inference
             # app.get() returns list of Face objects with embedding, bbox, kps, etc.
-            faces = self.app.get(img)
+            with model_manager.use(FACE_MODEL_NAME) as app:
+                faces = app.get(img)
             
             final_results = []
             
@@ -553,6 +566,11 @@ def batch_label_face_cluster(person_ids: list, new_name: str):
              db.commit()
              db.refresh(target_person)
              
+        affected_event_ids = [
+            event_id for (event_id,) in db.query(models.Face.event_id)
+                .filter(models.Face.person_id.in_(person_ids)).distinct()
+        ]
+
         # Update Faces
         db.query(models.Face).filter(models.Face.person_id.in_(person_ids))\
             .update({models.Face.person_id: target_person.id}, synchronize_session=False)
@@ -563,6 +581,10 @@ def batch_label_face_cluster(person_ids: list, new_name: str):
             db.query(models.Person).filter(models.Person.id.in_(safe_ids)).delete(synchronize_session=False)
             
         db.commit()
+
+        # New name appears in the search documents of every photo in the cluster
+        from services.rag import mark_rag_dirty
+        mark_rag_dirty(affected_event_ids)
         return True
     except Exception as e:
         logger.error(f"Batch label failed: {e}")
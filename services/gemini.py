@@ -1,15 +1,38 @@
 
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import google.generativeai as genai
 from google.api_core.exceptions import ResourceExhausted
-from services.config import config
+from services.config import config, GEMINI_EMBED_BATCH_SIZE, GEMINI_EMBED_CONCURRENCY, GEMINI_EMBED_RPM
 from services.logger import get_logger
-from PIL import Image
+from utils.scene import build_scene_prompt, build_video_prompt, parse_scene_response
+from services.vision_payload import vision_payload
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import traceback
 
 logger = get_logger("gemini")
 
+EMBEDDING_MODEL = "models/text-embedding-004"
+
+class RateLimiter:
+    """
+    Spaces calls out to at most `per_minute`, shared across threads.
+    """
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / max(1, per_minute)
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 class GeminiService:
     _instance = None
     
@@ -17,6 +40,7 @@ class GeminiService:
         if cls._instance is None:
             cls._instance = super(GeminiService, cls).__new__(cls)
             cls._instance.available_models = [] # List of model names sorted by priority
+            cls._instance._embed_limiter = RateLimiter(GEMINI_EMBED_RPM)
             # Do NOT trigger DB access (refresh_best_model) here.
             # It causes crashes if DB is not yet created (e.g. after reset).
             # It will be triggered lazily by _get_model_name() on first use.
@@ -173,7 +197,7 @@ class GeminiService:
             model_name = self._get_model_name()
             logger.info(f"✨ Gemini: Analyzing Image with {model_name}...")
             # removed direct instantiation here, handled in wrapper
-            img = Image.open(image_path)
+            img = vision_payload.gemini_part(image_path) # Downscaled JPEG, cached per file hash
             
             prompt = "Analyze this image and provide 5-10 relevant tags describing the content, scene, objects, and especially the MOOD (e.g., Joyful, Melancholic) and FACIAL EXPRESSIONS (e.g., Happy, Surprised). For every English tag, also provide its Korean translation. Return ONLY the mixed list of English and Korean tags separated by commas."
             
@@ -189,6 +213,67 @@ class GeminiService:
             logger.error(f"❌ Gemini Tagging Error: {e}")
             return []
 
+    # Bump when the generate_caption prompt changes (invalidates cached captions)
+    CAPTION_PROMPT_VERSION = "gemini-caption-1"
+
+    def vision_model_id(self, model_name: str = None) -> str:
+        """
+        provider:model identifier used to key cached vision outputs.
+        """
+        return f"gemini:{model_name or self._get_model_name()}"
+
+    def analyze_scene(self, image_path: str, names: list[str] = None, model_name: str = None) -> dict:
+        """
+        Tags, caption (+ Korean), mood and OCR in ONE multimodal request (JSON output).
+        Returns None if the answer can't be parsed so the caller can fall back to
+        separate tag/caption calls. API errors propagate (for provider failover).
+        """
+        if not self._configure():
+            return None
+
+        target_model = model_name or self._get_model_name()
+        logger.info(f"✨ Gemini: Analyzing Scene with {target_model} (combined)...")
+        img = vision_payload.gemini_part(image_path) # Downscaled JPEG, cached per file hash
+        
+        response = self._generate_content_with_fallback(
+            target_model,
+            [build_scene_prompt(names), img],
+            config={"response_mime_type": "application/json", "temperature": 0.4}
+        )
+        try:
+            result = parse_scene_response(response.text)
+        except ValueError as e:
+            logger.warning(f"⚠️ Gemini: Unusable scene JSON ({e})")
+            return None
+        logger.info(f"✅ Gemini: Scene analyzed ({len(result['tags'])} tags, mood {result['mood']}).")
+        return result
+
+    def analyze_video_frames(self, keyframes: list, names: list[str] = None, model_name: str = None) -> dict:
+        """
+        Whole-video analysis from in-memory keyframes (services.video.Keyframe) in ONE
+        multimodal request. Same result shape and failure contract as analyze_scene.
+        """
+        if not self._configure():
+            return None
+
+        target_model = model_name or self._get_model_name()
+        logger.info(f"✨ Gemini: Analyzing Video ({len(keyframes)} keyframes) with {target_model}...")
+        prompt = build_video_prompt([k.label for k in keyframes], names)
+        parts = [vision_payload.image_part(k.image) for k in keyframes]
+        
+        response = self._generate_content_with_fallback(
+            target_model,
+            [prompt, *parts],
+            config={"response_mime_type": "application/json", "temperature": 0.4}
+        )
+        try:
+            result = parse_scene_response(response.text)
+        except ValueError as e:
+            logger.warning(f"⚠️ Gemini: Unusable video JSON ({e})")
+            return None
+        logger.info(f"✅ Gemini: Video analyzed ({len(result['tags'])} tags, mood {result['mood']}).")
+        return result
+
     def generate_caption(self, image_path: str, names: list[str] = None, model_name: str = None) -> str:
         """
         Generates a detailed caption using Gemini.
@@ -203,7 +288,7 @@ class GeminiService:
             # No need to instantiate model here, _generate_content_with_fallback does it via get_model helper
             # But wait, Helper logic in _generate_content_with_fallback uses `genai.GenerativeModel(name)`
             
-            img = Image.open(image_path)
+            img = vision_payload.gemini_part(image_path) # Downscaled JPEG, cached per file hash
             
             people_context = ""
             if names:
@@ -253,6 +338,39 @@ class GeminiService:
             logger.error(f"❌ Gemini Chat Error: {traceback.format_exc()}")
             return "Sorry, I encountered an error with the Gemini API."
 
+    def chat_query_stream(self, system_prompt: str, user_prompt: str, temperature: float = 0.7, model_name: str = None):
+        """
+        Streaming variant of chat_query. Yields text chunks as Gemini produces them.
+        """
+        if not self._configure():
+            yield "Gemini API Key is missing. Please set GEMINI_API_KEY in .env or configure in Settings."
+            return
+
+        try:
+            target_model = model_name or self._get_model_name()
+            if not target_model:
+                logger.error("❌ Chat Query Failed: No target model available.")
+                yield "AI Model setup failed."
+                return
+                
+            logger.info(f"✨ Gemini: Streaming Chat Query with {target_model}...")
+            full_prompt = f"{system_prompt}\n\n{user_prompt}"
+            
+            response = self._generate_content_with_fallback(target_model, full_prompt, stream=True, config={"temperature": temperature})
+            total = 0
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue # Chunk without text parts (e.g. safety metadata only)
+                if text:
+                    total += len(text)
+                    yield text
+            logger.info(f"✅ Gemini: Streamed response ({total} chars).")
+        except Exception as e:
+            logger.error(f"❌ Gemini Chat Stream Error: {traceback.format_exc()}")
+            yield "Sorry, I encountered an error with the Gemini API."
+
     @retry(
         retry=retry_if_exception_type(ResourceExhausted),
         wait=wait_exponential(multiplier=2, min=2, max=60),
@@ -266,14 +384,81 @@ class GeminiService:
         """
         if not self._configure():
             return []
-            
+        return self._embed_one(text)
+
+    def _embed_one(self, text: str) -> list[float]:
         # text-embedding-004 is current standard
+        self._embed_limiter.wait()
         result = genai.embed_content(
-            model="models/text-embedding-004",
+            model=EMBEDDING_MODEL,
             content=text,
             task_type="retrieval_document",
             title=None
         )
         return result['embedding']
 
+    @retry(
+        retry=retry_if_exception_type(ResourceExhausted),
+        wait=wait_exponential(multiplier=2, min=2, max=60),
+        stop=stop_after_attempt(5),
+        reraise=True,
+        before_sleep=lambda retry_state: logger.warning(f"⚠️ Batch Embedding Rate Limit. Retrying (Attempt {retry_state.attempt_number})...")
+    )
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """
+        One batchEmbedContents request for up to GEMINI_EMBED_BATCH_SIZE texts.
+        """
+        self._embed_limiter.wait()
+        result = genai.embed_content(
+            model=EMBEDDING_MODEL,
+            content=texts,
+            task_type="retrieval_document"
+        )
+        embeddings = result['embedding']
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Batch returned {len(embeddings)} embeddings for {len(texts)} texts")
+        return embeddings
+
+    def get_embeddings(self, texts: list[str], batch_size: int = None) -> list:
+        """
+        Embeds many texts via the batch endpoint, with batches running in parallel
+        under a shared rate limit. If a whole batch is rejected (e.g. a malformed item),
+        its items are sent one by one (no extra retries) so a single bad item doesn't
+        drop the rest. Quota errors (429) are not retried per item: the batch already
+        backed off, and ~100 single calls would only be refused too.
+        Returns a list aligned with `texts` (None for items that still failed).
+        """
+        if not texts:
+            return []
+        if not self._configure():
+            return [None] * len(texts)
+
+        size = max(1, min(batch_size or GEMINI_EMBED_BATCH_SIZE, 100))
+        results = [None] * len(texts)
+
+        def run_batch(start: int):
+            chunk = texts[start:start + size]
+            try:
+                results[start:start + len(chunk)] = self._embed_batch(chunk)
+                return
+            except ResourceExhausted as e:
+                logger.error(f"❌ Embedding quota exhausted, {len(chunk)} items left for the next sync: {e}")
+                return
+            except Exception as e:
+                logger.warning(f"⚠️ Batch embedding failed ({len(chunk)} items): {e}. Retrying per item...")
+
+            for offset, text in enumerate(chunk):
+                try:
+                    results[start + offset] = self._embed_one(text) or None
+                except ResourceExhausted as e:
+                    logger.error(f"❌ Embedding quota exhausted, skipping the rest of this batch: {e}")
+                    return
+                except Exception as e:
+                    logger.error(f"❌ Embedding failed for item {start + offset}: {e}")
+
+        with ThreadPoolExecutor(max_workers=max(1, GEMINI_EMBED_CONCURRENCY)) as pool:
+            list(pool.map(run_batch, range(0, len(texts), size)))
+
+        return results
+
 gemini_service = GeminiService()
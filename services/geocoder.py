@@ -0,0 +1,137 @@
+import os
+import math
+import threading
+import numpy as np
+from services.config import GAZETTEER_PATH, GEOCODER_MAX_DISTANCE_KM
+from services.logger import get_logger
+
+logger = get_logger("geocoder")
+
+EARTH_RADIUS_KM = 6371.0088
+
+def _to_unit_vectors(lats, lons) -> np.ndarray:
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+def _chord_to_km(chord: float) -> float:
+    # Straight-line distance between unit vectors -> great-circle distance
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2.0))
+
+class OfflineGeocoder:
+    """
+    Reverse geocoder over a GeoNames-style cities file (e.g. cities1000.txt / cities15000.txt).
+    Cities are indexed as unit-sphere vectors in a KD-tree, so a lookup is a single
+    nearest-neighbour query instead of a Nominatim round-trip.
+
+    If a GeoNames countryInfo.txt sits next to the cities file, country codes are
+    expanded to names ("Seoul, South Korea"); otherwise the ISO code is used.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(OfflineGeocoder, cls).__new__(cls)
+            cls._instance._tree = None
+            cls._instance._points = None
+            cls._instance._names = []
+            cls._instance._load_failed = False
+        return cls._instance
+
+    def _load_countries(self, gazetteer_path: str) -> dict:
+        countries = {}
+        info_path = os.path.join(os.path.dirname(gazetteer_path), "countryInfo.txt")
+        if not os.path.exists(info_path):
+            return countries
+        with open(info_path, encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) > 4:
+                    countries[cols[0]] = cols[4]
+        return countries
+
+    def load(self, path: str = None) -> bool:
+        """
+        Loads the gazetteer and builds the spatial index (once per process).
+        """
+        with self._lock:
+            if self._points is not None:
+                return True
+            if self._load_failed:
+                return False
+
+            path = str(path or GAZETTEER_PATH)
+            if not os.path.exists(path):
+                logger.warning(f"⚠️ Offline geocoder: gazetteer not found at {path}")
+                self._load_failed = True
+                return False
+
+            countries = self._load_countries(path)
+            lats, lons, names = [], [], []
+            # GeoNames columns: 1=name, 4=latitude, 5=longitude, 8=country code
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    cols = line.rstrip("\n").split("\t")
+                    if len(cols) < 9:
+                        continue
+                    try:
+                        lat, lon = float(cols[4]), float(cols[5])
+                    except ValueError:
+                        continue
+                    country = countries.get(cols[8], cols[8])
+                    lats.append(lat)
+                    lons.append(lon)
+                    names.append(f"{cols[1]}, {country}" if country else cols[1])
+
+            if not names:
+                logger.warning(f"⚠️ Offline geocoder: no places parsed from {path}")
+                self._load_failed = True
+                return False
+
+            points = _to_unit_vectors(lats, lons)
+            try:
+                from scipy.spatial import cKDTree
+                self._tree = cKDTree(points)
+            except ImportError:
+                # Brute force over the vectors still beats a network call for city-sized files
+                logger.info("ℹ️ scipy not installed. Offline geocoder using brute-force search.")
+                self._tree = None
+
+            self._points = points
+            self._names = names
+            logger.info(f"✅ Offline geocoder: {len(names)} places indexed from {os.path.basename(path)}")
+            return True
+
+    def lookup(self, lat: float, lon: float):
+        """
+        Returns (name, distance_km) of the nearest place, or (None, None).
+        """
+        if not self.load():
+            return None, None
+
+        query = _to_unit_vectors([lat], [lon])[0]
+        if self._tree is not None:
+            chord, idx = self._tree.query(query, k=1)
+        else:
+            dists = np.linalg.norm(self._points - query, axis=1)
+            idx = int(np.argmin(dists))
+            chord = dists[idx]
+
+        return self._names[int(idx)], _chord_to_km(float(chord))
+
+    def resolve(self, lat: float, lon: float):
+        """
+        Returns the place name only if it is a confident hit
+        (nearest place within GEOCODER_MAX_DISTANCE_KM), else None.
+        """
+        name, distance_km = self.lookup(lat, lon)
+        if name is None or distance_km > GEOCODER_MAX_DISTANCE_KM:
+            return None
+        return name
+
+# Singleton
+offline_geocoder = OfflineGeocoder()
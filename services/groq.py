@@ -1,9 +1,10 @@
 
 import os
 import requests
-import base64
 from services.config import config
 from services.logger import get_logger
+from utils.scene import build_scene_prompt, build_video_prompt, parse_scene_response
+from services.vision_payload import vision_payload
 import traceback
 import json
 
@@ -24,11 +25,7 @@ class GroqService:
     def _get_api_key(self):
         return config.get("groq_api_key")
 
-    def _encode_image(self, image_path: str):
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-
-    def _generate(self, messages, temperature=0.7, max_tokens=1024):
+    def _generate(self, messages, temperature=0.7, max_tokens=1024, response_format=None):
         api_key = self._get_api_key()
         if not api_key:
             logger.error("❌ Groq API Key missing.")
@@ -45,6 +42,8 @@ class GroqService:
             "temperature": temperature,
             "max_tokens": max_tokens
         }
+        if response_format:
+            payload["response_format"] = response_format
 
         try:
             response = requests.post(self.API_URL, headers=headers, json=payload, timeout=30)
@@ -71,7 +70,7 @@ class GroqService:
         """
         logger.info(f"⚡ Groq: Analyzing Image ({self.MODEL})...")
         
-        base64_image = self._encode_image(image_path)
+        image_url = vision_payload.data_url(image_path) # Downscaled JPEG, cached per file hash
         
         prompt = "Analyze this image and provide 5-10 relevant tags describing the content, scene, objects, and especially the MOOD (e.g., Joyful, Melancholic) and FACIAL EXPRESSIONS (e.g., Happy, Surprised). For every English tag, also provide its Korean translation. Return ONLY the mixed list of English and Korean tags separated by commas. No intro/outro."
         
@@ -80,7 +79,7 @@ class GroqService:
                 "role": "user",
                 "content": [
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                    {"type": "image_url", "image_url": {"url": image_url}}
                 ]
             }
         ]
@@ -93,13 +92,81 @@ class GroqService:
             return tags
         return []
 
+    # Bump when the generate_caption prompt changes (invalidates cached captions)
+    CAPTION_PROMPT_VERSION = "groq-caption-1"
+
+    def vision_model_id(self, model_name: str = None) -> str:
+        """
+        provider:model identifier used to key cached vision outputs.
+        """
+        return f"groq:{self.MODEL}"
+
+    def analyze_scene(self, image_path: str, names: list[str] = None, model_name: str = None) -> dict:
+        """
+        Tags, caption (+ Korean), mood and OCR in ONE request (JSON mode).
+        Returns None on failure so the caller can fall back to separate calls.
+        """
+        logger.info(f"⚡ Groq: Analyzing Scene ({self.MODEL}, combined)...")
+        
+        image_url = vision_payload.data_url(image_path) # Downscaled JPEG, cached per file hash
+        
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": build_scene_prompt(names)},
+                    {"type": "image_url", "image_url": {"url": image_url}}
+                ]
+            }
+        ]
+        
+        result = self._generate(messages, temperature=0.5, max_tokens=800, response_format={"type": "json_object"})
+        if not result:
+            return None
+        try:
+            scene = parse_scene_response(result)
+        except ValueError as e:
+            logger.warning(f"⚠️ Groq: Unusable scene JSON ({e})")
+            return None
+        logger.info(f"✅ Groq: Scene analyzed ({len(scene['tags'])} tags).")
+        return scene
+
+    def analyze_video_frames(self, keyframes: list, names: list[str] = None, model_name: str = None) -> dict:
+        """
+        Whole-video analysis in ONE request: keyframes are tiled into a single
+        contact sheet (one image per request keeps every Groq vision model happy).
+        """
+        from services.video import contact_sheet
+        logger.info(f"⚡ Groq: Analyzing Video ({len(keyframes)} keyframes, {self.MODEL})...")
+        
+        messages = [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": build_video_prompt([k.label for k in keyframes], names, contact_sheet=True)},
+                    {"type": "image_url", "image_url": {"url": vision_payload.image_data_url(contact_sheet(keyframes))}}
+                ]
+            }
+        ]
+        
+        result = self._generate(messages, temperature=0.5, max_tokens=800, response_format={"type": "json_object"})
+        if not result:
+            return None
+        try:
+            scene = parse_scene_response(result)
+        except ValueError as e:
+            logger.warning(f"⚠️ Groq: Unusable video JSON ({e})")
+            return None
+        logger.info(f"✅ Groq: Video analyzed ({len(scene['tags'])} tags).")
+        return scene
+
     def generate_caption(self, image_path: str, names: list[str] = None, model_name: str = None) -> str:
         """
         Generates caption using Llama 3.2 Vision.
         """
         logger.info(f"⚡ Groq: Generating Caption ({self.MODEL})...")
         
-        base64_image = self._encode_image(image_path)
+        image_url = vision_payload.data_url(image_path) # Downscaled JPEG, cached per file hash
         
         people_context = ""
         if names:
@@ -119,7 +186,7 @@ class GroqService:
                 "role": "user",
                 "content": [
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                    {"type": "image_url", "image_url": {"url": image_url}}
                 ]
             }
         ]
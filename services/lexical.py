@@ -0,0 +1,152 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import List, Dict, Any
+from services.logger import get_logger
+
+logger = get_logger("lexical")
+
+# Words that carry no retrieval signal on their own
+_MIN_TOKEN_LEN = 2
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+class LexicalIndex:
+    """
+    SQLite FTS5 mirror of the memory documents (same id/text/metadata as the LanceDB rows).
+    Gives keyword retrieval over the whole library, so rare place names or OCR'd
+    words are found even when they aren't among the nearest vectors.
+
+    Korean particles are glued to nouns ("제주도에서"), so every query token is
+    matched as a prefix ("제주도"*) on top of unicode61 word tokenization.
+
+    The event id doubles as the FTS rowid, so replacing or deleting a document is
+    a rowid lookup instead of a scan of the UNINDEXED id column.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5("
+                "id UNINDEXED, text, date UNINDEXED, location UNINDEXED, "
+                "media_type UNINDEXED, image_url UNINDEXED, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            self._migrate_rowids(conn)
+            conn.commit()
+            self._ready = True
+        return conn
+
+    @staticmethod
+    def _migrate_rowids(conn: sqlite3.Connection):
+        """
+        Indexes written before ids were stored as rowids get their rows re-keyed
+        once (keeping the newest copy of any duplicated id).
+        """
+        stale = conn.execute(
+            "SELECT 1 FROM memory_fts WHERE rowid != CAST(id AS INTEGER) LIMIT 1"
+        ).fetchone()
+        if not stale:
+            return
+        rows = conn.execute(
+            "SELECT id, text, date, location, media_type, image_url FROM memory_fts ORDER BY rowid"
+        ).fetchall()
+        latest = {int(r[0]): r for r in rows} # Later rows win
+        conn.execute("DELETE FROM memory_fts")
+        conn.executemany(
+            "INSERT INTO memory_fts (rowid, id, text, date, location, media_type, image_url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(rowid, *r) for rowid, r in latest.items()]
+        )
+        logger.info(f"ℹ️ FTS index re-keyed by event id ({len(rows)} -> {len(latest)} rows)")
+
+    def upsert(self, items: List[Dict[str, Any]]):
+        """
+        Mirrors build_document() payloads (id, text, date, location, media_type, image_url).
+        """
+        if not items: return
+        rows = [
+            (int(item["id"]), item["id"], item["text"], item["date"], item["location"], item["media_type"] or "", item["image_url"])
+            for item in items
+        ]
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                conn.executemany("DELETE FROM memory_fts WHERE rowid = ?", [(r[0],) for r in rows])
+                conn.executemany(
+                    "INSERT INTO memory_fts (rowid, id, text, date, location, media_type, image_url) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"⚠️ FTS upsert failed: {e}")
+            finally:
+                conn.close()
+
+    def delete(self, ids=None):
+        """
+        Removes documents for the given IDs (everything if None).
+        """
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                if ids is None:
+                    conn.execute("DELETE FROM memory_fts")
+                else:
+                    conn.executemany("DELETE FROM memory_fts WHERE rowid = ?", [(int(i),) for i in ids])
+                conn.commit()
+            finally:
+                conn.close()
+
+    def count(self) -> int:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT count(*) FROM memory_fts").fetchone()[0]
+        finally:
+            conn.close()
+
+    @staticmethod
+    def build_match(query: str) -> str:
+        """
+        Turns free text into an FTS5 MATCH expression: any token, prefix-matched.
+        Tokens are quoted so FTS operators in user input (AND, NEAR, *, -) are literal.
+        """
+        tokens = [t for t in _TOKEN_RE.findall(query.lower()) if len(t) >= _MIN_TOKEN_LEN]
+        unique = list(dict.fromkeys(tokens))
+        return " OR ".join(f'"{t}"*' for t in unique)
+
+    def search(self, query: str, limit: int = 10, filters=None) -> List[Dict[str, Any]]:
+        """
+        BM25-ranked keyword hits in the same shape as vector hits.
+        `filters` (QueryFilters) restricts hits to the same date/place/people/media constraints as the vector prefilter.
+        """
+        match = self.build_match(query)
+        if not match: return []
+        clause, params = filters.to_sqlite() if filters else (None, [])
+        try:
+            conn = self._connect()
+            try:
+                rows = conn.execute(
+                    "SELECT id, text, date, location, media_type, image_url, bm25(memory_fts) AS rank "
+                    "FROM memory_fts WHERE memory_fts MATCH ?"
+                    + (f" AND {clause}" if clause else "")
+                    + " ORDER BY rank LIMIT ?",
+                    (match, *params, limit)
+                ).fetchall()
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"Lexical Search Error: {e}")
+            return []
+
+        return [{
+            "id": r[0],
+            "score": -r[6], # bm25() is lower-is-better
+            "text": r[1],
+            "metadata": {"date": r[2], "location": r[3], "media_type": r[4], "image_url": r[5]}
+        } for r in rows]
@@ -1,6 +1,5 @@
 import os
 import shutil
-import hashlib
 import imagehash
 from datetime import datetime
 from PIL import Image, ImageOps
@@ -8,7 +7,7 @@ import pillow_heif
 pillow_heif.register_heif_opener()
 from database import get_db
 import models
-from utils.image import get_gps_from_image, extract_date_from_image, extract_timestamp_from_image
+from utils.image import get_gps_from_image, extract_date_from_image, extract_timestamp_from_image, file_sha256
 
 try:
     from services.faces import process_faces
@@ -18,13 +17,18 @@ try:
     from services.analyzer import analyzer
 except ImportError:
     analyzer = None
+from services.model_manager import model_manager
+
+def _load_saliency_session():
+    from rembg import new_session
+    # u2netp is the lightweight U2-Net variant
+    return new_session("u2netp")
+
+# Session creation re-reads the ONNX model, so keep it warm between thumbnails
+model_manager.register("rembg-u2netp", 50, _load_saliency_session)
 
 def calculate_file_hash(file_path: str) -> str:
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    return file_sha256(file_path)
 
 def check_exact_duplicate(db, file_hash: str) -> bool:
     return db.query(models.TimelineEvent).filter(models.TimelineEvent.file_hash == file_hash).first() is not None
@@ -47,9 +51,10 @@ def check_visual_duplicate(db, image: Image.Image) -> tuple[bool, str | None]:
         print(f"⚠️ Error calculating pHash: {e}")
         return False, None
 
-def process_upload_task(temp_file_path: str, original_filename: str, metadata: dict):
+def process_upload_task(temp_file_path: str, original_filename: str, metadata: dict, source: str = None):
     """
     Process an uploaded file from temp storage.
+    `source` groups the files of one upload for fair scheduling of their background tasks.
     """
     print(f"⚙️ [Background] Processing {original_filename}...")
     
@@ -78,6 +83,7 @@ def process_upload_task(temp_file_path: str, original_filename: str, metadata: d
         # Perceptual Hash (Images only)
         p_hash_str = None
         lat, lon = None, None
+        timestamp_found = None
         thumbnail_path = None
         
         if is_video:
@@ -180,6 +186,7 @@ def process_upload_task(temp_file_path: str, original_filename: str, metadata: d
             tags=metadata.get("tags"),
             media_type="video" if is_video else "photo",
             thumbnail_url=thumbnail_path,
+            transcode_status="pending" if is_video else None,
             latitude=lat,
             longitude=lon,
             phash=p_hash_str,
@@ -192,9 +199,14 @@ def process_upload_task(temp_file_path: str, original_filename: str, metadata: d
         print(f"✅ [Success] Event {new_event.id} created.")
         
         # 7. AI Analysis (Async Trigger)
-        if new_event.media_type == "photo":
-            import services.tasks
-            services.tasks.enqueue_event(new_event.id)
+        import services.tasks
+        services.tasks.enqueue_event(new_event.id, source=source)
+        if new_event.media_type == "video":
+            # Web/preview renditions and poster (the first-frame thumbnail is the stopgap).
+            # Long sources go to the bulk lane so they don't hold up other uploads.
+            from services.transcode import transcode_service
+            lane = "bulk" if transcode_service.is_long(final_path) else "upload"
+            services.tasks.enqueue_transcode(new_event.id, lane=lane, source=source)
             
     except Exception as e:
         print(f"❌ Fatal error in upload task: {e}")
@@ -261,15 +273,13 @@ def generate_smart_thumbnail(event_id: int):
             else:
                 # 2. Saliency Priority (U2-Net via rembg)
                 try:
-                    from rembg import remove, new_session
+                    from rembg import remove
                     import numpy as np
                     
                     print("🧠 Smart Crop: No faces, attempting Saliency Detection (U2-Net)...")
-                    # Create a session for u2netp (lightweight)
-                    session = new_session("u2netp")
-                    
-                    # Run rembg to get alpha mask (foreground) only
-                    output = remove(img, session=session, only_mask=True)
+                    with model_manager.use("rembg-u2netp") as session:
+                        # Run rembg to get alpha mask (foreground) only
+                        output = remove(img, session=session, only_mask=True)
                     mask = np.array(output)
                     
                     # Calculate center of mass of the mask (white pixels)
@@ -356,21 +366,35 @@ def regenerate_captions_for_person(person_id: int):
 
         # Get all events with this person
         events_to_process = set()
+        other_event_ids = set()
         for face in person.faces:
             if face.event and face.event.media_type == "photo":
                 events_to_process.add(face.event)
+            elif face.event:
+                other_event_ids.add(face.event.id)
+
+        # The name is part of every search document with this person.
+        # Photos are re-indexed by the caption task; everything else is re-indexed now.
+        from services.rag import mark_rag_dirty
+        mark_rag_dirty([event.id for event in events_to_process], reindex=False)
+        mark_rag_dirty(other_event_ids)
         
         print(f"  Found {len(events_to_process)} photos to update.")
         
         # Enqueue re-analysis
         # Enqueue re-analysis (Caption Only)
-        from services.tasks import process_caption_update
-        for event in events_to_process:
-            # Run directly in this background thread (FastAPI BackgroundTasks thread)
-            # Since analyzer is thread-safe now, this is fine.
-            process_caption_update(event.id)
+        from services.tasks import bulk_enqueue, process_caption_batch
+        from services.config import VISION_BATCH_SIZE
+        # Interactive lane: the user just renamed someone and is waiting for the result
+        counts = bulk_enqueue(
+            process_caption_batch,
+            [event.id for event in events_to_process],
+            lane="interactive",
+            source=f"person:{person_id}",
+            batch_size=VISION_BATCH_SIZE
+        )
         
-        print(f"✅ Updated captions for {len(events_to_process)} events.")
+        print(f"✅ Queued caption updates: {counts['queued']} new, {counts['already_queued']} already queued.")
             
     except Exception as e:
         print(f"❌ Error in regenerate_captions_for_person: {e}")
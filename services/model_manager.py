@@ -0,0 +1,199 @@
+import gc
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from services.config import MODEL_MEMORY_BUDGET_MB, MODEL_PINNED
+from services.logger import get_logger
+
+logger = get_logger("model_manager")
+
+class _Entry:
+    def __init__(self, name: str, size_mb: int, loader: Callable[[], Any],
+                 unloader: Optional[Callable[[Any], None]], pinned: bool):
+        self.name = name
+        self.size_mb = size_mb
+        self.loader = loader
+        self.unloader = unloader
+        self.pinned = pinned
+        self.obj = None
+        self.in_use = 0
+        self.last_used = 0.0
+        self.load_lock = threading.Lock()
+        self.loads = 0
+        self.unloads = 0
+        self.hits = 0
+        self.load_seconds = 0.0
+
+def _free_accelerator_memory():
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+        elif torch.backends.mps.is_available():
+            torch.mps.empty_cache()
+    except ImportError:
+        pass
+
+class ModelManager:
+    """
+    Central registry for in-process models (vision, embeddings, reranker, faces, saliency).
+    Each model declares its approximate RAM footprint; loaded models stay warm
+    until the MODEL_MEMORY_BUDGET_MB budget is needed by another one, at which
+    point the least recently used, unpinned, idle model is unloaded.
+    Note: Huey workers and the web server are separate processes, each with its own registry.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ModelManager, cls).__new__(cls)
+            cls._instance._init_state()
+        return cls._instance
+
+    def _init_state(self):
+        # Separate from __new__ so tests can build isolated, non-singleton registries
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.RLock()
+        self.budget_mb = MODEL_MEMORY_BUDGET_MB
+        self.evictions = 0
+
+    def register(self, name: str, size_mb: int, loader: Callable[[], Any],
+                 unloader: Optional[Callable[[Any], None]] = None, pinned: bool = False):
+        """
+        Declares a model. Loading happens lazily on first acquire().
+        Pinned models (or those listed in MODEL_PINNED) are never evicted.
+        """
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, size_mb, loader, unloader, pinned or name in MODEL_PINNED)
+            return self._entries[name]
+
+    def resident_mb(self) -> int:
+        with self._lock:
+            return sum(e.size_mb for e in self._entries.values() if e.obj is not None)
+
+    def make_room(self, size_mb: int, exclude: Optional[str] = None) -> bool:
+        """
+        Unloads LRU models until `size_mb` fits in the budget.
+        Returns False if pinned or busy models leave too little room (caller proceeds anyway).
+        """
+        with self._lock:
+            victims = sorted(
+                (e for e in self._entries.values()
+                 if e.obj is not None and not e.pinned and e.in_use == 0 and e.name != exclude),
+                key=lambda e: e.last_used
+            )
+            for victim in victims:
+                if self.resident_mb() + size_mb <= self.budget_mb:
+                    break
+                logger.info(f"♻️ Evicting {victim.name} ({victim.size_mb}MB) to make room for {size_mb}MB")
+                self._unload_entry(victim)
+                self.evictions += 1
+            fits = self.resident_mb() + size_mb <= self.budget_mb
+        if not fits:
+            logger.warning(f"⚠️ Model budget exceeded: {self.resident_mb()}MB resident + {size_mb}MB > {self.budget_mb}MB")
+        return fits
+
+    def acquire(self, name: str, _hold: bool = False) -> Any:
+        """
+        Returns the loaded model, loading (and evicting others) if needed.
+        The returned reference stays valid even if the model is evicted later,
+        but prefer use() while running inference so it isn't unloaded mid-call.
+        """
+        entry = self._entries[name]
+        with entry.load_lock:
+            # Check, take the reference and mark in use in ONE critical section,
+            # so a concurrent make_room() can't evict in between
+            with self._lock:
+                obj = entry.obj
+                if obj is not None:
+                    entry.hits += 1
+                    entry.last_used = time.time()
+                    if _hold:
+                        entry.in_use += 1
+                    return obj
+
+            self.make_room(entry.size_mb, exclude=name)
+            logger.info(f"📦 Loading {name} (~{entry.size_mb}MB)...")
+            started = time.perf_counter()
+            obj = entry.loader()
+            if obj is None:
+                raise RuntimeError(f"Loader for {name} returned nothing")
+            with self._lock:
+                entry.obj = obj
+                entry.loads += 1
+                entry.load_seconds += time.perf_counter() - started
+                entry.last_used = time.time()
+                if _hold:
+                    entry.in_use += 1
+            return obj
+
+    @contextmanager
+    def use(self, name: str):
+        """
+        Holds the model for the duration of the block (it is never evicted while in use).
+        """
+        entry = self._entries[name]
+        obj = self.acquire(name, _hold=True)
+        try:
+            yield obj
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.time()
+
+    def is_loaded(self, name: str) -> bool:
+        entry = self._entries.get(name)
+        return entry is not None and entry.obj is not None
+
+    def unload(self, name: str):
+        entry = self._entries.get(name)
+        if entry is None:
+            return
+        with entry.load_lock, self._lock:
+            self._unload_entry(entry)
+
+    def _unload_entry(self, entry: _Entry):
+        if entry.obj is None:
+            return
+        obj, entry.obj = entry.obj, None
+        try:
+            if entry.unloader:
+                entry.unloader(obj)
+        except Exception as e:
+            logger.warning(f"⚠️ Unloader for {entry.name} failed: {e}")
+        del obj
+        entry.unloads += 1
+        _free_accelerator_memory()
+        logger.info(f"🧹 Unloaded {entry.name}")
+
+    def pin(self, name: str, pinned: bool = True):
+        with self._lock:
+            self._entries[name].pinned = pinned
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget_mb": self.budget_mb,
+                "resident_mb": self.resident_mb(),
+                "evictions": self.evictions,
+                "models": {
+                    e.name: {
+                        "size_mb": e.size_mb,
+                        "loaded": e.obj is not None,
+                        "pinned": e.pinned,
+                        "in_use": e.in_use,
+                        "loads": e.loads,
+                        "unloads": e.unloads,
+                        "hits": e.hits,
+                        "avg_load_s": round(e.load_seconds / e.loads, 2) if e.loads else None,
+                        "last_used": e.last_used or None,
+                    }
+                    for e in self._entries.values()
+                },
+            }
+
+# Singleton
+model_manager = ModelManager()
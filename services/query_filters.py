@@ -0,0 +1,178 @@
+import re
+from database import SessionLocal
+import models
+from services.cache import TTLCache
+from services.logger import get_logger
+
+logger = get_logger("query_filters")
+
+# Known places/people change rarely; re-read them every few minutes at most
+_vocab_cache = TTLCache(maxsize=4, ttl=300)
+
+_YEAR = r"(?<!\d)((?:19|20)\d{2})(?!\d)"
+_YEAR_RANGE_RE = re.compile(_YEAR + r"\s*(?:년)?\s*(?:-|~|–|to|부터|에서)\s*" + _YEAR)
+_YEAR_MONTH_RE = re.compile(_YEAR + r"\s*(?:년\s*(\d{1,2})\s*월|[-./](\d{1,2})(?!\d))")
+_YEAR_RE = re.compile(_YEAR)
+_VIDEO_WORDS = ("video", "videos", "영상", "동영상", "비디오")
+_MIN_TERM_LEN = 2
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+def _like_literal(value: str) -> str:
+    return _sql_literal(f"%{value}%")
+
+class QueryFilters:
+    """
+    Structured constraints pulled out of a free-text query.
+    Rendered both as a LanceDB `where` prefilter and as a SQLite clause for the keyword index.
+    """
+    def __init__(self):
+        self.date_ranges = [] # [(start, end_exclusive)] as ISO date prefixes, e.g. ("2019", "2020")
+        self.places = [] # location_name fragments as stored in the DB
+        self.people = [] # Person names
+        self.media_type = None
+
+    def __bool__(self):
+        return bool(self.date_ranges or self.places or self.people or self.media_type)
+
+    def __repr__(self):
+        return f"QueryFilters(dates={self.date_ranges}, places={self.places}, people={self.people}, media_type={self.media_type})"
+
+    def to_lance_where(self) -> str:
+        clauses = []
+        if self.date_ranges:
+            clauses.append("(" + " OR ".join(
+                f"(date >= {_sql_literal(start)} AND date < {_sql_literal(end)})" for start, end in self.date_ranges
+            ) + ")")
+        if self.places:
+            clauses.append("(" + " OR ".join(f"location LIKE {_like_literal(p)}" for p in self.places) + ")")
+        for name in self.people:
+            # People only live in the document text ("People: A, B")
+            clauses.append(f"text LIKE {_like_literal(name)}")
+        if self.media_type:
+            clauses.append(f"media_type = {_sql_literal(self.media_type)}")
+        return " AND ".join(clauses) or None
+
+    def to_sqlite(self):
+        """
+        Returns (clause, params) for the FTS5 mirror, or (None, []) when unfiltered.
+        """
+        clauses, params = [], []
+        if self.date_ranges:
+            clauses.append("(" + " OR ".join("(date >= ? AND date < ?)" for _ in self.date_ranges) + ")")
+            for start, end in self.date_ranges:
+                params.extend([start, end])
+        if self.places:
+            clauses.append("(" + " OR ".join("location LIKE ?" for _ in self.places) + ")")
+            params.extend(f"%{p}%" for p in self.places)
+        for name in self.people:
+            clauses.append("text LIKE ?")
+            params.append(f"%{name}%")
+        if self.media_type:
+            clauses.append("media_type = ?")
+            params.append(self.media_type)
+        return (" AND ".join(clauses) or None), params
+
+def _next_month(year: int, month: int) -> str:
+    return f"{year + 1}-01" if month == 12 else f"{year}-{month + 1:02d}"
+
+def _extract_dates(query: str) -> list:
+    ranges = []
+    consumed = []
+
+    for m in _YEAR_RANGE_RE.finditer(query):
+        start, end = sorted((int(m.group(1)), int(m.group(2))))
+        ranges.append((str(start), str(end + 1)))
+        consumed.append(m.span())
+
+    def free(span):
+        return not any(a < span[1] and span[0] < b for a, b in consumed)
+
+    for m in _YEAR_MONTH_RE.finditer(query):
+        if not free(m.span()): continue
+        year, month = int(m.group(1)), int(m.group(2) or m.group(3))
+        if 1 <= month <= 12:
+            ranges.append((f"{year}-{month:02d}", _next_month(year, month)))
+            consumed.append(m.span())
+
+    for m in _YEAR_RE.finditer(query):
+        if not free(m.span()): continue
+        year = int(m.group(1))
+        ranges.append((str(year), str(year + 1)))
+
+    return ranges
+
+def _known_places() -> list:
+    places = _vocab_cache.get("places")
+    if places is None:
+        db = SessionLocal()
+        try:
+            parts = set()
+            for (name,) in db.query(models.TimelineEvent.location_name).filter(models.TimelineEvent.location_name != None).distinct():
+                for part in name.split(","):
+                    part = part.strip()
+                    if len(part) >= _MIN_TERM_LEN and not part.isdigit():
+                        parts.add(part)
+            places = sorted(parts, key=len, reverse=True)
+        finally:
+            db.close()
+        _vocab_cache.set("places", places)
+    return places
+
+def _known_people() -> list:
+    people = _vocab_cache.get("people")
+    if people is None:
+        db = SessionLocal()
+        try:
+            people = sorted({
+                name for (name,) in db.query(models.Person.name).filter(models.Person.name != None).distinct()
+                if name and len(name) >= _MIN_TERM_LEN and not name.startswith("Unknown")
+            }, key=len, reverse=True)
+        finally:
+            db.close()
+        _vocab_cache.set("people", people)
+    return people
+
+def _mentions_word(term: str, query: str, lowered: str) -> bool:
+    if term.isascii() and len(term) < 3:
+        # Short codes/names ("US", "Al") only as a standalone, same-case token: not "show us", "almost"
+        return re.search(r"(?<!\w)" + re.escape(term) + r"(?!\w)", query) is not None
+    # Whole words only ("seoul cafe", not "seoulful"); Korean particles may follow ("제주시에서")
+    return re.search(r"(?<!\w)" + re.escape(term.lower()) + r"(?![a-z0-9])", lowered) is not None
+
+def _mentions_place(place: str, query: str, lowered: str, tokens: list) -> bool:
+    if _mentions_word(place, query, lowered):
+        return True
+    if place.isascii() and len(place) < 3:
+        return False
+    p = place.lower()
+    # "jeju" as a prefix of "Jeju-si"
+    return any(p.startswith(t) and len(t) * 2 >= len(p) for t in tokens)
+
+def extract_filters(query: str) -> QueryFilters:
+    """
+    Finds years / year ranges / year-months, known place names, known person names
+    and "video" mentions in the query.
+    """
+    filters = QueryFilters()
+    lowered = query.lower()
+    tokens = [t for t in re.findall(r"\w+", lowered) if len(t) >= 4 and not t.isdigit()]
+
+    filters.date_ranges = _extract_dates(query)
+
+    try:
+        for place in _known_places():
+            if _mentions_place(place, query, lowered, tokens):
+                filters.places.append(place)
+
+        for name in _known_people():
+            if _mentions_word(name, query, lowered):
+                filters.people.append(name)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not load place/person vocabulary: {e}")
+
+    if any(w in lowered for w in _VIDEO_WORDS):
+        filters.media_type = "video"
+
+    return filters
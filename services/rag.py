@@ -1,11 +1,32 @@
 import os
+import json
+import atexit
+import hashlib
+from datetime import datetime
+import time
+import queue
+import threading
 import lancedb
 from lancedb.pydantic import LanceModel, Vector
 from lancedb.embeddings import get_registry
-from lancedb.embeddings import get_registry
 # Lazy Import: sentence_transformers
+from sqlalchemy.orm import selectinload
 import models
 from database import SessionLocal
+from services.embedding_cache import embedding_cache
+from services.vector_index import vector_index
+from services.lexical import LexicalIndex
+from services.cache import TTLCache
+from services.model_manager import model_manager
+from services.query_filters import extract_filters
+from services.reranker import RERANKERS, resolve_reranker_name
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from services.config import (
+    RAG_EMBED_BATCH_SIZE, RAG_FLUSH_SIZE, RAG_FLUSH_INTERVAL,
+    RAG_INDEX_PAGE_SIZE, RAG_INDEX_PREFETCH_PAGES, GEMINI_EMBED_BATCH_SIZE,
+    RAG_LOCAL_SEARCH_TIMEOUT, RAG_GEMINI_SEARCH_TIMEOUT,
+    RAG_QUERY_CACHE_SIZE, RAG_QUERY_EMBED_TTL, RAG_RESULT_CACHE_TTL
+)
 from typing import List, Dict, Any, Optional
 import pydantic
 
@@ -16,26 +37,34 @@ TABLE_NAME = "decade_memories"
 from services.logger import get_logger
 logger = get_logger("rag")
 
+# Retrieval branches that run concurrently per query (keyword, local vector, Gemini vector).
+# Sized so branches abandoned after a deadline don't starve the next query.
+_search_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="rag-search")
+
 # Embedding Model Config
 # We stick to the existing one for Phase 1, or prepare for BGE-M3
 MODEL_NAME = 'BAAI/bge-m3'
 DIMENSIONS = 1024 # BGE-M3 output dimension
 
-class Embedder:
-    _model = None
+EMBEDDER_MB = 2300 # BGE-M3 (568M params, fp32)
+
+def _load_embedder():
+    print(f"🧠 Loading Embedding Model ({MODEL_NAME})...")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+# Pinned by default (MODEL_PINNED): every search embeds the query
+model_manager.register("bge-m3", EMBEDDER_MB, _load_embedder)
 
+class Embedder:
     @classmethod
     def get_model(cls):
-        if cls._model is None:
-            print(f"🧠 Loading Embedding Model ({MODEL_NAME})...")
-            from sentence_transformers import SentenceTransformer
-            cls._model = SentenceTransformer(MODEL_NAME)
-        return cls._model
+        return model_manager.acquire("bge-m3")
 
     @classmethod
     def embed_text(cls, texts: List[str]) -> List[List[float]]:
-        model = cls.get_model()
-        embeddings = model.encode(texts)
+        with model_manager.use("bge-m3") as model:
+            embeddings = model.encode(texts, batch_size=RAG_EMBED_BATCH_SIZE)
         return embeddings.tolist()
 
 # Define LanceDB Schema using Pydantic
@@ -60,6 +89,84 @@ class MemoryItemGemini(LanceModel):
     image_url: str
     payload_json: str 
 
+def build_document(event: models.TimelineEvent) -> Dict[str, Any]:
+    """
+    Builds the searchable text + metadata payload (without vector) for one event.
+    """
+    parts = [f"Date: {event.date}"]
+    if event.location_name: parts.append(f"Location: {event.location_name}")
+    if event.weather_info: parts.append(f"Weather: {event.weather_info}")
+    if event.title: parts.append(f"Title: {event.title}")
+    
+    content = []
+    if event.summary and not event.summary.startswith("[Low Confidence]"):
+        content.append(f"AI Description: {event.summary}")
+    if event.description:
+        content.append(f"User Note: {event.description}")
+    if content: parts.append(" ".join(content))
+        
+    if event.faces:
+        names = [f.person.name for f in event.faces if f.person and f.person.name != "Unknown"]
+        if names: parts.append(f"People: {', '.join(set(names))}")
+        emotions = [f"{f.person.name} looks {f.emotion}" for f in event.faces if f.person and f.emotion]
+        if emotions: parts.append(f"Emotions: {', '.join(emotions)}")
+    if event.mood: parts.append(f"Mood: {event.mood}")
+    
+    text = ". ".join(parts)
+    return {
+        "id": str(event.id),
+        "date": event.date or "",
+        "location": event.location_name or "",
+        "media_type": event.media_type,
+        "image_url": event.image_url or "",
+        "text": text,
+        "payload_json": json.dumps({
+             "title": event.title,
+             "summary": event.summary
+         })
+    }
+
+def document_hash(item: Dict[str, Any]) -> str:
+    """
+    Fingerprint of everything written to a vector row (text + metadata, no vector).
+    A stored hash that differs from this means the row is stale.
+    """
+    return hashlib.sha256(json.dumps(item, sort_keys=True).encode("utf-8")).hexdigest()
+
+VERSION_PATH = os.path.join(LANCEDB_PATH, "index_version")
+
+# Query embeddings don't depend on the index, so they are keyed by (model, query) only
+_query_embeddings = TTLCache(maxsize=RAG_QUERY_CACHE_SIZE, ttl=RAG_QUERY_EMBED_TTL)
+# Final (fused + reranked) results, keyed by (query, k, provider, index version)
+_result_cache = TTLCache(maxsize=RAG_QUERY_CACHE_SIZE, ttl=RAG_RESULT_CACHE_TTL)
+
+def _embed_query(model: str, query: str, embed_fn):
+    key = (model, query.strip())
+    vector = _query_embeddings.get(key)
+    if vector is None:
+        vector = embed_fn(query)
+        if vector:
+            _query_embeddings.set(key, vector)
+    return vector
+
+def fuse_rrf(result_lists: List[List[Dict[str, Any]]], weights: List[float] = None, k_rrf: int = 60) -> List[Dict[str, Any]]:
+    """
+    Reciprocal Rank Fusion: score = sum(weight / (rank + k_rrf)) over every list a hit appears in.
+    Returns hits sorted by fused score (hit "score" replaced by the fused value).
+    """
+    scores = {}
+    metadata_map = {}
+    for list_idx, results in enumerate(result_lists):
+        weight = weights[list_idx] if weights else 1.0
+        for rank, item in enumerate(results):
+            doc_id = item['id']
+            scores[doc_id] = scores.get(doc_id, 0.0) + (weight / (rank + k_rrf))
+            if doc_id not in metadata_map:
+                metadata_map[doc_id] = item
+
+    sorted_ids = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
+    return [dict(metadata_map[doc_id], score=scores[doc_id]) for doc_id in sorted_ids]
+
 class MemoryVectorStore:
     def __init__(self):
         if not os.path.exists(LANCEDB_PATH):
@@ -81,92 +188,66 @@ class MemoryVectorStore:
         except Exception as e:
             logger.error(f"Failed to init Gemini Table: {e}")
 
+        # Keyword mirror (SQLite FTS5) for the lexical half of hybrid search
+        self.lexical = LexicalIndex(os.path.join(LANCEDB_PATH, "memory_fts.db"))
+
+    def _upsert(self, table, items):
+        """
+        One merge per table per batch (one new fragment/version instead of one per photo).
+        """
+        try:
+            table.merge_insert("id").when_matched_update_all().when_not_matched_insert_all().execute(items)
+        except Exception:
+            id_list = ", ".join(f"'{item.id}'" for item in items)
+            table.delete(f"id IN ({id_list})")
+            table.add(items)
+        vector_index.note_writes(table, len(items))
+
     def add_events(self, events: List[models.TimelineEvent]):
         """
         Dual Indexing: Adds to BOTH tables if possible.
         """
         if not events: return
 
-        documents = []
-        # ... (Context construction logic is identical, omitting for brevity in diff but MUST be included in actual file) ...
-        # I will COPY the context construction logic exactly from previous file.
-        
-        # --- RE-IMPLEMENT CONTEXT CONSTRUCTION START ---
-        items_payload = [] # List of dicts without vector
-        
-        for event in events:
-            parts = [f"Date: {event.date}"]
-            if event.location_name: parts.append(f"Location: {event.location_name}")
-            if event.weather_info: parts.append(f"Weather: {event.weather_info}")
-            if event.title: parts.append(f"Title: {event.title}")
-            
-            content = []
-            if event.summary and not event.summary.startswith("[Low Confidence]"):
-                content.append(f"AI Description: {event.summary}")
-            if event.description:
-                content.append(f"User Note: {event.description}")
-            if content: parts.append(" ".join(content))
-                
-            if event.faces:
-                names = [f.person.name for f in event.faces if f.person and f.person.name != "Unknown"]
-                if names: parts.append(f"People: {', '.join(set(names))}")
-                emotions = [f"{f.person.name} looks {f.emotion}" for f in event.faces if f.person and f.emotion]
-                if emotions: parts.append(f"Emotions: {', '.join(emotions)}")
-            if event.mood: parts.append(f"Mood: {event.mood}")
-            
-            text = ". ".join(parts)
-            documents.append(text)
-            
-            import json
-            items_payload.append({
-                "id": str(event.id),
-                "date": event.date or "",
-                "location": event.location_name or "",
-                "media_type": event.media_type,
-                "image_url": event.image_url or "",
-                "text": text,
-                "payload_json": json.dumps({
-                     "title": event.title,
-                     "summary": event.summary
-                 })
-            })
-        # --- RE-IMPLEMENT CONTEXT CONSTRUCTION END ---
+        items_payload = [build_document(event) for event in events] # List of dicts without vector
+        documents = [item["text"] for item in items_payload]
 
         if not documents: return
 
+        # 0. Keyword mirror (no embedding needed, so it never lags behind the DB)
+        self.lexical.upsert(items_payload)
+
         # 1. Index to Local Brain (Always)
         try:
             logger.info(f"🧮 Embedding {len(documents)} memories (Local BGE-M3)...")
-            embeddings_local = Embedder.embed_text(documents)
+            embeddings_local = embedding_cache.embed(MODEL_NAME, documents, Embedder.embed_text)
             
             final_items_local = []
             for item, emb in zip(items_payload, embeddings_local):
+                if emb is None: continue
                 i = item.copy()
                 i["vector"] = emb
                 final_items_local.append(MemoryItemLocal(**i))
             
             # Upsert Local
-            try:
-                self.table_local.merge_insert("id").when_matched_update_all().when_not_matched_insert_all().execute(final_items_local)
-            except:
-                ids = [x.id for x in final_items_local]
-                self.table_local.delete(f"id IN ({','.join(['\'' + i + '\'' for i in ids])})")
-                self.table_local.add(final_items_local)
+            self._upsert(self.table_local, final_items_local)
+            indexed_ids = {item.id for item in final_items_local}
                 
             logger.info(f"✅ Indexed {len(documents)} to Local Brain.")
         except Exception as e:
             logger.error(f"❌ Local Indexing Failed: {e}")
+            indexed_ids = set()
 
         # 2. Index to Gemini Brain (If Key Available)
         from services.config import config
         if config.get("gemini_api_key"):
             try:
                 logger.info(f"☁️ Embedding {len(documents)} memories (Gemini Cloud)...")
-                from services.gemini import gemini_service
+                from services.gemini import gemini_service, EMBEDDING_MODEL
                 
                 final_items_gemini = []
-                for item in items_payload:
-                    emb = gemini_service.get_embedding(item["text"])
+                embeddings_gemini = embedding_cache.embed(EMBEDDING_MODEL, documents, gemini_service.get_embeddings)
+                for item, emb in zip(items_payload, embeddings_gemini):
                     if emb:
                         i = item.copy()
                         i["vector"] = emb
@@ -174,16 +255,77 @@ class MemoryVectorStore:
                 
                 if final_items_gemini:
                     # Upsert Gemini
-                    try:
-                        self.table_gemini.merge_insert("id").when_matched_update_all().when_not_matched_insert_all().execute(final_items_gemini)
-                    except:
-                        ids = [x.id for x in final_items_gemini]
-                        self.table_gemini.delete(f"id IN ({','.join(['\'' + i + '\'' for i in ids])})")
-                        self.table_gemini.add(final_items_gemini)
+                    self._upsert(self.table_gemini, final_items_gemini)
                     logger.info(f"✅ Indexed {len(final_items_gemini)} to Gemini Brain.")
+                # Only events present in both brains count as synced
+                indexed_ids &= {item.id for item in final_items_gemini}
                     
             except Exception as e:
                 logger.warning(f"⚠️ Gemini Indexing Skipped (API Error): {e}")
+                indexed_ids = set()
+
+        self._record_indexed([item for item in items_payload if item["id"] in indexed_ids])
+        self._bump_version()
+
+    def _record_indexed(self, items: List[Dict[str, Any]]):
+        """
+        Stores the document hash + timestamp so rag-sync can skip unchanged events.
+        Uses its own session so the caller's session/transaction is untouched.
+        """
+        if not items: return
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            db.bulk_update_mappings(models.TimelineEvent, [
+                {"id": int(item["id"]), "rag_content_hash": document_hash(item), "rag_indexed_at": now}
+                for item in items
+            ])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"⚠️ Could not record index state: {e}")
+        finally:
+            db.close()
+
+    def delete_events(self, event_ids=None):
+        """
+        Removes vectors for the given event IDs from both tables (all vectors if None).
+        """
+        if event_ids is None:
+            where = "id IS NOT NULL"
+        else:
+            ids = [str(int(i)) for i in event_ids]
+            if not ids: return
+            id_list = ", ".join(f"'{i}'" for i in ids)
+            where = f"id IN ({id_list})"
+
+        for table in (self.table_local, self.table_gemini):
+            try:
+                table.delete(where)
+            except Exception as e:
+                logger.warning(f"⚠️ Vector delete failed: {e}")
+
+        try:
+            self.lexical.delete(event_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Keyword index delete failed: {e}")
+        self._bump_version()
+
+    def indexed_ids(self) -> set:
+        """
+        Every event ID that has a vector in either table.
+        """
+        ids = set()
+        for table in (self.table_local, self.table_gemini):
+            try:
+                try:
+                    column = table.to_lance().to_table(columns=["id"]).column("id")
+                except Exception:
+                    column = table.to_arrow().column("id")
+                ids.update(column.to_pylist())
+            except Exception as e:
+                logger.warning(f"⚠️ Could not list indexed IDs: {e}")
+        return ids
 
     def update_photo_index(self, event_id: int):
         db = SessionLocal()
@@ -193,168 +335,161 @@ class MemoryVectorStore:
         finally:
             db.close()
 
-    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        from datetime import datetime
+    def index_version(self) -> str:
+        """
+        Changes whenever any process writes to the vector tables or the keyword mirror.
+        Part of the result-cache key, so cached results never outlive an index change.
+        """
+        try:
+            with open(VERSION_PATH) as f:
+                return f.read().strip()
+        except OSError:
+            return "0"
+
+    def _bump_version(self):
+        try:
+            with open(VERSION_PATH, "w") as f:
+                f.write(str(time.time_ns()))
+        except OSError as e:
+            logger.warning(f"⚠️ Could not bump index version: {e}")
+
+    def search(self, query: str, k: int = 5, reranker: str = None) -> List[Dict[str, Any]]:
+        """
+        Hybrid retrieval + reranking. `reranker` ("llm", "cross-encoder", "none")
+        overrides the 'reranker' setting for this call.
+        """
         from services.config import config
         
         # Determine Mode: check explicit overrides, otherwise default to "ensemble" if key exists
         search_provider = config.get("search_provider") # 'local', 'gemini', or None
         has_gemini = bool(config.get("gemini_api_key"))
+        if search_provider == "local" or (not has_gemini and not search_provider):
+            mode = "local"
+        elif search_provider == "gemini":
+            mode = "gemini"
+        else:
+            mode = "ensemble"
+        reranker_name = resolve_reranker_name(reranker, mode)
+
+        cache_key = (query.strip(), k, mode, reranker_name, self.index_version())
+        cached = _result_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"⚡ Search cache hit ({mode}) for: {query}")
+            return [dict(hit) for hit in cached]
+        
+        # Years, places, people and "video" become prefilters on both retrieval paths
+        filters = extract_filters(query)
+        if filters:
+            logger.info(f"   ↳ Prefilters: {filters}")
+        
+        # Lexical retrieval (FTS5) runs alongside query embedding + vector search
+        lexical_future = _search_pool.submit(self.lexical.search, query, k * 3, filters)
+        complete = True
+        # Fetch more candidates when reranking (3x k) to cast a wide net
+        candidates_k = k if reranker_name == "none" else k * 3
         
         # 1. Force Local
-        if search_provider == "local" or (not has_gemini and not search_provider):
+        if mode == "local":
              logger.info(f"🔍 Searching Local Brain (BGE-M3) for: {query}")
-             return self._search_local(query, k)
+             vector_hits = self._search_local(query, max(k * 2, candidates_k), filters)
+             candidates = self._fuse(query, [vector_hits], lexical_future.result())
              
         # 2. Force Gemini
-        if search_provider == "gemini":
+        elif mode == "gemini":
              logger.info(f"🔍 Searching Gemini Brain for: {query}")
-             return self._search_gemini(query, k)
+             vector_hits = self._search_gemini(query, max(k * 2, candidates_k), filters)
+             candidates = self._fuse(query, [vector_hits], lexical_future.result())
              
         # 3. Default: Ensemble (Dual) - Best of Both Worlds
-        logger.info(f"🧠 Dual-Search (Ensemble): Local + Gemini for '{query}'")
-        return self._search_ensemble(query, k)
+        else:
+            logger.info(f"🧠 Dual-Search (Ensemble): Local + Gemini for '{query}'")
+            candidates, complete = self._search_ensemble(query, k, lexical_future, filters)
+
+        # Rerank (Precision): LLM, local cross-encoder, or plain RRF order
+        top_candidates = candidates[:candidates_k]
+        if reranker_name != "none":
+            logger.info(f"🧠 Reranking {len(top_candidates)} candidates ({reranker_name})...")
+        results = RERANKERS[reranker_name].rerank(query, top_candidates, k)
+
+        # Don't pin degraded results (a branch missed its deadline) for the whole TTL
+        if complete:
+            _result_cache.set(cache_key, results)
+        return [dict(hit) for hit in results]
+
+    def _fuse(self, query: str, vector_lists: List[List[Dict[str, Any]]], lexical_hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        RRF over the vector rankings and the keyword ranking.
+        Queries with an explicit year lean on exact keyword hits; mood/season
+        queries lean on semantics.
+        """
+        import re
+        lexical_weight = 1.0
+        if re.search(r"\b(19|20)\d{2}\b", query): lexical_weight = 2.0
+        if any(w in query for w in ["행복", "happy", "summer", "winter"]): lexical_weight = 0.5
+        
+        weights = [1.0] * len(vector_lists) + [lexical_weight]
+        return fuse_rrf(vector_lists + [lexical_hits], weights)
 
-    def _search_ensemble(self, query: str, k: int) -> List[Dict[str, Any]]:
+    def _search_ensemble(self, query: str, k: int, lexical_future, filters=None):
         """
-        Combines results from Local (BGE-M3) and Gemini using Reciprocal Rank Fusion (RRF).
-        Then assumes RERANKING via Gemini Flash to filter out 'sticky' irrelevant results.
+        Combines results from Local (BGE-M3), Gemini and the keyword index using Reciprocal Rank Fusion (RRF).
+        The branches run in parallel, each with its own deadline, so a slow Gemini call never blocks local results.
+        Reranking happens afterwards in search().
+        Returns (fused candidates, complete) where complete is False if a branch was left out.
         """
         # 1. Retrieval (High Recall)
         # Fetch more candidates to allow reranking (3x k) to cast a wide net
         candidates_k = k * 3
-        results_local = self._search_local(query, candidates_k) 
-        results_gemini = self._search_gemini(query, candidates_k)
+        # Both branches embed + search concurrently; fusion uses whatever is back by its deadline
+        branches = [
+            ("Local", _search_pool.submit(self._search_local, query, candidates_k, filters), RAG_LOCAL_SEARCH_TIMEOUT),
+            ("Gemini", _search_pool.submit(self._search_gemini, query, candidates_k, filters), RAG_GEMINI_SEARCH_TIMEOUT),
+        ]
+        started = time.monotonic()
+        vector_lists = []
+        for name, future, timeout in branches:
+            remaining = max(0.0, started + timeout - time.monotonic())
+            try:
+                vector_lists.append(future.result(timeout=remaining))
+            except FuturesTimeout:
+                logger.warning(f"   ⏱️ {name} branch missed its {timeout}s deadline. Fusing without it.")
+            except Exception as e:
+                logger.warning(f"   ⚠️ {name} branch failed: {e}. Fusing without it.")
         
         # 2. RRF Fusion
-        k_rrf = 60 
-        scores = {}
-        metadata_map = {}
-        
-        for rank, item in enumerate(results_local):
-            doc_id = item['id']
-            scores[doc_id] = scores.get(doc_id, 0.0) + (1.0 / (rank + k_rrf))
-            metadata_map[doc_id] = item
-            
-        for rank, item in enumerate(results_gemini):
-            doc_id = item['id']
-            scores[doc_id] = scores.get(doc_id, 0.0) + (1.0 / (rank + k_rrf))
-            if doc_id not in metadata_map: 
-                metadata_map[doc_id] = item
-            
-        # Top Candidates from RRF
-        sorted_ids = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
-        top_candidates = [metadata_map[doc_id] for doc_id in sorted_ids[:candidates_k]] # Keep pool large for LLM
-        
-        # 3. LLM Reranking (Precision)
-        # Use Gemini Flash to filter out noise (like the persistent 'sticky' images)
-        logger.info(f"🧠 Reranking {len(top_candidates)} candidates via Gemini...")
-        return self._rerank_with_llm(query, top_candidates, k)
+        fused = self._fuse(query, vector_lists, lexical_future.result())
+        return fused, len(vector_lists) == len(branches)
 
-    def _rerank_with_llm(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
-        from services.gemini import gemini_service
-        try:
-            # Construct Prompt
-            candidates_text = ""
-            for i, c in enumerate(candidates):
-                # Optimize text for token usage
-                meta_str = f"Date: {c['metadata'].get('date')}, Location: {c['metadata'].get('location')}"
-                snippet = c['text'][:200].replace('\n', ' ')
-                candidates_text += f"[{i}] ID: {c['id']} | {meta_str} | Content: {snippet}\n"
-
-            prompt = (
-                f"User Query: {query}\n\n"
-                f"Candidate Memories:\n{candidates_text}\n\n"
-                "Task: Select the most relevant memories for the query. \n"
-                "Rules:\n"
-                "1. STRICTLY ignore memories that conflict with the query (e.g. wrong location, wrong year).\n"
-                "2. If the query specifies a place (e.g. 'China'), reject items from other places (e.g. 'Korea').\n"
-                "3. Rank them by relevance (Most relevant first).\n"
-                "4. Return ONLY a JSON list of indices, e.g. [0, 4, 2]. Return at most 5 indices.\n"
-                "5. If no relevant memories found, return []."
-            )
-
-            # Call Gemini (Flash is preferred for speed and rate limits)
-            # Explicitly request dynamically found Flash model to avoid consuming Pro quota (2 RPM)
-            flash_model = gemini_service.get_flash_model_name()
-            
-            response_text = gemini_service.chat_query(
-                "You are a search ranking assistant. Output JSON only.", 
-                prompt, 
-                temperature=0.0,
-                model_name=flash_model
-            )
-            
-            import json
-            import re
-            
-            # Extract JSON
-            match = re.search(r"\[.*\]", response_text, re.DOTALL)
-            if match:
-                selected_indices = json.loads(match.group(0))
-                reranked_results = []
-                for idx in selected_indices:
-                    if 0 <= idx < len(candidates):
-                        reranked_results.append(candidates[idx])
-                
-                logger.info(f"   ↳ LLM Selected {len(reranked_results)} relevant memories.")
-                return reranked_results[:top_k]
-            else:
-                logger.warning("   ⚠️ LLM Reranking failed to parse JSON. Falling back to RRF.")
-                return candidates[:top_k]
-
-        except Exception as e:
-            logger.error(f"   ⚠️ LLM Reranking Error: {e}. Falling back to RRF.")
-            return candidates[:top_k]
-
-    def _search_local(self, query: str, k: int):
+    def _search_local(self, query: str, k: int, filters=None):
         # ... logic from previous search() using self.table_local and Embedder ...
-        query_embedding = Embedder.embed_text([query])[0]
-        return self._execute_search(self.table_local, query_embedding, query, k, 1024)
+        query_embedding = _embed_query(MODEL_NAME, query, lambda q: Embedder.embed_text([q])[0])
+        return self._execute_search(self.table_local, query_embedding, query, k, 1024, filters)
 
-    def _search_gemini(self, query: str, k: int):
-        from services.gemini import gemini_service
-        query_embedding = gemini_service.get_embedding(query)
+    def _search_gemini(self, query: str, k: int, filters=None):
+        from services.gemini import gemini_service, EMBEDDING_MODEL
+        query_embedding = _embed_query(EMBEDDING_MODEL, query, gemini_service.get_embedding)
         if not query_embedding: return []
-        return self._execute_search(self.table_gemini, query_embedding, query, k, 768)
+        return self._execute_search(self.table_gemini, query_embedding, query, k, 768, filters)
 
-    def _execute_search(self, table, vector, query_text, k, dim):
-        # Shared Hybrid Logic
+    def _execute_search(self, table, vector, query_text, k, dim, filters=None):
+        # Vector half of hybrid search (keyword half is the FTS5 mirror, fused in search())
         try:
-            import re
-            
-            # Dynamic Weighting Logic
-            alpha_vector = 0.7 
-            if re.search(r"\b(19|20)\d{2}\b", query_text): alpha_vector = 0.1
-            if any(w in query_text for w in ["행복", "happy", "summer", "winter"]): alpha_vector = 0.9 # Add seasons
-            
-            results = table.search(vector).limit(k * 2).to_list()
+            where = filters.to_lance_where() if filters else None
+            results = vector_index.search(table, vector, k, where=where).to_list()
+            if where and not results:
+                # Extracted filters are heuristics; never return nothing because of them
+                logger.info(f"   ↳ Prefilter matched nothing in {table.name}. Searching unfiltered.")
+                results = vector_index.search(table, vector, k).to_list()
             hits = []
-            
-            keywords = [w.lower() for w in query_text.split() if len(w) > 1]
-            
             for r in results:
                 dist = r.get('_distance', 0.0)
-                vector_score = 1.0 - (dist / 2.0)
-                
-                # Relaxed threshold for candidate generation
-                # if vector_score < 0.3 and alpha_vector > 0.5: continue 
-                
-                keyword_matches = sum(1 for kw in keywords if kw in r["text"].lower())
-                keyword_score = min(keyword_matches * 0.3, 1.0)
-                
-                # Hybrid Score
-                hybrid_score = (vector_score * alpha_vector) + (keyword_score * (1.0 - alpha_vector))
-                
                 meta = { "date": r["date"], "location": r["location"], "media_type": r["media_type"], "image_url": r["image_url"] }
                 hits.append({
                     "id": r["id"], 
-                    "score": hybrid_score, 
+                    "score": 1.0 - (dist / 2.0), 
                     "text": r["text"], 
                     "metadata": meta
                 })
-            
-            hits.sort(key=lambda x: x["score"], reverse=True)
             return hits
         except Exception as e:
             logger.error(f"Search Error: {e}")
@@ -363,20 +498,246 @@ class MemoryVectorStore:
     def get_embeddings(self, ids: List[str]):
         return {} # Deprecated/Unused
     
+CHECKPOINT_PATH = os.path.join(LANCEDB_PATH, "index_checkpoint.json")
+
+def iter_event_pages(db, after_id: int = 0, page_size: int = RAG_INDEX_PAGE_SIZE):
+    """
+    Yields events in id order, one page at a time, using keyset pagination
+    (`id > last_id`) so later pages cost the same as the first. Faces and their
+    people are eager-loaded per page, so build_document() issues no extra queries.
+    Pages are detached from the session so memory stays bounded.
+    """
+    last_id = after_id
+    while True:
+        page = db.query(models.TimelineEvent)\
+            .options(selectinload(models.TimelineEvent.faces).selectinload(models.Face.person))\
+            .filter(models.TimelineEvent.id > last_id)\
+            .order_by(models.TimelineEvent.id)\
+            .limit(page_size)\
+            .all()
+        if not page: return
+        last_id = page[-1].id
+        db.expunge_all()
+        yield page
+
 class Indexer:
     @staticmethod
-    def index_all():
+    def _load_checkpoint() -> int:
+        try:
+            with open(CHECKPOINT_PATH) as f:
+                return int(json.load(f).get("last_id", 0))
+        except (OSError, ValueError):
+            return 0
+
+    @staticmethod
+    def _save_checkpoint(last_id: int):
+        tmp_path = CHECKPOINT_PATH + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"last_id": last_id, "updated_at": datetime.utcnow().isoformat()}, f)
+        os.replace(tmp_path, CHECKPOINT_PATH) # Atomic, so a crash never leaves a torn checkpoint
+
+    @staticmethod
+    def index_all(resume: bool = True) -> int:
+        """
+        Streaming full re-index.
+        A producer thread reads pages from SQLite while this thread embeds and upserts
+        the previous page; at most RAG_INDEX_PREFETCH_PAGES pages wait in between.
+        Progress is checkpointed after every page, so an interrupted run resumes
+        where it stopped (pass resume=False to start over).
+        Returns the number of events indexed in this run.
+        """
+        store = memory_vector_store
+        start_after = Indexer._load_checkpoint() if resume else 0
+        if start_after:
+            logger.info(f"⏩ Resuming full indexing after event {start_after}")
+
+        pages = queue.Queue(maxsize=max(1, RAG_INDEX_PREFETCH_PAGES))
+        stop = threading.Event()
+        _DONE = object()
+
+        def put(item) -> bool:
+            # Blocks while the embedder is behind, but gives up once it has stopped
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            db = SessionLocal()
+            try:
+                for page in iter_event_pages(db, start_after):
+                    if not put(page): return
+                put(_DONE)
+            except Exception as e:
+                put(e)
+            finally:
+                db.close()
+
+        producer = threading.Thread(target=produce, name="rag-index-reader", daemon=True)
+        producer.start()
+
+        indexed = 0
+        try:
+            while True:
+                page = pages.get()
+                if page is _DONE: break
+                if isinstance(page, Exception): raise page
+
+                for i in range(0, len(page), GEMINI_EMBED_BATCH_SIZE):
+                    store.add_events(page[i : i + GEMINI_EMBED_BATCH_SIZE])
+                indexed += len(page)
+                Indexer._save_checkpoint(page[-1].id)
+                logger.info(f"📚 Full Indexing: {indexed} events indexed (through id {page[-1].id})")
+        finally:
+            stop.set()
+            producer.join(timeout=5)
+
+        if os.path.exists(CHECKPOINT_PATH):
+            os.remove(CHECKPOINT_PATH)
+        logger.info(f"✅ Full Indexing complete: {indexed} events (Dual Mode)")
+        return indexed
+
+    @staticmethod
+    def rebuild_lexical() -> int:
+        """
+        Rebuilds the FTS5 keyword mirror from the database (no embedding involved).
+        """
+        store = memory_vector_store
+        store.lexical.delete()
+        db = SessionLocal()
+        count = 0
+        try:
+            for page in iter_event_pages(db, page_size=500):
+                store.lexical.upsert([build_document(event) for event in page])
+                count += len(page)
+        finally:
+            db.close()
+        store._bump_version()
+        logger.info(f"🔤 Keyword index rebuilt: {count} documents")
+        return count
+
+    @staticmethod
+    def sync(page_size: int = 500) -> Dict[str, int]:
+        """
+        Incremental sync: embeds only events whose document changed since they were
+        last indexed (or were never indexed / flagged stale), then removes vectors
+        of events that no longer exist.
+        """
+        store = memory_vector_store
+        if store.lexical.count() == 0:
+            Indexer.rebuild_lexical() # First sync after upgrading: fill the keyword mirror
+
         db = SessionLocal()
-        vector_store = MemoryVectorStore()
+        stats = {"checked": 0, "reindexed": 0, "removed": 0}
+        live_ids = set()
         try:
-            events = db.query(models.TimelineEvent).all()
-            logger.info(f"📚 Full Indexing: {len(events)} events (Dual Mode)")
-            chunk_size = 20 # Smaller chunk for dual API calls
-            for i in range(0, len(events), chunk_size):
-                chunk = events[i : i + chunk_size]
-                vector_store.add_events(chunk)
+            for page in iter_event_pages(db, page_size=page_size):
+                dirty = []
+                for event in page:
+                    live_ids.add(str(event.id))
+                    if event.rag_indexed_at is None or event.rag_content_hash != document_hash(build_document(event)):
+                        dirty.append(event)
+                stats["checked"] += len(page)
+
+                for i in range(0, len(dirty), GEMINI_EMBED_BATCH_SIZE):
+                    store.add_events(dirty[i : i + GEMINI_EMBED_BATCH_SIZE])
+                stats["reindexed"] += len(dirty)
         finally:
             db.close()
 
+        orphans = store.indexed_ids() - live_ids
+        if orphans:
+            store.delete_events(orphans)
+            stats["removed"] = len(orphans)
+
+        logger.info(f"🔁 RAG sync: {stats['checked']} checked, {stats['reindexed']} re-indexed, {stats['removed']} orphan vectors removed")
+        return stats
+
+class IndexingBuffer:
+    """
+    Write-behind buffer for RAG indexing.
+    Collects dirty event IDs and flushes them as one batch (one encode() call and
+    one merge per table) when RAG_FLUSH_SIZE is reached or RAG_FLUSH_INTERVAL
+    seconds pass after the first pending ID, whichever comes first.
+    """
+    def __init__(self, store: MemoryVectorStore, max_size: int = RAG_FLUSH_SIZE, max_delay: float = RAG_FLUSH_INTERVAL):
+        self.store = store
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending = {} # event_id -> None (insertion-ordered set)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer = None
+
+    def mark_dirty(self, event_ids):
+        with self._lock:
+            for event_id in event_ids:
+                self._pending[int(event_id)] = None
+            size = len(self._pending)
+            if self._timer is None and size < self.max_size:
+                self._timer = threading.Timer(self.max_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if size >= self.max_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Indexes every pending event now. Returns the number of events indexed.
+        """
+        with self._lock:
+            ids = list(self._pending)
+            self._pending.clear()
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+        if not ids:
+            return 0
+
+        # One flush at a time so concurrent merges don't fight over table versions
+        with self._flush_lock:
+            db = SessionLocal()
+            try:
+                events = db.query(models.TimelineEvent)\
+                    .options(selectinload(models.TimelineEvent.faces).selectinload(models.Face.person))\
+                    .filter(models.TimelineEvent.id.in_(ids))\
+                    .all()
+                logger.info(f"📦 Flushing RAG buffer: {len(events)} events")
+                self.store.add_events(events)
+                return len(events)
+            except Exception as e:
+                logger.error(f"❌ RAG buffer flush failed: {e}")
+                return 0
+            finally:
+                db.close()
+
 # Singleton
 memory_vector_store = MemoryVectorStore()
+index_buffer = IndexingBuffer(memory_vector_store)
+atexit.register(index_buffer.flush) # Don't lose pending IDs when the worker shuts down
+
+def mark_rag_dirty(event_ids, reindex: bool = True):
+    """
+    Flags events as stale in the vector index. With reindex=True they are also
+    queued on the write-behind buffer; otherwise the next indexing pass
+    (worker task or `manage.py rag-sync`) picks them up.
+    """
+    ids = [int(i) for i in event_ids]
+    if not ids: return
+    db = SessionLocal()
+    try:
+        db.query(models.TimelineEvent).filter(models.TimelineEvent.id.in_(ids))\
+            .update({models.TimelineEvent.rag_indexed_at: None}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"⚠️ Could not flag events for re-indexing: {e}")
+    finally:
+        db.close()
+    if reindex:
+        index_buffer.mark_dirty(ids)
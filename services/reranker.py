@@ -0,0 +1,156 @@
+import re
+import json
+import hashlib
+from typing import List, Dict, Any
+from services.cache import TTLCache
+from services.model_manager import model_manager
+from services.config import RERANKER_MODEL, RERANKER_BATCH_SIZE, RERANKER_CACHE_TTL
+from services.logger import get_logger
+
+logger = get_logger("reranker")
+
+RERANKER_MB = 2200 # bge-reranker-v2-m3 (568M params, fp32)
+
+class Reranker:
+    """
+    Reorders fused retrieval candidates and keeps the best `top_k`.
+    """
+    name = "none"
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        return candidates[:top_k]
+
+class LLMReranker(Reranker):
+    """
+    Asks Gemini Flash to pick and order the relevant candidates (one API round-trip).
+    """
+    name = "llm"
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        from services.gemini import gemini_service
+        try:
+            # Construct Prompt
+            candidates_text = ""
+            for i, c in enumerate(candidates):
+                # Optimize text for token usage
+                meta_str = f"Date: {c['metadata'].get('date')}, Location: {c['metadata'].get('location')}"
+                snippet = c['text'][:200].replace('\n', ' ')
+                candidates_text += f"[{i}] ID: {c['id']} | {meta_str} | Content: {snippet}\n"
+
+            prompt = (
+                f"User Query: {query}\n\n"
+                f"Candidate Memories:\n{candidates_text}\n\n"
+                "Task: Select the most relevant memories for the query. \n"
+                "Rules:\n"
+                "1. STRICTLY ignore memories that conflict with the query (e.g. wrong location, wrong year).\n"
+                "2. If the query specifies a place (e.g. 'China'), reject items from other places (e.g. 'Korea').\n"
+                "3. Rank them by relevance (Most relevant first).\n"
+                "4. Return ONLY a JSON list of indices, e.g. [0, 4, 2]. Return at most 5 indices.\n"
+                "5. If no relevant memories found, return []."
+            )
+
+            # Call Gemini (Flash is preferred for speed and rate limits)
+            # Explicitly request dynamically found Flash model to avoid consuming Pro quota (2 RPM)
+            flash_model = gemini_service.get_flash_model_name()
+            
+            response_text = gemini_service.chat_query(
+                "You are a search ranking assistant. Output JSON only.", 
+                prompt, 
+                temperature=0.0,
+                model_name=flash_model
+            )
+            
+            # Extract JSON
+            match = re.search(r"\[.*\]", response_text, re.DOTALL)
+            if match:
+                selected_indices = json.loads(match.group(0))
+                reranked_results = []
+                for idx in selected_indices:
+                    if 0 <= idx < len(candidates):
+                        reranked_results.append(candidates[idx])
+                
+                logger.info(f"   ↳ LLM Selected {len(reranked_results)} relevant memories.")
+                return reranked_results[:top_k]
+            else:
+                logger.warning("   ⚠️ LLM Reranking failed to parse JSON. Falling back to RRF.")
+                return candidates[:top_k]
+
+        except Exception as e:
+            logger.error(f"   ⚠️ LLM Reranking Error: {e}. Falling back to RRF.")
+            return candidates[:top_k]
+
+class CrossEncoderReranker(Reranker):
+    """
+    Local cross-encoder (bge-reranker-v2-m3 by default, multilingual) scoring
+    (query, document) pairs on CPU in batches. No network, no quota.
+    Pair scores are cached, so repeated queries only score new candidates.
+    """
+    name = "cross-encoder"
+
+    def __init__(self, model_name: str = RERANKER_MODEL):
+        self.model_name = model_name
+        self._scores = TTLCache(maxsize=20000, ttl=RERANKER_CACHE_TTL)
+        model_manager.register(self.registry_name, RERANKER_MB, self._load_model)
+
+    @property
+    def registry_name(self) -> str:
+        return f"reranker:{self.model_name}"
+
+    def _load_model(self):
+        print(f"🧠 Loading Reranker Model ({self.model_name})...")
+        from sentence_transformers import CrossEncoder
+        return CrossEncoder(self.model_name, max_length=512)
+
+    def get_model(self):
+        return model_manager.acquire(self.registry_name)
+
+    def _key(self, query: str, text: str):
+        return (query.strip(), hashlib.sha1(text.encode("utf-8")).hexdigest())
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        keys = [self._key(query, t) for t in texts]
+        scores = [self._scores.get(key) for key in keys]
+        missing = [i for i, s in enumerate(scores) if s is None]
+
+        if missing:
+            with model_manager.use(self.registry_name) as model:
+                fresh = model.predict([(query, texts[i]) for i in missing], batch_size=RERANKER_BATCH_SIZE)
+            for i, s in zip(missing, fresh):
+                scores[i] = float(s)
+                self._scores.set(keys[i], scores[i])
+
+        logger.info(f"   ↳ Cross-encoder: {len(texts) - len(missing)} cached, {len(missing)} scored")
+        return scores
+
+    def rerank(self, query: str, candidates: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+        if not candidates:
+            return []
+        try:
+            scores = self.score(query, [c["text"] for c in candidates])
+        except Exception as e:
+            logger.error(f"   ⚠️ Cross-encoder Reranking Error: {e}. Falling back to RRF.")
+            return candidates[:top_k]
+
+        ranked = sorted(zip(candidates, scores), key=lambda pair: pair[1], reverse=True)
+        return [dict(c, rerank_score=s) for c, s in ranked[:top_k]]
+
+RERANKERS = {
+    "llm": LLMReranker(),
+    "cross-encoder": CrossEncoderReranker(),
+    "none": Reranker(),
+}
+
+def resolve_reranker_name(name: str = None, mode: str = "ensemble") -> str:
+    """
+    Per-request name > 'reranker' setting > default (LLM for ensemble search, none otherwise).
+    """
+    from services.config import config
+    name = name or config.get("reranker")
+    if name in RERANKERS:
+        return name
+    if name:
+        logger.warning(f"⚠️ Unknown reranker '{name}'. Using default.")
+    return "llm" if mode == "ensemble" else "none"
+
+def get_reranker(name: str = None, mode: str = "ensemble") -> Reranker:
+    return RERANKERS[resolve_reranker_name(name, mode)]
@@ -1,5 +1,7 @@
 import os
 import time
+import sqlite3
+import threading
 from huey import SqliteHuey
 from services.logger import get_logger
 from database import get_db
@@ -11,7 +13,131 @@ logger = get_logger("tasks")
 # This creates a local file 'decade_ops.db' for the queue
 huey = SqliteHuey(filename='decade_ops.db')
 
-@huey.task()
+# Priority Lanes
+# Huey always dequeues the highest priority first. Each lane owns a band of
+# LANE_SPAN values, so even the oldest bulk task never outranks interactive work.
+LANE_SPAN = 100
+PRIORITY_LANES = {
+    "interactive": 300, # User is waiting (person rename, single manual retry)
+    "upload": 200,      # Fresh uploads
+    "bulk": 100,        # Backfills, orphan rescue, mass retries
+}
+
+# Fair Scheduling
+# Within a lane, every FAIR_SHARE_BATCH tasks from the same source step down one
+# priority level. A 5,000-photo import keeps draining, but a newer source's first
+# tasks slot in ahead of its tail instead of waiting behind all of it.
+FAIR_SHARE_BATCH = 20
+FAIR_IDLE_RESET = 300 # Seconds of quiet before a source starts from the top again
+
+# User-triggered work up to this many tasks goes to the interactive lane; larger
+# requests (e.g. "retry everything") are background work and go to bulk
+INTERACTIVE_MAX_TASKS = 10
+
+_source_positions = {} # source -> (tasks submitted, last submit time)
+_fair_lock = threading.Lock()
+
+def _priority_for(lane: str, source: str) -> int:
+    base = PRIORITY_LANES.get(lane, PRIORITY_LANES["bulk"])
+    now = time.monotonic()
+    with _fair_lock:
+        count, last_seen = _source_positions.get(source, (0, now))
+        if now - last_seen > FAIR_IDLE_RESET:
+            count = 0
+        _source_positions[source] = (count + 1, now)
+        if len(_source_positions) > 1000:
+            # Per-upload sources accumulate; idle ones would restart from the top anyway
+            for stale in [k for k, (_, seen) in _source_positions.items() if now - seen > FAIR_IDLE_RESET]:
+                del _source_positions[stale]
+
+    step = min(count // FAIR_SHARE_BATCH, LANE_SPAN - 1)
+    return base + (LANE_SPAN - 1) - step
+
+# Task De-duplication
+# While a (task, event) pair is pending or running, a claim row in the Huey SQLite
+# file blocks it from being queued again. Claims are released when the task ends;
+# anything older than CLAIM_TTL is assumed to belong to a crashed worker.
+CLAIM_TTL = 6 * 3600
+
+def _claim_key(task_fn, event_id) -> str:
+    return f"{task_fn.name}:{event_id}"
+
+def _claims_supported() -> bool:
+    # Immediate mode (tests) swaps in MemoryStorage, which has no SQLite file
+    return hasattr(huey.storage, "db")
+
+def _release_claim(task_fn, event_id):
+    if not _claims_supported():
+        return
+    try:
+        with huey.storage.db(commit=True) as curs:
+            curs.execute("DELETE FROM task_claim WHERE key = ?", (_claim_key(task_fn, event_id),))
+    except sqlite3.OperationalError:
+        pass # Claims table not created yet (task queued before bulk_enqueue existed)
+    except Exception as e:
+        logger.warning(f"Failed to release task claim for {event_id}: {e}")
+
+def _claim(task_fn, event_ids: list) -> list:
+    """
+    Inserts claim rows for all events in ONE SQLite transaction.
+    Returns the events that were not already pending or running.
+    """
+    if not _claims_supported():
+        return list(event_ids)
+
+    now = time.time()
+    claimed = []
+    with huey.storage.db(commit=True) as curs:
+        curs.execute("CREATE TABLE IF NOT EXISTS task_claim (key TEXT PRIMARY KEY, claimed_at REAL NOT NULL)")
+        curs.execute("DELETE FROM task_claim WHERE claimed_at < ?", (now - CLAIM_TTL,))
+        for event_id in event_ids:
+            curs.execute(
+                "INSERT OR IGNORE INTO task_claim (key, claimed_at) VALUES (?, ?)",
+                (_claim_key(task_fn, event_id), now)
+            )
+            if curs.rowcount:
+                claimed.append(event_id)
+    return claimed
+
+def bulk_enqueue(task_fn, event_ids, lane: str = "bulk", source: str = None, batch_size: int = None) -> dict:
+    """
+    Enqueues task_fn(event_id) for many events through huey.enqueue (signals,
+    immediate mode and storage stay Huey's business).
+    Skips events that already have the same task type pending or running;
+    the claims for the whole batch are taken in one transaction.
+    With `batch_size`, enqueues task_fn([event_id, ...]) per micro-batch instead
+    (claims stay per event, so the task must release each one).
+    Returns {"queued": n, "already_queued": m} counted in events.
+    """
+    ids = list(dict.fromkeys(event_ids)) # Preserve order, drop repeats
+    if not ids:
+        return {"queued": 0, "already_queued": 0}
+
+    source = source or lane
+    claimed = _claim(task_fn, ids)
+
+    if batch_size:
+        payloads = [claimed[i:i + batch_size] for i in range(0, len(claimed), batch_size)]
+    else:
+        payloads = claimed
+
+    for n, payload in enumerate(payloads):
+        task = task_fn.s(payload)
+        task.priority = _priority_for(lane, source)
+        try:
+            huey.enqueue(task)
+        except Exception:
+            # Don't leave the rest claimed (and un-queueable) until CLAIM_TTL
+            for rest in payloads[n:]:
+                for event_id in (rest if batch_size else [rest]):
+                    _release_claim(task_fn, event_id)
+            raise
+
+    counts = {"queued": len(claimed), "already_queued": len(ids) - len(claimed)}
+    logger.info(f"📥 Bulk enqueue {task_fn.name} ({lane}/{source}): {counts['queued']} queued, {counts['already_queued']} already queued")
+    return counts
+
+@huey.task(priority=PRIORITY_LANES["upload"])
 def process_ai_for_event(event_id: int):
     """
     Full AI Pipeline for a single event (Huey Task).
@@ -32,13 +158,13 @@ def process_ai_for_event(event_id: int):
             from services.vision import vision_service
             from services.faces import process_faces
             from services.context import context_service
-            from services.rag import memory_vector_store
+            from services.rag import index_buffer
         except ImportError as e:
             logger.warning(f"Partial Import Error in Worker: {e}")
             vision_service = None
             process_faces = None
             context_service = None
-            memory_vector_store = None
+            index_buffer = None
             
             # Helper to try importing individually
             try: from services.vision import vision_service
@@ -47,7 +173,7 @@ def process_ai_for_event(event_id: int):
             except: pass
             try: from services.context import context_service
             except: pass
-            try: from services.rag import memory_vector_store
+            try: from services.rag import index_buffer
             except: pass
 
         event = db.query(models.TimelineEvent).filter(models.TimelineEvent.id == event_id).first()
@@ -91,9 +217,9 @@ def process_ai_for_event(event_id: int):
                 if event.media_type == "photo":
                     analysis_result = vision_service.analyze_scene(file_path, names=found_names)
                 elif event.media_type == "video":
-                    # Video Intelligence (Tri-Frame)
+                    # Video Intelligence (scene-change keyframes, one batched request)
                     logger.info("🎥 Starting Video Analysis...")
-                    analysis_result = vision_service.analyze_video(file_path)
+                    analysis_result = vision_service.analyze_video(file_path, names=found_names)
                 
                 if analysis_result:
                     tags = analysis_result.get("tags", [])
@@ -129,11 +255,11 @@ def process_ai_for_event(event_id: int):
             except Exception as e:
                 logger.error(f"Context error: {e}")
                 
-        # 5. RAG Indexing
-        if memory_vector_store:
+        # 5. RAG Indexing (Write-behind: batched with other recent events)
+        if index_buffer:
              try:
-                 logger.info("Indexing to Vector DB...")
-                 memory_vector_store.add_events([event])
+                 logger.info("Queuing for Vector DB indexing...")
+                 index_buffer.mark_dirty([event.id])
              except Exception as e:
                  logger.error(f"RAG Indexing error: {e}")
 
@@ -154,80 +280,142 @@ def process_ai_for_event(event_id: int):
     finally:
         # Close the session!
         db.close()
+        _release_claim(process_ai_for_event, event_id)
         # RATE LIMIT THROTTLE:
         # Gemini Free Tier is ~15 RPM.
         time.sleep(5)
 
-def enqueue_event(event_id: int):
+def enqueue_event(event_id: int, lane: str = "upload", source: str = None) -> bool:
     """
     Enqueues the event analysis task.
     Now uses Huey to send to background process.
+    Returns False if the event is already pending or running.
+    """
+    logger.info(f"📥 Enqueuing Event {event_id} to Huey ({lane})")
+    counts = bulk_enqueue(process_ai_for_event, [event_id], lane=lane, source=source)
+    return counts["queued"] == 1
+
+def _caption_inputs(event):
+    """
+    (file_path, names of tagged people) for captioning, or None if the image is missing.
     """
-    logger.info(f"📥 Enqueuing Event {event_id} to Huey")
-    process_ai_for_event(event_id)
+    if not event or not event.image_url:
+        return None
 
-@huey.task()
-def process_caption_update(event_id: int):
+    file_path = event.image_url.lstrip("/")
+    if not os.path.exists(file_path):
+         file_path = f"static/uploads/{event.image_url.split('/')[-1]}"
+    
+    if not os.path.exists(file_path):
+        return None
+
+    found_names = list({f.person.name for f in event.faces if f.person})
+    return file_path, found_names
+
+@huey.task(priority=PRIORITY_LANES["bulk"])
+def process_caption_batch(event_ids: list):
     """
-    Updates ONLY the caption (summary) for an event.
+    Updates captions for a micro-batch of events (enqueue with bulk_enqueue(..., batch_size=VISION_BATCH_SIZE)).
+    Local Qwen captions the whole batch in one generate() call; Gemini throttles
+    itself after each uncached request.
     """
-    logger.info(f"🚀 [Huey] Updating Caption for Event {event_id}")
+    logger.info(f"🚀 [Huey] Updating Captions for {len(event_ids)} Events")
     db_gen = get_db()
     db = next(db_gen)
     try:
         from services.vision import vision_service
-        from services.rag import memory_vector_store
+        from services.rag import index_buffer
         
+        events = db.query(models.TimelineEvent).filter(models.TimelineEvent.id.in_(event_ids)).all()
+        batch = [(event, _caption_inputs(event)) for event in events]
+        batch = [(event, inputs) for event, inputs in batch if inputs]
+        if not batch:
+            return
+
+        flash_model = None
+        if vision_service.caption_provider() == "gemini":
+            # Force Flash model dynamically for bulk updates to avoid Rate Limits
+            from services.gemini import gemini_service
+            flash_model = gemini_service.get_flash_model_name()
+
+        captions = vision_service.generate_captions_batch([inputs for _, inputs in batch], model_name=flash_model)
+        updated = []
+        for (event, _), caption in zip(batch, captions):
+            if caption:
+                event.summary = caption
+                updated.append(event.id)
+        db.commit()
+        logger.info(f"Updated {len(updated)}/{len(batch)} Captions")
+
+        if updated and index_buffer:
+            try:
+                index_buffer.mark_dirty(updated)
+            except Exception as e:
+                logger.error(f"RAG Indexing error: {e}")
+
+    except Exception as e:
+        logger.error(f"Error in process_caption_batch: {e}")
+    finally:
+        db.close()
+        for event_id in event_ids:
+            _release_claim(process_caption_batch, event_id)
+
+@huey.task(priority=PRIORITY_LANES["upload"])
+def transcode_video(event_id: int):
+    """
+    Builds the web/preview renditions, sprite strip and poster for a video event.
+    Playback falls back to the original file until this has finished.
+    """
+    logger.info(f"🎞️ [Huey] Transcoding Video for Event {event_id}")
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        from services.transcode import transcode_service
+
         event = db.query(models.TimelineEvent).filter(models.TimelineEvent.id == event_id).first()
-        if not event or not event.image_url:
+        if not event or event.media_type != "video" or not event.image_url:
             return
 
         file_path = event.image_url.lstrip("/")
         if not os.path.exists(file_path):
-             file_path = f"static/uploads/{event.image_url.split('/')[-1]}"
-        
-        if not os.path.exists(file_path):
+            logger.warning(f"File not found for Event {event_id}")
             return
 
-        # 1. Get Existing Names
-        found_names = []
-        if event.faces:
-            for f in event.faces:
-                if f.person:
-                    found_names.append(f.person.name)
-        found_names = list(set(found_names))
-        
-        # 2. Generate Caption
-        if vision_service:
-            try:
-                # Force Flash model dynamically for bulk updates to avoid Rate Limits
-                from services.gemini import gemini_service
-                flash_model = gemini_service.get_flash_model_name()
-                
-                caption = vision_service.generate_caption(file_path, names=found_names, model_name=flash_model)
-                if caption:
-                    event.summary = caption
-                    db.commit()
-                    logger.info(f"Updated Caption: {caption}")
-            except Exception as e:
-                logger.error(f"Caption update error: {e}")
+        if not transcode_service.available:
+            event.transcode_status = "skipped"
+            db.commit()
+            return
 
-        # 3. Update RAG Index
-        if memory_vector_store:
-             try:
-                 memory_vector_store.add_events([event])
-             except Exception as e:
-                 logger.error(f"RAG Indexing error: {e}")
+        try:
+            fields = transcode_service.transcode(file_path)
+        except Exception as e:
+            logger.error(f"Transcode error: {e}")
+            event.transcode_status = "failed"
+            db.commit()
+            return
+
+        old_thumbnail = event.thumbnail_url
+        for name, value in fields.items():
+            setattr(event, name, value)
+        event.transcode_status = "done"
+        db.commit()
+        if old_thumbnail and old_thumbnail != event.thumbnail_url:
+            # The poster got a new URL so cached thumbnails refresh; drop the old file
+            transcode_service.remove_file(old_thumbnail)
+        logger.info(f"✅ Transcoded Event {event_id} ({event.video_duration or 0:.1f}s)")
 
     except Exception as e:
-        logger.error(f"Error in process_caption_update: {e}")
+        logger.error(f"Error in transcode_video: {e}")
     finally:
         db.close()
-        # RATE LIMIT THROTTLE:
-        # Gemini Free Tier is ~15 RPM.
-        # This worker process runs sequentially. To be safe, we sleep 5s after every task.
-        # This limits us to max 12 tasks/min, keeping us safe.
-        time.sleep(5)
+        _release_claim(transcode_video, event_id)
+
+def enqueue_transcode(event_id: int, lane: str = "upload", source: str = None) -> bool:
+    """
+    Enqueues video transcoding. Returns False if it is already pending or running.
+    """
+    counts = bulk_enqueue(transcode_video, [event_id], lane=lane, source=source)
+    return counts["queued"] == 1
 
 # Legacy / Compatibility methods
 def start_worker():
@@ -262,9 +450,9 @@ def reprocess_orphans():
             
         logger.info(f"⚠️ Found {len(orphans)} orphans. Rescuing...")
         
-        for event in orphans:
-            logger.info(f"🚑 Re-enqueuing Event {event.id}...")
-            enqueue_event(event.id) # Use enqueue wrapper to use Huey
+        # Background rescue must not block new uploads; restarts don't stack duplicates
+        counts = bulk_enqueue(process_ai_for_event, [e.id for e in orphans], lane="bulk", source="orphans")
+        logger.info(f"🚑 Re-enqueued {counts['queued']} orphans ({counts['already_queued']} already queued).")
             
     except Exception as e:
         logger.error(f"Failed to reprocess orphans: {e}")
@@ -0,0 +1,228 @@
+import os
+import time
+import shutil
+import subprocess
+from services.config import (
+    FFMPEG_PATH, VIDEO_WEB_HEIGHT, VIDEO_WEB_CRF, VIDEO_X264_PRESET,
+    VIDEO_PREVIEW_HEIGHT, VIDEO_PREVIEW_KBPS, VIDEO_SPRITE_FRAMES, VIDEO_SPRITE_WIDTH,
+    VIDEO_TRANSCODE_SPEED_FACTOR, VIDEO_TRANSCODE_MAX_SECONDS, VIDEO_LONG_SOURCE_SECONDS,
+)
+from services.logger import get_logger
+
+logger = get_logger("transcode")
+
+UPLOAD_DIR = "static/uploads"
+RENDITION_DIR = os.path.join(UPLOAD_DIR, "video")
+POSTER_MAX_HEIGHT = 720
+MIN_TIMEOUT_SECONDS = 60 # Short clips still pay ffmpeg start-up and probing
+
+def _fit_short_edge(edge: int) -> str:
+    """
+    scale filter that caps the SHORT edge at `edge` (portrait and landscape alike),
+    never upscales, and keeps both dimensions even for yuv420p.
+    """
+    return (
+        f"scale='if(gt(iw,ih),-2,trunc(min(iw,{edge})/2)*2)'"
+        f":'if(gt(iw,ih),trunc(min(ih,{edge})/2)*2,-2)'"
+    )
+
+class TranscodeService:
+    """
+    Produces playback renditions for uploaded videos with ffmpeg:
+    - web: H.264 High/AAC MP4 with the moov atom up front (+faststart), so playback
+      starts after the first range request instead of after the whole file
+    - preview: low-bitrate MP4 for mobile, the timeline and cinema mode
+    - sprite: one JPEG strip of evenly spaced frames (hover scrubbing)
+    - poster: a representative frame, replacing the first-frame thumbnail under a new
+      name (browsers cache media by URL, so the old image would otherwise stick)
+    """
+
+    def __init__(self):
+        self.ffmpeg = shutil.which(FFMPEG_PATH)
+        ffprobe_name = FFMPEG_PATH.replace("ffmpeg", "ffprobe") if "ffmpeg" in FFMPEG_PATH else "ffprobe"
+        self.ffprobe = shutil.which(ffprobe_name)
+        if not self.ffmpeg:
+            logger.warning("⚠️ ffmpeg not found: videos will be served as uploaded (set FFMPEG_PATH).")
+
+    @property
+    def available(self) -> bool:
+        return bool(self.ffmpeg)
+
+    @staticmethod
+    def timeout_for(duration: float) -> float:
+        """
+        Seconds one ffmpeg pass may take: VIDEO_TRANSCODE_SPEED_FACTOR x the source
+        length, capped at VIDEO_TRANSCODE_MAX_SECONDS (the cap when the length is unknown).
+        """
+        if not duration:
+            return VIDEO_TRANSCODE_MAX_SECONDS
+        return min(VIDEO_TRANSCODE_MAX_SECONDS, max(MIN_TIMEOUT_SECONDS, duration * VIDEO_TRANSCODE_SPEED_FACTOR))
+
+    def is_long(self, path: str) -> bool:
+        """
+        Sources this long are transcoded in the bulk lane with a faster preset.
+        """
+        return self.probe_duration(path) > VIDEO_LONG_SOURCE_SECONDS
+
+    def _run(self, args: list, output: str, timeout: float = VIDEO_TRANSCODE_MAX_SECONDS):
+        """
+        Runs ffmpeg into a temp file and renames it over `output`, so a half-written
+        rendition is never served. A pass that exceeds `timeout` is killed and raises,
+        so a hung encode can't hold the single Huey worker.
+        """
+        base, ext = os.path.splitext(output)
+        partial = f"{base}.part{ext}"
+        cmd = [self.ffmpeg, "-y", "-hide_banner", "-loglevel", "error"] + args + [partial]
+        try:
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                # run() has already killed and reaped ffmpeg
+                raise RuntimeError(f"ffmpeg timed out after {timeout:.0f}s")
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip()[-500:] or f"ffmpeg exited with {result.returncode}")
+            os.replace(partial, output)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def probe_duration(self, path: str) -> float:
+        """
+        Container duration in seconds (0.0 if unknown).
+        """
+        if not self.ffprobe:
+            return 0.0
+        try:
+            result = subprocess.run(
+                [self.ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path],
+                capture_output=True, text=True, timeout=30
+            )
+            return float(result.stdout.strip())
+        except (ValueError, subprocess.TimeoutExpired):
+            return 0.0
+
+    def web_rendition(self, source: str, output: str, duration: float = 0.0):
+        # Long sources trade some compression for a bounded encode time
+        preset = "veryfast" if duration > VIDEO_LONG_SOURCE_SECONDS else VIDEO_X264_PRESET
+        self._run([
+            "-i", source,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", _fit_short_edge(VIDEO_WEB_HEIGHT),
+            "-c:v", "libx264", "-preset", preset, "-crf", str(VIDEO_WEB_CRF),
+            "-profile:v", "high", "-pix_fmt", "yuv420p",
+            "-c:a", "aac", "-b:a", "128k", "-ac", "2",
+            "-movflags", "+faststart",
+        ], output, timeout=self.timeout_for(duration))
+
+    def preview_rendition(self, source: str, output: str, duration: float = 0.0):
+        bitrate = VIDEO_PREVIEW_KBPS
+        self._run([
+            "-i", source,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-vf", _fit_short_edge(VIDEO_PREVIEW_HEIGHT),
+            "-c:v", "libx264", "-preset", "veryfast", "-profile:v", "main", "-pix_fmt", "yuv420p",
+            "-b:v", f"{bitrate}k", "-maxrate", f"{bitrate * 3 // 2}k", "-bufsize", f"{bitrate * 3}k",
+            "-c:a", "aac", "-b:a", "64k", "-ac", "1",
+            "-movflags", "+faststart",
+        ], output, timeout=self.timeout_for(duration))
+
+    def poster(self, source: str, output: str, duration: float):
+        # 10% in skips black fade-ins without landing mid-scene on short clips
+        at = min(duration * 0.1, 3.0) if duration else 0.0
+        self._run([
+            "-ss", f"{at:.2f}", "-i", source,
+            "-frames:v", "1", "-vf", _fit_short_edge(POSTER_MAX_HEIGHT), "-q:v", "3",
+        ], output, timeout=MIN_TIMEOUT_SECONDS)
+
+    def sprite(self, source: str, output: str, duration: float):
+        frames = VIDEO_SPRITE_FRAMES
+        rate = frames / duration if duration else 1.0
+        self._run([
+            "-i", source,
+            "-vf", f"fps={rate:.6f},scale={VIDEO_SPRITE_WIDTH}:-2,tile={frames}x1",
+            "-frames:v", "1", "-q:v", "5",
+        ], output, timeout=self.timeout_for(duration))
+
+    def transcode(self, source: str) -> dict:
+        """
+        Builds every rendition for `source` and returns the TimelineEvent fields to set.
+        The poster is written under a fresh, timestamped name; the caller deletes the
+        previous thumbnail once the new URL is committed.
+        """
+        os.makedirs(RENDITION_DIR, exist_ok=True)
+        base = os.path.splitext(os.path.basename(source))[0]
+        duration = self.probe_duration(source)
+
+        web_name, preview_name, sprite_name = f"{base}_web.mp4", f"{base}_preview.mp4", f"{base}_sprite.jpg"
+        self.web_rendition(source, os.path.join(RENDITION_DIR, web_name), duration)
+        self.preview_rendition(source, os.path.join(RENDITION_DIR, preview_name), duration)
+        fields = {
+            "video_web_url": f"/{RENDITION_DIR}/{web_name}",
+            "video_preview_url": f"/{RENDITION_DIR}/{preview_name}",
+            "video_duration": duration or None,
+        }
+
+        # Stills are nice-to-have: a failure here must not discard the renditions
+        try:
+            self.sprite(source, os.path.join(RENDITION_DIR, sprite_name), duration)
+            fields["video_sprite_url"] = f"/{RENDITION_DIR}/{sprite_name}"
+        except Exception as e:
+            logger.error(f"Sprite error for {base}: {e}")
+
+        try:
+            poster_name = f"{base}_poster_{int(time.time())}.jpg"
+            self.poster(source, os.path.join(RENDITION_DIR, poster_name), duration)
+            fields["thumbnail_url"] = f"/{RENDITION_DIR}/{poster_name}"
+        except Exception as e:
+            logger.error(f"Poster error for {base}: {e}")
+
+        return fields
+
+    def remove_file(self, url: str):
+        """
+        Deletes an upload-relative file (e.g. a replaced thumbnail) if it exists.
+        """
+        if not url:
+            return
+        path = url.lstrip("/")
+        if os.path.exists(path):
+            try:
+                os.remove(path)
+            except Exception as e:
+                logger.error(f"Error deleting rendition {path}: {e}")
+
+    def remove_renditions(self, event):
+        """
+        Deletes an event's rendition files, including a transcoded poster.
+        A first-frame thumbnail in UPLOAD_DIR is removed with the upload itself.
+        """
+        urls = [event.video_web_url, event.video_preview_url, event.video_sprite_url]
+        if event.thumbnail_url and event.thumbnail_url.lstrip("/").startswith(RENDITION_DIR + "/"):
+            urls.append(event.thumbnail_url)
+        for url in urls:
+            self.remove_file(url)
+
+    def prune_orphans(self, referenced: set) -> tuple[int, int]:
+        """
+        Deletes files in RENDITION_DIR that no event references (deleted events,
+        replaced posters, interrupted .part files). `referenced` holds upload URLs.
+        Returns (files removed, bytes freed).
+        """
+        if not os.path.isdir(RENDITION_DIR):
+            return 0, 0
+        keep = {url.lstrip("/") for url in referenced if url}
+        removed, freed = 0, 0
+        for name in os.listdir(RENDITION_DIR):
+            path = os.path.join(RENDITION_DIR, name)
+            if path in keep or not os.path.isfile(path):
+                continue
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                removed += 1
+                freed += size
+            except Exception as e:
+                logger.error(f"Error deleting rendition {path}: {e}")
+        return removed, freed
+
+transcode_service = TranscodeService()
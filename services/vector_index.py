@@ -0,0 +1,214 @@
+import os
+import json
+import math
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+try:
+    import fcntl
+except ImportError:
+    fcntl = None # Windows: only in-process locking
+from services.config import (
+    RAG_ANN_MIN_ROWS, RAG_ANN_INDEX_TYPE, RAG_ANN_OPTIMIZE_EVERY,
+    RAG_ANN_REBUILD_GROWTH, RAG_ANN_NPROBES, RAG_ANN_REFINE_FACTOR
+)
+from services.logger import get_logger
+
+logger = get_logger("vector_index")
+
+METRIC = "L2" # Same metric as the flat scan, so scores don't shift when the index appears
+# Columns used by query prefilters (date ranges, places, "video")
+SCALAR_INDEXES = [("date", "BTREE"), ("location", "BTREE"), ("media_type", "BITMAP")]
+
+class VectorIndexManager:
+    """
+    Lifecycle of the ANN indexes on the LanceDB memory tables.
+
+    - No index below RAG_ANN_MIN_ROWS (flat scan is exact and fast enough).
+    - First build once a table crosses the threshold.
+    - Every RAG_ANN_OPTIMIZE_EVERY inserts: optimize (compact fragments, add new rows to the index).
+    - Full rebuild once the table has grown RAG_ANN_REBUILD_GROWTH since the last build,
+      since IVF partitions/PQ codebooks are trained on the data present at build time.
+    - Scalar indexes on the prefilter columns (date, location, media_type).
+
+    Per-table maintenance counters are kept in lancedb_data/index_state.json (shared
+    by the web process, the Huey worker and the CLI); whether a table is indexed is
+    read from LanceDB.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._maintenance_lock = threading.Lock()
+
+    def _state_path(self) -> str:
+        from services.rag import LANCEDB_PATH
+        return os.path.join(LANCEDB_PATH, "index_state.json")
+
+    @contextmanager
+    def _state(self, write: bool = False):
+        """
+        Yields the index state freshly read from disk. The web process, the Huey
+        worker and `manage.py rag-optimize` all update this file, so every
+        read-modify-write holds an exclusive file lock and re-reads first.
+        """
+        path = self._state_path()
+        with self._lock, open(path + ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(path) as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = {}
+                yield state
+                if write:
+                    tmp_path = path + ".tmp"
+                    with open(tmp_path, "w") as f:
+                        json.dump(state, f, indent=2)
+                    os.replace(tmp_path, path)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _table_state(state: dict, table) -> dict:
+        return state.setdefault(table.name, {"indexed_rows": 0, "inserts_since_optimize": 0})
+
+    def is_indexed(self, table) -> bool:
+        """
+        Asks LanceDB itself, so indexes built by another process are seen immediately.
+        """
+        try:
+            indices = table.list_indices()
+        except AttributeError:
+            # Older LanceDB without list_indices: fall back to the shared state file
+            with self._state() as state:
+                return self._table_state(state, table).get("indexed_rows", 0) > 0
+        for index in indices:
+            columns = index.get("columns") if isinstance(index, dict) else getattr(index, "columns", None)
+            if "vector" in (columns or []):
+                return True
+        return False
+
+    def note_writes(self, table, count: int):
+        """
+        Called after every upsert. Schedules maintenance in the background when due,
+        so indexing a batch never waits on an index build.
+        """
+        with self._state(write=True) as shared:
+            state = self._table_state(shared, table)
+            state["inserts_since_optimize"] = state.get("inserts_since_optimize", 0) + count
+            due = state["inserts_since_optimize"] >= RAG_ANN_OPTIMIZE_EVERY or (
+                state.get("indexed_rows", 0) == 0 and state["inserts_since_optimize"] >= RAG_ANN_MIN_ROWS
+            )
+
+        if due and not self._maintenance_lock.locked():
+            threading.Thread(target=self.maintain, args=(table,), name=f"ann-{table.name}", daemon=True).start()
+
+    def _index_params(self, table, rows: int) -> dict:
+        dim = table.schema.field("vector").type.list_size
+        # ~sqrt(N) partitions; PQ with 16-d sub-vectors (1024 -> 64, 768 -> 48)
+        num_partitions = max(1, min(int(math.sqrt(rows)), rows // 256 or 1))
+        num_sub_vectors = max(1, dim // 16)
+        return {
+            "metric": METRIC,
+            "vector_column_name": "vector",
+            "num_partitions": num_partitions,
+            "num_sub_vectors": num_sub_vectors,
+            "replace": True,
+        }
+
+    def _build(self, table, rows: int):
+        params = self._index_params(table, rows)
+        logger.info(f"🏗️ Building {RAG_ANN_INDEX_TYPE} index on {table.name} ({rows} rows, {params['num_partitions']} partitions)...")
+        try:
+            table.create_index(index_type=RAG_ANN_INDEX_TYPE, **params)
+        except TypeError:
+            # Older LanceDB without index_type: IVF_PQ only
+            table.create_index(**params)
+
+    def _optimize(self, table):
+        try:
+            table.optimize() # Compacts fragments, prunes old versions, folds new rows into indexes
+        except AttributeError:
+            table.compact_files()
+            table.cleanup_old_versions()
+
+    def maintain(self, table, force: bool = False) -> str:
+        """
+        Brings one table's index up to date. Returns the action taken:
+        "skipped", "optimized", "built" or "rebuilt".
+        """
+        if not self._maintenance_lock.acquire(blocking=force):
+            return "skipped"
+        try:
+            rows = table.count_rows()
+            with self._state() as shared:
+                state = dict(self._table_state(shared, table))
+            # Another process may have built the index without our state knowing
+            indexed_rows = state.get("indexed_rows", 0) or (rows if self.is_indexed(table) else 0)
+
+            if rows and (force or not state.get("scalar_indexes")):
+                self._ensure_scalar_indexes(table)
+                with self._state(write=True) as shared:
+                    self._table_state(shared, table)["scalar_indexes"] = True
+
+            if rows < RAG_ANN_MIN_ROWS:
+                self._optimize(table)
+                action = "optimized"
+            elif not indexed_rows:
+                self._build(table, rows)
+                action = "built"
+            elif rows >= indexed_rows * (1 + RAG_ANN_REBUILD_GROWTH) or force:
+                self._optimize(table)
+                self._build(table, rows)
+                action = "rebuilt"
+            else:
+                self._optimize(table)
+                action = "optimized"
+
+            with self._state(write=True) as shared:
+                live = self._table_state(shared, table)
+                live["inserts_since_optimize"] = 0
+                if action in ("built", "rebuilt"):
+                    live["indexed_rows"] = rows
+                    live["built_at"] = datetime.utcnow().isoformat()
+                live["optimized_at"] = datetime.utcnow().isoformat()
+
+            logger.info(f"✅ Vector index {table.name}: {action} ({rows} rows)")
+            return action
+        except Exception as e:
+            logger.error(f"❌ Vector index maintenance failed for {table.name}: {e}")
+            return "skipped"
+        finally:
+            self._maintenance_lock.release()
+
+    def _ensure_scalar_indexes(self, table):
+        """
+        Scalar indexes on the prefilter columns, so `where` clauses prune rows
+        before vector scoring instead of scanning every row.
+        """
+        for column, index_type in SCALAR_INDEXES:
+            try:
+                table.create_scalar_index(column, index_type=index_type, replace=True)
+            except TypeError:
+                table.create_scalar_index(column, replace=True) # Older LanceDB: BTREE only
+        logger.info(f"🗂️ Scalar indexes on {table.name}: {', '.join(c for c, _ in SCALAR_INDEXES)}")
+
+    def search(self, table, vector, limit: int, nprobes: int = None, refine_factor: int = None, where: str = None):
+        """
+        Vector query with the configured ANN tuning applied when the table is indexed.
+        `where` is applied as a prefilter (rows are filtered before the nearest-neighbour search).
+        """
+        query = table.search(vector)
+        if where:
+            query = query.where(where, prefilter=True)
+        if self.is_indexed(table):
+            query = query.nprobes(nprobes or RAG_ANN_NPROBES)
+            refine = RAG_ANN_REFINE_FACTOR if refine_factor is None else refine_factor
+            if refine:
+                query = query.refine_factor(refine)
+        return query.limit(limit)
+
+# Singleton
+vector_index = VectorIndexManager()
@@ -0,0 +1,113 @@
+import os
+import cv2
+from PIL import Image
+from services.config import VIDEO_SAMPLE_FPS, VIDEO_SCENE_THRESHOLD, VIDEO_MAX_KEYFRAMES
+from services.logger import get_logger
+
+logger = get_logger("video")
+
+FRAME_MAX_EDGE = 768 # Frames are kept in memory at this size (enough for every vision provider)
+
+class Keyframe:
+    def __init__(self, timestamp: float, image: Image.Image, score: float):
+        self.timestamp = timestamp # seconds
+        self.image = image # RGB PIL image
+        self.score = score # scene-change strength vs. the previous sample (1.0 = first frame)
+
+    @property
+    def label(self) -> str:
+        minutes, seconds = divmod(int(self.timestamp), 60)
+        return f"{minutes}:{seconds:02d}"
+
+def _histogram(frame):
+    small = cv2.resize(frame, (160, 90))
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [32, 32], [0, 180, 0, 256])
+    return cv2.normalize(hist, hist).flatten()
+
+def _to_pil(frame) -> Image.Image:
+    image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    image.thumbnail((FRAME_MAX_EDGE, FRAME_MAX_EDGE), Image.LANCZOS)
+    return image
+
+def extract_keyframes(video_path: str, max_frames: int = VIDEO_MAX_KEYFRAMES,
+                      sample_fps: float = VIDEO_SAMPLE_FPS,
+                      threshold: float = VIDEO_SCENE_THRESHOLD) -> list[Keyframe]:
+    """
+    Picks representative frames in ONE sequential decode pass (no seeking,
+    which is slow on long-GOP MP4s). Samples `sample_fps` frames per second,
+    scores each against the previous sample by colour-histogram distance and
+    keeps the strongest scene changes. Static clips fall back to first/middle/last.
+    Returns keyframes in time order, as in-memory PIL images.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logger.error(f"Could not open video file: {os.path.basename(video_path)}")
+        return []
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    step = max(1, round(fps / sample_fps))
+
+    candidates = [] # Keyframe, bounded to a few times max_frames
+    middle = last = None
+    prev_hist = None
+    index = 0
+    try:
+        while cap.grab(): # grab() demuxes/decodes without the colour conversion cost of read()
+            if index % step == 0:
+                ok, frame = cap.retrieve()
+                if ok:
+                    hist = _histogram(frame)
+                    score = 1.0 if prev_hist is None else float(
+                        cv2.compareHist(prev_hist, hist, cv2.HISTCMP_BHATTACHARYYA)
+                    )
+                    prev_hist = hist
+                    timestamp = index / fps
+
+                    if score >= threshold:
+                        candidates.append(Keyframe(timestamp, _to_pil(frame), score))
+                        if len(candidates) > max_frames * 3:
+                            # Drop the weakest cut (never the opening frame)
+                            weakest = min(candidates[1:], key=lambda k: k.score)
+                            candidates.remove(weakest)
+                    if middle is None and total and index >= total // 2:
+                        middle = (timestamp, frame)
+                    last = (timestamp, frame)
+            index += 1
+    finally:
+        cap.release()
+
+    if not candidates and last is None:
+        logger.warning(f"Video has no decodable frames: {os.path.basename(video_path)}")
+        return []
+
+    # Few or no cuts: make sure the middle and the end are represented
+    if len(candidates) < 3:
+        seen = {round(k.timestamp, 1) for k in candidates}
+        for sample in (middle, last):
+            if sample and round(sample[0], 1) not in seen:
+                candidates.append(Keyframe(sample[0], _to_pil(sample[1]), 0.0))
+                seen.add(round(sample[0], 1))
+
+    keyframes = sorted(candidates, key=lambda k: k.score, reverse=True)[:max_frames]
+    keyframes.sort(key=lambda k: k.timestamp)
+    logger.info(f"🎞️ {os.path.basename(video_path)}: {index} frames decoded, {len(keyframes)} keyframes at {[k.label for k in keyframes]}")
+    return keyframes
+
+def contact_sheet(keyframes: list[Keyframe], cell_width: int = 512) -> Image.Image:
+    """
+    Tiles keyframes (time order, left-to-right, top-to-bottom) into one image
+    for providers that accept a single image per request.
+    """
+    cols = 2 if len(keyframes) <= 4 else 3
+    rows = (len(keyframes) + cols - 1) // cols
+    cell_height = max(
+        int(cell_width * k.image.height / k.image.width) for k in keyframes
+    )
+    sheet = Image.new("RGB", (cols * cell_width, rows * cell_height), "black")
+    for i, keyframe in enumerate(keyframes):
+        frame = keyframe.image.copy()
+        frame.thumbnail((cell_width, cell_height), Image.LANCZOS)
+        sheet.paste(frame, ((i % cols) * cell_width, (i // cols) * cell_height))
+    return sheet
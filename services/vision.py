@@ -1,9 +1,14 @@
 
+import os
+import time
 from services.config import config
 from services.logger import get_logger
 
 logger = get_logger("vision")
 
+# Gemini Free Tier is ~15 RPM: bulk captioning waits this long after each real API call
+CAPTION_API_INTERVAL = 5
+
 class VisionService:
     def analyze_image(self, image_path: str) -> list[str]:
         """
@@ -29,51 +34,20 @@ class VisionService:
         if provider == "gemini":
             from services.gemini import gemini_service
             try:
-                # Gemini Analysis
-                tags = gemini_service.analyze_image(image_path)
-                summary = gemini_service.generate_caption(image_path, names)
-                
-                # Heuristic Mood Extraction
-                detected_mood = None
-                mood_keywords = ["Joyful", "Melancholic", "Happy", "Sad", "Surprised", "Calm", "Dynamic", "Warm", "Cold"]
-                
-                final_tags = []
-                for t in tags:
-                    t_clean = t.replace("Mood:", "").strip()
-                    for mk in mood_keywords:
-                       if mk.lower() in t_clean.lower():
-                           if not detected_mood:
-                               detected_mood = t_clean
-                    final_tags.append(t_clean)
-                
-                return {
-                    "tags": final_tags,
-                    "summary": summary,
-                    "mood": detected_mood
-                }
+                return self._analyze_scene_api(gemini_service, image_path, names)
             except Exception as e:
                 logger.warning(f"⚠️ Gemini Failed ({e}). Attempting Failover to Groq...")
                 # FAILOVER TO GROQ
                 try:
                     from services.groq import groq_service
-                    tags = groq_service.analyze_image(image_path)
-                    summary = groq_service.generate_caption(image_path, names)
-                    return {
-                        "tags": tags,
-                        "summary": summary,
-                        "mood": None # Groq mood extraction logic similar to Gemini needed? 
-                                     # Actually Groq prompt in groq.py asks for MOOD too.
-                                     # But for safety, return basic for now.
-                    }
+                    return self._analyze_scene_api(groq_service, image_path, names)
                 except Exception as e2:
                     logger.error(f"❌ Groq Failover Failed: {e2}")
                     return {"tags": [], "summary": None, "mood": None}
 
         elif provider == "groq":
              from services.groq import groq_service
-             tags = groq_service.analyze_image(image_path)
-             summary = groq_service.generate_caption(image_path, names)
-             return { "tags": tags, "summary": summary, "mood": None }
+             return self._analyze_scene_api(groq_service, image_path, names)
 
         else:
             # Local (Qwen)
@@ -89,22 +63,127 @@ class VisionService:
                 "ocr": result.get("ocr", "")
             }
 
-    def generate_caption(self, image_path: str, names: list[str] = None, model_name: str = None) -> str:
+    def analyze_video(self, video_path: str, names: list[str] = None) -> dict:
         """
-        Routes caption generation to the active provider.
+        Picks scene-change keyframes in one decode pass and analyzes them together:
+        one multi-image request (Gemini), one contact-sheet request (Groq) or
+        batched local inference (Qwen).
         """
+        from services.video import extract_keyframes
+
+        logger.info(f"🎥 Analyzing Video: {os.path.basename(video_path)}")
+        keyframes = extract_keyframes(video_path)
+        if not keyframes:
+            return {"tags": [], "summary": "Error: Could not open video.", "mood": None}
+
         provider = config.get("ai_provider")
-        
-        caption = ""
-        if provider == "gemini":
+        if provider in ("gemini", "groq"):
             from services.gemini import gemini_service
+            from services.groq import groq_service
+            services = [gemini_service, groq_service] if provider == "gemini" else [groq_service]
+            for service in services:
+                try:
+                    result = service.analyze_video_frames(keyframes, names)
+                    if result:
+                        return result
+                except Exception as e:
+                    logger.warning(f"⚠️ Video analysis failed on {service.vision_model_id()} ({e}).")
+            logger.error("❌ Video analysis failed on all API providers.")
+            return {"tags": [], "summary": None, "mood": None}
+
+        from services.analyzer import analyzer
+        return analyzer.analyze_video_frames(keyframes, names)
+
+    def _analyze_scene_api(self, service, image_path: str, names: list[str] = None) -> dict:
+        """
+        One combined JSON request (tags + caption + Korean + mood + OCR) per photo.
+        Falls back to the legacy separate tag and caption requests if the
+        provider returns something that isn't usable JSON.
+        """
+        from services.vision_cache import vision_cache
+        from utils.scene import SCENE_PROMPT_VERSION
+        result = vision_cache.get_or_compute(
+            "scene", image_path, names, SCENE_PROMPT_VERSION, service.vision_model_id(),
+            lambda: service.analyze_scene(image_path, names)
+        )
+        if result:
+            return result
+
+        logger.warning("⚠️ Combined scene analysis unavailable. Using separate tag + caption calls...")
+        tags = service.analyze_image(image_path)
+        summary = service.generate_caption(image_path, names)
+        
+        # Heuristic Mood Extraction
+        detected_mood = None
+        mood_keywords = ["Joyful", "Melancholic", "Happy", "Sad", "Surprised", "Calm", "Dynamic", "Warm", "Cold"]
+        
+        final_tags = []
+        for t in tags:
+            t_clean = t.replace("Mood:", "").strip()
+            for mk in mood_keywords:
+               if mk.lower() in t_clean.lower():
+                   if not detected_mood:
+                       detected_mood = t_clean
+            final_tags.append(t_clean)
+        
+        return {
+            "tags": final_tags,
+            "summary": summary,
+            "mood": detected_mood
+        }
+
+    def caption_provider(self) -> str:
+        """
+        Who actually writes captions: "gemini", or "local" Qwen for every other
+        provider (Groq has no captioning path).
+        """
+        return "gemini" if config.get("ai_provider") == "gemini" else "local"
+
+    def _gemini_caption(self, image_path: str, names: list[str] = None, model_name: str = None,
+                        throttle: bool = False) -> str:
+        from services.gemini import gemini_service
+        from services.vision_cache import vision_cache
+
+        def compute():
             caption = gemini_service.generate_caption(image_path, names, model_name=model_name)
-        else:
-             # Local (Florence-2)
+            if throttle:
+                time.sleep(CAPTION_API_INTERVAL) # Only real calls count; cache hits don't wait
+            return caption
+
+        return vision_cache.get_or_compute(
+            "caption", image_path, names, gemini_service.CAPTION_PROMPT_VERSION,
+            gemini_service.vision_model_id(model_name), compute
+        )
+
+    def generate_caption(self, image_path: str, names: list[str] = None, model_name: str = None) -> str:
+        """
+        Routes caption generation to the active provider.
+        """
+        if self.caption_provider() == "gemini":
+            return self._gemini_caption(image_path, names, model_name=model_name)
+
+        # Local (Qwen) - cached inside the analyzer
+        from services.analyzer import analyzer
+        return analyzer.generate_caption(image_path, names)
+
+    def generate_captions_batch(self, items: list, model_name: str = None) -> list:
+        """
+        Captions [(image_path, names), ...]; returns captions aligned with `items`.
+        Local Qwen runs them as batched generate() calls; Gemini goes one by one,
+        throttled after each uncached request.
+        """
+        if self.caption_provider() == "local":
             from services.analyzer import analyzer
-            caption = analyzer.generate_caption(image_path, names)
+            return analyzer.generate_captions_batch(items)
 
-        return caption
+        captions = []
+        for image_path, names in items:
+            try:
+                captions.append(self._gemini_caption(image_path, names, model_name=model_name, throttle=True))
+            except Exception as e:
+                logger.error(f"Caption failed for {image_path}: {e}")
+                captions.append(None)
+        return captions
 
 # Singleton Facade
 vision_service = VisionService()
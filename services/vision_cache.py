@@ -0,0 +1,84 @@
+import json
+import hashlib
+from database import SessionLocal
+import models
+from services.logger import get_logger
+from utils.image import file_sha256
+
+logger = get_logger("vision_cache")
+
+def _normalize_names(names) -> list[str]:
+    return sorted({n.strip() for n in names or [] if n and n.strip()})
+
+def cache_key(kind: str, file_hash: str, names, prompt_version: str, provider_model: str) -> str:
+    payload = json.dumps(
+        [kind, file_hash, _normalize_names(names), prompt_version, provider_model],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class VisionCacheService:
+    """
+    Persistent cache of vision outputs keyed by
+    (file hash, sorted names, prompt version, provider/model).
+    Bump a prompt's version constant whenever its template changes.
+    """
+    def get(self, kind: str, file_hash: str, names, prompt_version: str, provider_model: str):
+        db = SessionLocal()
+        try:
+            row = db.query(models.VisionCache).filter(
+                models.VisionCache.cache_key == cache_key(kind, file_hash, names, prompt_version, provider_model)
+            ).first()
+            return json.loads(row.result) if row else None
+        except Exception as e:
+            logger.warning(f"⚠️ Vision cache read failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def put(self, kind: str, file_hash: str, names, prompt_version: str, provider_model: str, result):
+        db = SessionLocal()
+        try:
+            db.merge(models.VisionCache(
+                cache_key=cache_key(kind, file_hash, names, prompt_version, provider_model),
+                file_hash=file_hash,
+                kind=kind,
+                names=json.dumps(_normalize_names(names), ensure_ascii=False),
+                prompt_version=prompt_version,
+                provider_model=provider_model,
+                result=json.dumps(result, ensure_ascii=False)
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"⚠️ Vision cache write failed: {e}")
+        finally:
+            db.close()
+
+    def file_hash(self, image_path: str):
+        try:
+            return file_sha256(image_path)
+        except OSError as e:
+            logger.warning(f"⚠️ Vision cache disabled for {image_path}: {e}")
+            return None
+
+    def get_or_compute(self, kind: str, image_path: str, names, prompt_version: str, provider_model: str,
+                       compute, refresh: bool = False, cacheable=bool):
+        """
+        Returns the cached result, or calls `compute()` and stores its result if `cacheable(result)`.
+        `refresh=True` skips the lookup (e.g. repairing a bad caption) but still stores the new answer.
+        """
+        digest = self.file_hash(image_path)
+        if digest and not refresh:
+            cached = self.get(kind, digest, names, prompt_version, provider_model)
+            if cached is not None:
+                logger.info(f"🗃️ Vision cache hit ({kind}, {provider_model})")
+                return cached
+
+        result = compute()
+        if digest and cacheable(result):
+            self.put(kind, digest, names, prompt_version, provider_model, result)
+        return result
+
+# Singleton
+vision_cache = VisionCacheService()
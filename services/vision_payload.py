@@ -0,0 +1,190 @@
+import os
+import io
+import base64
+import mimetypes
+import threading
+from PIL import Image, ImageOps
+from services.config import VISION_GEMINI_MAX_EDGE, VISION_GROQ_MAX_EDGE, VISION_JPEG_QUALITY, VISION_PAYLOAD_CACHE_MB
+from services.logger import get_logger
+from utils.image import file_sha256
+
+logger = get_logger("vision_payload")
+
+CACHE_DIR = "data/vision_payloads"
+
+# Largest edge each provider actually uses. Gemini tiles images into 768px
+# crops, Llama 3.2 Vision (Groq) caps input at 1120x1120; anything bigger is
+# bandwidth spent only to be downscaled on the server.
+PROVIDER_MAX_EDGE = {
+    "gemini": VISION_GEMINI_MAX_EDGE,
+    "groq": VISION_GROQ_MAX_EDGE,
+}
+
+class VisionPayloadService:
+    """
+    Prepares photos for cloud vision calls: EXIF-rotated, downscaled to the
+    provider's effective input size and re-encoded as JPEG.
+    Prepared bytes are cached on disk per file hash, so tagging, captioning
+    and retries of the same photo encode it once. The cache is kept under
+    max_bytes by dropping the least recently used files (mtime, touched on hit).
+    """
+    def __init__(self, cache_dir: str = CACHE_DIR, quality: int = VISION_JPEG_QUALITY,
+                 max_bytes: int = VISION_PAYLOAD_CACHE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.quality = quality
+        self.max_bytes = max_bytes
+        self._hashes = {} # (path, mtime, size) -> sha256, avoids re-hashing within a process
+        self._cache_bytes = None # Running estimate of the cache size, scanned on first write
+        self._lock = threading.Lock()
+
+    def _hash(self, image_path: str) -> str:
+        stat = os.stat(image_path)
+        key = (os.path.abspath(image_path), stat.st_mtime, stat.st_size)
+        with self._lock:
+            digest = self._hashes.get(key)
+        if digest is None:
+            digest = file_sha256(image_path)
+            with self._lock:
+                self._hashes[key] = digest
+        return digest
+
+    def encode(self, image: Image.Image, max_edge: int) -> bytes:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=self.quality, optimize=True)
+        return buffer.getvalue()
+
+    def prepare(self, image_path: str, provider: str) -> tuple[bytes, str]:
+        """
+        Returns (bytes, mime_type) to upload for `provider`.
+        Falls back to the original file if it can't be decoded.
+        """
+        max_edge = PROVIDER_MAX_EDGE.get(provider, VISION_GEMINI_MAX_EDGE)
+        try:
+            digest = self._hash(image_path)
+            cache_path = os.path.join(self.cache_dir, f"{digest}_{max_edge}_q{self.quality}.jpg")
+            if os.path.exists(cache_path):
+                with open(cache_path, "rb") as f:
+                    data = f.read()
+                try:
+                    os.utime(cache_path) # Recently used: keep it past the next prune
+                except OSError:
+                    pass
+                return data, "image/jpeg"
+
+            with Image.open(image_path) as img:
+                data = self.encode(img, max_edge)
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, cache_path)
+            self._account(len(data))
+
+            original = os.path.getsize(image_path)
+            logger.info(f"🗜️ Vision payload ({provider}): {original // 1024}KB -> {len(data) // 1024}KB")
+            return data, "image/jpeg"
+        except Exception as e:
+            logger.warning(f"⚠️ Could not prepare {os.path.basename(image_path)} ({e}). Sending original.")
+            with open(image_path, "rb") as f:
+                data = f.read()
+            return data, mimetypes.guess_type(image_path)[0] or "image/jpeg"
+
+    def _cache_files(self) -> list:
+        """
+        [(mtime, size, path), ...] for every cached payload.
+        """
+        files = []
+        if not os.path.isdir(self.cache_dir):
+            return files
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue # Removed by another worker meanwhile
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _account(self, added: int):
+        with self._lock:
+            if self._cache_bytes is None:
+                self._cache_bytes = sum(size for _, size, _ in self._cache_files())
+            else:
+                self._cache_bytes += added
+            over = self._cache_bytes > self.max_bytes
+        if over:
+            self.prune()
+
+    def prune(self, max_bytes: int = None) -> tuple[int, int]:
+        """
+        Deletes least recently used payloads until the cache is 90% of max_bytes.
+        Returns (files removed, bytes freed).
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        files = sorted(self._cache_files())
+        total = sum(size for _, size, _ in files)
+        target = int(limit * 0.9)
+        removed, freed = 0, 0
+        for _, size, path in files:
+            if total - freed <= target:
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                freed += size
+            except OSError:
+                pass
+        with self._lock:
+            self._cache_bytes = total - freed
+        if removed:
+            logger.info(f"🧹 Vision payload cache: removed {removed} files ({freed // 1024}KB)")
+        return removed, freed
+
+    def remove(self, file_hash: str):
+        """
+        Drops every cached payload of one photo (all sizes/qualities), e.g. on delete.
+        """
+        if not file_hash or not os.path.isdir(self.cache_dir):
+            return
+        prefix = f"{file_hash}_"
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(prefix):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+        with self._lock:
+            self._cache_bytes = None # Rescan on the next write
+
+    def gemini_part(self, image_path: str) -> dict:
+        """
+        Inline image part for google.generativeai generate_content().
+        """
+        data, mime_type = self.prepare(image_path, "gemini")
+        return {"mime_type": mime_type, "data": data}
+
+    def data_url(self, image_path: str, provider: str = "groq") -> str:
+        """
+        data: URL for OpenAI-compatible image_url content (Groq).
+        """
+        data, mime_type = self.prepare(image_path, provider)
+        return f"data:{mime_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+    def image_part(self, image: Image.Image, provider: str = "gemini") -> dict:
+        """
+        Inline part for an in-memory image (e.g. a video keyframe); not cached.
+        """
+        data = self.encode(image, PROVIDER_MAX_EDGE.get(provider, VISION_GEMINI_MAX_EDGE))
+        return {"mime_type": "image/jpeg", "data": data}
+
+    def image_data_url(self, image: Image.Image, provider: str = "groq") -> str:
+        data = self.encode(image, PROVIDER_MAX_EDGE.get(provider, VISION_GEMINI_MAX_EDGE))
+        return f"data:image/jpeg;base64,{base64.b64encode(data).decode('utf-8')}"
+
+# Singleton
+vision_payload = VisionPayloadService()
@@ -0,0 +1,266 @@
+import time
+import requests
+from datetime import date, timedelta
+from database import SessionLocal
+import models
+from services.config import WEATHER_GRID_DECIMALS, WEATHER_MAX_GAP_DAYS
+from services.logger import get_logger
+
+logger = get_logger("weather")
+
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+EMPTY_DAY_TTL = 3600 # Seconds an archive day without data is trusted before asking again
+
+def wmo_to_string(code):
+    if code is None: return None
+    # Simplified WMO Table
+    if code == 0: return "Clear Sky ☀️"
+    if code in [1, 2, 3]: return "Partly Cloudy ⛅"
+    if code in [45, 48]: return "Foggy 🌫️"
+    if code in [51, 53, 55]: return "Drizzle 🌧️"
+    if code in [61, 63, 65]: return "Rain 🌧️"
+    if code in [71, 73, 75]: return "Snow ❄️"
+    if code in [80, 81, 82]: return "Rain Showers 🌦️"
+    if code in [95, 96, 99]: return "Thunderstorm ⚡"
+    return "Cloudy ☁️"
+
+def format_weather(code, temp) -> str:
+    condition = wmo_to_string(code)
+    if condition and temp is not None:
+        return f"{condition}, {temp}°C"
+    return condition
+
+class WeatherService:
+    """
+    Historical weather with one archive request per (rounded location, date range).
+    A 7-day trip with 800 photos in one city becomes a single HTTP call.
+    """
+    def __init__(self):
+        # (lat_key, lon_key, date) -> (code, temp)
+        self._memo = {}
+        # (lat_key, lon_key, date) -> monotonic expiry for days the archive had no data for
+        # (it lags a few days behind), so they are retried after EMPTY_DAY_TTL
+        self._empty_until = {}
+
+    def _is_known_empty(self, key) -> bool:
+        expires = self._empty_until.get(key)
+        if expires is None:
+            return False
+        if time.monotonic() >= expires:
+            del self._empty_until[key]
+            return False
+        return True
+
+    def _cell(self, lat: float, lon: float):
+        return (round(lat, WEATHER_GRID_DECIMALS), round(lon, WEATHER_GRID_DECIMALS))
+
+    def _lookup(self, cell, date_str: str):
+        key = (cell[0], cell[1], date_str)
+        if key in self._memo:
+            return self._memo[key]
+        if self._is_known_empty(key):
+            return (None, None)
+
+        db = SessionLocal()
+        try:
+            row = db.query(models.WeatherCache).filter(
+                models.WeatherCache.lat_key == cell[0],
+                models.WeatherCache.lon_key == cell[1],
+                models.WeatherCache.date == date_str
+            ).first()
+            if row is None:
+                return None
+            self._memo[key] = (row.weather_code, row.temperature_max)
+            return self._memo[key]
+        finally:
+            db.close()
+
+    def _cached_dates(self, db, cell, dates: list[str]) -> set[str]:
+        rows = db.query(models.WeatherCache.date).filter(
+            models.WeatherCache.lat_key == cell[0],
+            models.WeatherCache.lon_key == cell[1],
+            models.WeatherCache.date.in_(dates)
+        ).all()
+        found = {d for (d,) in rows}
+        found.update(d for d in dates if (cell[0], cell[1], d) in self._memo or self._is_known_empty((cell[0], cell[1], d)))
+        return found
+
+    def _fetch_range(self, cell, start: date, end: date) -> int:
+        """
+        One archive request for every day in [start, end]. Returns the number of days stored.
+        """
+        params = {
+            "latitude": cell[0],
+            "longitude": cell[1],
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "daily": "weathercode,temperature_2m_max",
+            "timezone": "auto"
+        }
+        try:
+            resp = requests.get(ARCHIVE_URL, params=params, timeout=10)
+            if resp.status_code != 200:
+                logger.warning(f"⚠️ Weather archive returned {resp.status_code} for {cell} {start}..{end}")
+                return 0
+            daily = resp.json().get("daily", {})
+        except Exception as e:
+            logger.warning(f"⚠️ Weather fetch error: {e}")
+            return 0
+
+        days = daily.get("time", [])
+        codes = daily.get("weathercode", [])
+        temps = daily.get("temperature_2m_max", [])
+
+        stored = 0
+        db = SessionLocal()
+        try:
+            for i, day in enumerate(days):
+                code = codes[i] if i < len(codes) else None
+                temp = temps[i] if i < len(temps) else None
+                if code is None and temp is None:
+                    # Archive lags a few days behind; don't persist empty days so they are retried later
+                    self._empty_until[(cell[0], cell[1], day)] = time.monotonic() + EMPTY_DAY_TTL
+                    continue
+                self._memo[(cell[0], cell[1], day)] = (code, temp)
+                db.merge(models.WeatherCache(
+                    lat_key=cell[0], lon_key=cell[1], date=day,
+                    weather_code=code, temperature_max=temp
+                ))
+                stored += 1
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"❌ Failed to store weather range: {e}")
+        finally:
+            db.close()
+
+        logger.info(f"☁️ Weather: {cell} {start}..{end} -> {stored} days cached (1 request)")
+        return stored
+
+    def _split_ranges(self, dates: list[date]) -> list[tuple[date, date]]:
+        """
+        Groups sorted dates into contiguous-ish ranges, splitting on gaps larger than WEATHER_MAX_GAP_DAYS.
+        """
+        ranges = []
+        start = prev = dates[0]
+        for d in dates[1:]:
+            if (d - prev).days > WEATHER_MAX_GAP_DAYS:
+                ranges.append((start, prev))
+                start = d
+            prev = d
+        ranges.append((start, prev))
+        return ranges
+
+    def prefetch(self, points) -> int:
+        """
+        Warms the cache for an iterable of (lat, lon, date_str).
+        Returns the number of archive requests issued.
+        """
+        by_cell = {}
+        for lat, lon, date_str in points:
+            if lat is None or lon is None or not date_str:
+                continue
+            try:
+                day = date.fromisoformat(date_str[:10])
+            except ValueError:
+                continue
+            by_cell.setdefault(self._cell(lat, lon), set()).add(day)
+
+        requests_made = 0
+        db = SessionLocal()
+        try:
+            for cell, days in by_cell.items():
+                date_strs = [d.isoformat() for d in days]
+                cached = self._cached_dates(db, cell, date_strs)
+                pending = sorted(d for d in days if d.isoformat() not in cached)
+                if not pending:
+                    continue
+                for start, end in self._split_ranges(pending):
+                    self._fetch_range(cell, start, end)
+                    requests_made += 1
+        finally:
+            db.close()
+        return requests_made
+
+    def _pending_points_near(self, cell, day: date):
+        """
+        Events in the same grid cell that still lack weather within WEATHER_MAX_GAP_DAYS
+        of `day`, so one request covers them all. Older backlogs are left to enrich_pending.
+        """
+        half = 0.5 * (10 ** -WEATHER_GRID_DECIMALS)
+        window = timedelta(days=WEATHER_MAX_GAP_DAYS)
+        db = SessionLocal()
+        try:
+            return db.query(
+                models.TimelineEvent.latitude,
+                models.TimelineEvent.longitude,
+                models.TimelineEvent.date
+            ).filter(
+                models.TimelineEvent.latitude.between(cell[0] - half, cell[0] + half),
+                models.TimelineEvent.longitude.between(cell[1] - half, cell[1] + half),
+                models.TimelineEvent.weather_info == None,
+                models.TimelineEvent.date >= (day - window).isoformat(),
+                models.TimelineEvent.date < (day + window + timedelta(days=1)).isoformat()
+            ).all()
+        finally:
+            db.close()
+
+    def get_weather(self, lat: float, lon: float, date_str: str) -> str:
+        """
+        Returns the formatted weather for a location/day. On a cache miss the
+        pending dates of that location around the day are fetched in one request.
+        """
+        if not lat or not lon or not date_str:
+            return None
+
+        cell = self._cell(lat, lon)
+        day = date_str[:10]
+        hit = self._lookup(cell, day)
+
+        if hit is None:
+            try:
+                points = list(self._pending_points_near(cell, date.fromisoformat(day)))
+            except Exception as e:
+                logger.warning(f"⚠️ Could not collect pending weather dates: {e}")
+                points = []
+            points.append((lat, lon, day))
+            self.prefetch(points)
+            hit = self._lookup(cell, day)
+
+        if not hit:
+            return None
+        return format_weather(*hit)
+
+    def enrich_pending(self) -> int:
+        """
+        Fills weather_info for every located event without it.
+        Issues one request per location/date range, then assigns from the cache.
+        """
+        db = SessionLocal()
+        try:
+            events = db.query(models.TimelineEvent).filter(
+                models.TimelineEvent.latitude != None,
+                models.TimelineEvent.longitude != None,
+                models.TimelineEvent.date != None,
+                models.TimelineEvent.weather_info == None
+            ).all()
+            if not events:
+                return 0
+
+            requests_made = self.prefetch((e.latitude, e.longitude, e.date) for e in events)
+            logger.info(f"☁️ Weather: {requests_made} archive requests for {len(events)} events")
+
+            updated = 0
+            for event in events:
+                hit = self._lookup(self._cell(event.latitude, event.longitude), event.date[:10])
+                weather = format_weather(*hit) if hit else None
+                if weather:
+                    event.weather_info = weather
+                    updated += 1
+            db.commit()
+            return updated
+        finally:
+            db.close()
+
+# Singleton
+weather_service = WeatherService()
@@ -182,4 +182,20 @@ document.addEventListener('DOMContentLoaded', async () => {
                 });
         });
     }
+
+    // --- 5. Video Sprite Scrubbing (hover) ---
+    // Delegated so "Load More" items work too; the strip is fetched on first hover only.
+    if (galleryGrid) {
+        galleryGrid.addEventListener('mousemove', (e) => {
+            const item = e.target.closest('.masonry-item');
+            const sprite = item && item.querySelector('.video-sprite');
+            if (!sprite) return;
+            if (!sprite.style.backgroundImage) sprite.style.backgroundImage = `url('${sprite.dataset.sprite}')`;
+
+            const frames = parseInt(sprite.dataset.frames || 1);
+            const rect = item.getBoundingClientRect();
+            const frame = Math.min(frames - 1, Math.floor((e.clientX - rect.left) / rect.width * frames));
+            sprite.style.backgroundPosition = `${frames > 1 ? frame / (frames - 1) * 100 : 0}% 0`;
+        });
+    }
 });
@@ -120,7 +120,11 @@ async function openDetailModal(eventId) {
         if (mediaContainer) {
             mediaContainer.innerHTML = '';
             if (data.media_type === 'video') {
-                mediaContainer.innerHTML = `<video src="${data.image_url}" controls autoplay style="width:100%; height:100%"></video>`;
+                // Small screens get the low-bitrate preview; both are range-streamed faststart MP4s
+                const isMobile = window.matchMedia('(max-width: 768px)').matches;
+                const videoSrc = (isMobile && data.preview_url) || data.video_url || data.image_url;
+                const poster = data.poster_url ? `poster="${data.poster_url}"` : '';
+                mediaContainer.innerHTML = `<video src="${videoSrc}" ${poster} controls autoplay playsinline preload="metadata" style="width:100%; height:100%"></video>`;
             } else {
                 mediaContainer.innerHTML = `<img src="${data.image_url}" alt="${data.title || ''}">`;
             }
@@ -0,0 +1,61 @@
+import os
+import sys
+import uuid
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import services.embedding_cache as embedding_cache_module
+from services.embedding_cache import embedding_cache
+
+def test_embedding_cache():
+    print("🧪 Testing Embedding Cache...")
+    # Throwaway SQLite so the test never touches decade_journey.db
+    tmp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir.name, 'test.db')}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    original_session = embedding_cache_module.SessionLocal
+    embedding_cache_module.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    try:
+        model = f"test-model-{uuid.uuid4().hex[:8]}"
+        calls = []
+
+        def fake_embed(texts):
+            calls.append(list(texts))
+            return [[float(len(t)), 0.5, -1.0] for t in texts]
+
+        docs = ["Jeju trip", "Seoul birthday", "Jeju trip"]
+        first = embedding_cache.embed(model, docs, fake_embed)
+        assert calls == [["Jeju trip", "Seoul birthday"]], calls
+        assert first[0] == first[2] == [9.0, 0.5, -1.0]
+        print("✅ Misses embedded once (duplicates collapsed)")
+
+        second = embedding_cache.embed(model, docs, fake_embed)
+        assert len(calls) == 1, "Unchanged documents should not be re-embedded"
+        assert second == first
+        print("✅ Unchanged documents served from cache")
+
+        embedding_cache.embed(model, ["Seoul birthday", "Busan beach"], fake_embed)
+        assert calls[-1] == ["Busan beach"], calls
+        print("✅ Only changed text is embedded")
+
+        # Failed embeddings are not cached
+        result = embedding_cache.embed(model, ["broken"], lambda texts: [None])
+        assert result == [None]
+        embedding_cache.embed(model, ["broken"], fake_embed)
+        assert calls[-1] == ["broken"], calls
+        print("✅ Failed embeddings retried next time")
+    finally:
+        embedding_cache_module.SessionLocal = original_session
+        engine.dispose()
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    test_embedding_cache()
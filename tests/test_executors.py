@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+import asyncio
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.executors import run_db, run_io, iterate_in, LoopLagMonitor
+
+def test_executors():
+    print("🧪 Testing Executor Pools & Loop-Lag Monitor...")
+
+    async def scenario():
+        monitor = LoopLagMonitor(interval=0.05, warn_ms=100)
+        monitor.start()
+        await asyncio.sleep(0.1)
+
+        # Offloaded blocking work must not stall the loop
+        await asyncio.gather(run_db(time.sleep, 0.3), run_io(time.sleep, 0.3))
+        assert monitor.blocked_events == 0, f"Loop blocked while work ran in pools: {monitor.stats()}"
+        print("✅ Pooled work leaves the loop responsive")
+
+        tokens = [t async for t in iterate_in("ai", iter(["안녕", "하세요"]))]
+        assert tokens == ["안녕", "하세요"]
+        print("✅ Blocking iterator consumed from the AI pool")
+
+        # Blocking call directly on the loop must be reported
+        time.sleep(0.3)
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        stats = monitor.stats()
+        assert stats["blocked_events"] >= 1 and stats["max_lag_ms"] >= 200, stats
+        print(f"✅ Blocked loop detected ({stats['max_lag_ms']}ms)")
+
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    test_executors()
@@ -0,0 +1,31 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.geo import geohash_encode, geohash_bounds
+
+def test_geohash():
+    print("🧪 Testing Geohash Bucketing...")
+
+    # Reference value from the geohash spec (Jutland, Denmark)
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    print("✅ Known reference hash matches")
+
+    # Two photos a few hundred meters apart in Jeju share a city-level cell
+    a = geohash_encode(33.4996, 126.5312, 5)
+    b = geohash_encode(33.5012, 126.5290, 5)
+    assert a == b, f"{a} != {b}"
+    print(f"✅ Nearby photos share cell {a}")
+
+    # Seoul is a different cell
+    assert geohash_encode(37.5665, 126.9780, 5) != a
+    print("✅ Distant photos use different cells")
+
+    # Bounds contain the original point
+    min_lat, min_lon, max_lat, max_lon = geohash_bounds(a)
+    assert min_lat <= 33.4996 <= max_lat and min_lon <= 126.5312 <= max_lon
+    print("✅ Cell bounds contain the point")
+
+if __name__ == "__main__":
+    test_geohash()
@@ -0,0 +1,46 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http_range import parse_range, media_url, resolve_upload_path
+
+def test_http_range():
+    print("🧪 Testing Byte-Range Parsing...")
+
+    assert parse_range("bytes=0-", 1000) == (0, 999)
+    assert parse_range("bytes=100-199", 1000) == (100, 199)
+    assert parse_range("bytes=900-5000", 1000) == (900, 999)
+    print("✅ Open, closed and overlong ranges")
+
+    assert parse_range("bytes=-200", 1000) == (800, 999)
+    assert parse_range("bytes=-5000", 1000) == (0, 999)
+    print("✅ Suffix ranges")
+
+    for ignored in [None, "", "items=0-1", "bytes=abc", "bytes=0-1,5-9", "bytes=50-10"]:
+        assert parse_range(ignored, 1000) is None, ignored
+    print("✅ Missing, malformed and multi-range headers send the whole file")
+
+    for unsatisfiable, size in [("bytes=1000-", 1000), ("bytes=-0", 1000), ("bytes=0-", 0)]:
+        try:
+            parse_range(unsatisfiable, size)
+            assert False, f"Should reject {unsatisfiable!r}"
+        except ValueError:
+            pass
+    print("✅ Unsatisfiable ranges raise ValueError (416)")
+
+def test_media_paths():
+    print("🧪 Testing Media URL Mapping...")
+
+    assert media_url("/static/uploads/video/IMG_1_web.mp4") == "/media/video/IMG_1_web.mp4"
+    assert media_url("/static/img/placeholder.png") == "/static/img/placeholder.png"
+    assert media_url(None) is None
+    print("✅ Upload URLs map to /media/")
+
+    assert resolve_upload_path("../../main.py") is None
+    assert resolve_upload_path("video/clip.mp4").endswith(os.path.join("static", "uploads", "video", "clip.mp4"))
+    print("✅ Paths outside static/uploads are refused")
+
+if __name__ == "__main__":
+    test_http_range()
+    test_media_paths()
@@ -0,0 +1,87 @@
+import os
+import sys
+import sqlite3
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.lexical import LexicalIndex
+
+def _doc(event_id, text, location=""):
+    return {"id": str(event_id), "text": text, "date": "2023-07-01", "location": location,
+            "media_type": "photo", "image_url": f"/static/uploads/{event_id}.jpg"}
+
+def test_lexical_index():
+    print("🧪 Testing FTS5 Keyword Index...")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LexicalIndex(os.path.join(tmp, "fts.db"))
+        index.upsert([
+            _doc(1, "Date: 2023-07-01. Location: 제주도. AI Description: 제주도에서 가족과 바다 산책", "제주도"),
+            _doc(2, "Date: 2022-01-03. Location: Seoul. AI Description: Snowy street near Gwanghwamun", "Seoul"),
+            _doc(3, "Date: 2021-05-05. AI Description: Sign reads 'Café Onion Anguk'"),
+        ])
+
+        hits = index.search("제주도 여행", 5)
+        assert [h["id"] for h in hits] == ["1"], hits
+        print("✅ Korean prefix match (제주도 -> 제주도에서)")
+
+        hits = index.search("onion", 5)
+        assert hits and hits[0]["id"] == "3"
+        assert hits[0]["metadata"]["image_url"] == "/static/uploads/3.jpg"
+        print("✅ Rare OCR'd word found without any vector hit")
+
+        # FTS operators in user input are treated as plain words
+        assert index.search('seoul AND NOT "', 5)[0]["id"] == "2"
+        print("✅ Query syntax is escaped")
+
+        index.upsert([_doc(2, "Date: 2022-01-03. Location: Busan", "Busan")])
+        assert index.search("gwanghwamun", 5) == []
+        assert index.count() == 3
+        print("✅ Upsert replaces the old document")
+
+        # Re-upserting existing ids (e.g. a full sync) must not leave duplicates
+        index.upsert([_doc(1, "Date: 2023-07-01. Location: 제주도. AI Description: 제주도 바다", "제주도"),
+                      _doc(3, "Date: 2021-05-05. AI Description: Sign reads 'Café Onion Anguk'")])
+        index.upsert([_doc(1, "Date: 2023-07-01. Location: 제주도. AI Description: 제주도 바다", "제주도")])
+        assert index.count() == 3
+        assert [h["id"] for h in index.search("제주도", 5)] == ["1"]
+        assert len(index.search("onion", 5)) == 1
+        print("✅ Re-upserted ids keep a single row")
+
+        index.delete([1])
+        assert index.search("제주도", 5) == []
+        index.delete()
+        assert index.count() == 0
+        print("✅ Delete by id and clear")
+
+def test_legacy_rows_rekeyed():
+    print("🧪 Testing FTS5 Rowid Migration...")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fts.db")
+        # Older layout: ids only in the UNINDEXED column, with a duplicated id
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE VIRTUAL TABLE memory_fts USING fts5("
+            "id UNINDEXED, text, date UNINDEXED, location UNINDEXED, "
+            "media_type UNINDEXED, image_url UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        conn.executemany(
+            "INSERT INTO memory_fts (id, text, date, location, media_type, image_url) VALUES (?, ?, ?, ?, ?, ?)",
+            [("7", "old snow", "", "", "photo", ""), ("5", "beach", "", "", "photo", ""), ("7", "new snow", "", "", "photo", "")]
+        )
+        conn.commit()
+        conn.close()
+
+        index = LexicalIndex(path)
+        assert index.count() == 2
+        assert [h["text"] for h in index.search("snow", 5)] == ["new snow"]
+        index.delete([5])
+        assert index.count() == 1
+        print("✅ Legacy rows re-keyed by id, newest duplicate kept")
+
+if __name__ == "__main__":
+    test_lexical_index()
+    test_legacy_rows_rekeyed()
@@ -0,0 +1,87 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.model_manager import ModelManager
+
+def _isolated_manager(budget_mb: int) -> ModelManager:
+    """
+    A private registry: the process-wide singleton (and its real models) is left untouched.
+    """
+    manager = object.__new__(ModelManager)
+    manager._init_state()
+    manager.budget_mb = budget_mb
+    return manager
+
+def test_model_manager():
+    print("🧪 Testing Model Registry (LRU + Budget + Pinning)...")
+
+    manager = _isolated_manager(1000)
+    unloaded = []
+    manager.register("test-embedder", 300, lambda: "embedder", pinned=True)
+    manager.register("test-vision", 500, lambda: "vision", unloader=unloaded.append)
+    manager.register("test-faces", 400, lambda: "faces", unloader=unloaded.append)
+
+    assert manager.acquire("test-embedder") == "embedder"
+    assert manager.acquire("test-vision") == "vision"
+    assert manager.acquire("test-vision") == "vision"
+    stats = manager.stats()["models"]["test-vision"]
+    assert stats["loads"] == 1 and stats["hits"] == 1, stats
+    print("✅ Warm model reused (1 load, 1 hit)")
+
+    # 300 + 500 + 400 > 1000: vision is the LRU unpinned model
+    with manager.use("test-faces") as faces:
+        assert faces == "faces"
+        assert unloaded == ["vision"], unloaded
+        assert manager.is_loaded("test-embedder"), "Pinned model must stay"
+        print("✅ LRU unpinned model evicted, pinned kept")
+
+        # Busy models are never evicted
+        assert manager.make_room(900) is False
+        assert manager.is_loaded("test-faces")
+        print("✅ In-use model survives make_room")
+
+    assert manager.make_room(600) is True
+    assert unloaded == ["vision", "faces"] and not manager.is_loaded("test-faces")
+    print("✅ make_room frees idle models for external workloads")
+
+def test_singleton_untouched():
+    print("🧪 Testing Test Isolation...")
+    shared = ModelManager()
+    assert ModelManager() is shared
+    _isolated_manager(1000).register("test-private", 100, lambda: "private")
+    assert not any(name.startswith("test-") for name in shared.stats()["models"]), shared.stats()
+    print("✅ Isolated registries don't leak into the singleton")
+
+def test_acquire_during_eviction():
+    print("🧪 Testing acquire() racing make_room()...")
+    import threading
+
+    manager = _isolated_manager(1000)
+    manager.register("test-racer", 600, lambda: "racer")
+    results = []
+    stop = threading.Event()
+
+    def evict_loop():
+        while not stop.is_set():
+            manager.make_room(600) # Evicts the racer whenever it is idle
+
+    evictor = threading.Thread(target=evict_loop)
+    evictor.start()
+    try:
+        for _ in range(2000):
+            results.append(manager.acquire("test-racer"))
+    finally:
+        stop.set()
+        evictor.join()
+
+    assert all(r == "racer" for r in results), "acquire() returned an evicted (None) model"
+    print("✅ acquire() never hands out None while models are evicted")
+
+if __name__ == "__main__":
+    test_model_manager()
+    test_acquire_during_eviction()
+    test_singleton_untouched()
@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.geocoder import offline_geocoder
+
+GAZETTEER_ROWS = [
+    # geonameid, name, asciiname, alternatenames, lat, lon, class, code, country
+    ["1835848", "Seoul", "Seoul", "", "37.566", "126.9784", "P", "PPLC", "KR"],
+    ["1846266", "Jeju City", "Jeju City", "", "33.50972", "126.52194", "P", "PPLA", "KR"],
+    ["1850147", "Tokyo", "Tokyo", "", "35.6895", "139.69171", "P", "PPLC", "JP"],
+]
+
+def test_offline_geocoder():
+    print("🧪 Testing Offline Reverse Geocoder...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cities.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for row in GAZETTEER_ROWS:
+                f.write("\t".join(row) + "\n")
+        with open(os.path.join(tmp, "countryInfo.txt"), "w", encoding="utf-8") as f:
+            f.write("#ISO\tISO3\tISO-Numeric\tfips\tCountry\n")
+            f.write("KR\tKOR\t410\tKS\tSouth Korea\n")
+
+        # Reset singleton state so the temp gazetteer is loaded
+        offline_geocoder._points = None
+        offline_geocoder._load_failed = False
+        assert offline_geocoder.load(path)
+
+        name, dist = offline_geocoder.lookup(33.4996, 126.5312)
+        assert name == "Jeju City, South Korea", name
+        assert dist < 5, dist
+        print(f"✅ Jeju photo -> {name} ({dist:.2f} km)")
+
+        # Country code is kept when countryInfo has no entry
+        name, _ = offline_geocoder.lookup(35.68, 139.70)
+        assert name == "Tokyo, JP", name
+        print(f"✅ Tokyo photo -> {name}")
+
+        # Middle of the Pacific is low confidence
+        assert offline_geocoder.resolve(0.0, -160.0) is None
+        print("✅ Far-away hit rejected (falls back to Nominatim)")
+
+        offline_geocoder._points = None
+
+if __name__ == "__main__":
+    test_offline_geocoder()
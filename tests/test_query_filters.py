@@ -0,0 +1,63 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services import query_filters
+from services.query_filters import extract_filters
+
+def test_query_filters():
+    print("🧪 Testing Query Filter Extraction...")
+
+    # Seed the vocabulary cache instead of reading the DB
+    query_filters._vocab_cache.set("places", ["South Korea", "Jeju-si", "Seoul", "제주시"])
+    query_filters._vocab_cache.set("people", ["민지", "Alex"])
+
+    f = extract_filters("2019 Jeju")
+    assert f.date_ranges == [("2019", "2020")], f
+    assert f.places == ["Jeju-si"], f
+    assert f.to_lance_where() == "((date >= '2019' AND date < '2020')) AND (location LIKE '%Jeju-si%')"
+    print("✅ Year + place prefix")
+
+    f = extract_filters("2018~2020년 제주시에서 민지랑 찍은 영상")
+    assert f.date_ranges == [("2018", "2021")], f
+    assert f.places == ["제주시"] and f.people == ["민지"] and f.media_type == "video", f
+    clause, params = f.to_sqlite()
+    assert params == ["2018", "2021", "%제주시%", "%민지%", "video"], params
+    print("✅ Korean range, place, person, video")
+
+    f = extract_filters("2021년 7월 바다")
+    assert f.date_ranges == [("2021-07", "2021-08")], f
+    assert extract_filters("2020-12 snow").date_ranges == [("2020-12", "2021-01")]
+    print("✅ Year-month")
+
+    f = extract_filters("happy moments at the beach")
+    assert not f and f.to_lance_where() is None
+    print("✅ No filters for plain semantic queries")
+
+    query_filters._vocab_cache.set("places", ["Busan", "서울", "US"])
+    query_filters._vocab_cache.set("people", [])
+    assert extract_filters("show us the beach").places == []
+    assert extract_filters("busanese food").places == []
+    assert extract_filters("road trip in the US").places == ["US"]
+    assert extract_filters("서울에서 찍은 사진").places == ["서울"]
+    print("✅ Places match whole words; short codes only as standalone tokens")
+
+    query_filters._vocab_cache.set("places", [])
+    query_filters._vocab_cache.set("people", ["Ann", "Tom", "Al", "민지"])
+    assert extract_filters("our anniversary dinner").people == []
+    assert extract_filters("plans for tomorrow").people == []
+    assert extract_filters("almost sunset").people == []
+    assert extract_filters("Tom and Ann at the lake").people == ["Ann", "Tom"]
+    assert extract_filters("skiing with Al").people == ["Al"]
+    assert extract_filters("민지랑 바다").people == ["민지"]
+    print("✅ People match whole words, not inside longer words")
+
+    query_filters._vocab_cache.set("people", ["O'Brien"])
+    assert extract_filters("o'brien birthday").to_lance_where() == "text LIKE '%O''Brien%'"
+    print("✅ Quotes escaped")
+
+if __name__ == "__main__":
+    test_query_filters()
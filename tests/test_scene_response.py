@@ -0,0 +1,38 @@
+import os
+import sys
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scene import build_scene_prompt, parse_scene_response
+
+def test_scene_response():
+    print("🧪 Testing Combined Scene JSON Parsing...")
+
+    prompt = build_scene_prompt(["지민", "Alex"])
+    assert "지민, Alex" in prompt and '"caption_ko"' in prompt
+    print("✅ Prompt carries names and JSON keys")
+
+    result = parse_scene_response(
+        '```json\n{"tags": ["Beach", "Happy"], "tags_ko": ["해변", "행복"], '
+        '"caption": "Jimin laughs by the sea.", "caption_ko": "지민이 바닷가에서 웃고 있다.", '
+        '"mood": "Joyful", "ocr": ""}\n```'
+    )
+    assert result["tags"] == ["Beach", "Happy", "해변", "행복"], result["tags"]
+    assert result["summary"] == "Jimin laughs by the sea.\n🇰🇷 지민이 바닷가에서 웃고 있다."
+    assert result["mood"] == "Joyful" and result["ocr"] == ""
+    print("✅ Legacy result shape (mixed tags, 🇰🇷 line)")
+
+    result = parse_scene_response('{"tags": "sky, city", "caption": "A skyline.", "mood": null}')
+    assert result["tags"] == ["sky", "city"] and result["mood"] is None
+    print("✅ Tolerates comma strings and null mood")
+
+    for bad in ["", "Tags: beach, sea", '{"tags": ["x"]}']:
+        try:
+            parse_scene_response(bad)
+            assert False, f"Should reject {bad!r}"
+        except ValueError:
+            pass
+    print("✅ Unusable answers raise ValueError (caller falls back)")
+
+if __name__ == "__main__":
+    test_scene_response()
@@ -0,0 +1,46 @@
+import os
+import sys
+import stat
+import time
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.transcode import TranscodeService, MIN_TIMEOUT_SECONDS
+from services.config import VIDEO_TRANSCODE_MAX_SECONDS, VIDEO_TRANSCODE_SPEED_FACTOR
+
+def test_timeout_budget():
+    print("🧪 Testing Transcode Timeout Budget...")
+    assert TranscodeService.timeout_for(5) == MIN_TIMEOUT_SECONDS
+    assert TranscodeService.timeout_for(100) == min(VIDEO_TRANSCODE_MAX_SECONDS, 100 * VIDEO_TRANSCODE_SPEED_FACTOR)
+    assert TranscodeService.timeout_for(10 * 3600) == VIDEO_TRANSCODE_MAX_SECONDS
+    assert TranscodeService.timeout_for(0.0) == VIDEO_TRANSCODE_MAX_SECONDS
+    print("✅ Scaled to the source length, capped, cap when unknown")
+
+def test_hung_ffmpeg_killed():
+    print("🧪 Testing Hung ffmpeg...")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stand-in ffmpeg that writes a partial file and never finishes
+        fake = os.path.join(tmp, "ffmpeg")
+        with open(fake, "w") as f:
+            f.write('#!/bin/sh\nfor last; do :; done\ntouch "$last"\nsleep 30\n')
+        os.chmod(fake, os.stat(fake).st_mode | stat.S_IEXEC)
+
+        service = TranscodeService()
+        service.ffmpeg = fake
+        output = os.path.join(tmp, "clip_web.mp4")
+        started = time.monotonic()
+        try:
+            service._run(["-i", "clip.mov"], output, timeout=1)
+            assert False, "Expected a timeout"
+        except RuntimeError as e:
+            assert "timed out" in str(e), e
+        assert time.monotonic() - started < 10
+        assert os.listdir(tmp) == ["ffmpeg"], os.listdir(tmp)
+        print("✅ Killed after the timeout, partial output removed")
+
+if __name__ == "__main__":
+    test_timeout_budget()
+    test_hung_ffmpeg_killed()
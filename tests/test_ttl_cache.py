@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.cache import TTLCache
+
+def test_ttl_cache():
+    print("🧪 Testing LRU + TTL Cache...")
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(("제주도", 5, "local", "1"), ["hit"])
+    assert cache.get(("제주도", 5, "local", "1")) == ["hit"]
+    assert cache.get(("제주도", 5, "local", "2")) is None, "New index version must miss"
+    print("✅ Keyed by index version")
+
+    cache.set("a", 1)
+    cache.set("b", 2) # evicts the Jeju entry (least recently used)
+    cache.get("a")
+    cache.set("c", 3) # evicts "b", since "a" was just used
+    assert cache.get("a") == 1 and cache.get("b") is None and cache.get("c") == 3
+    print("✅ LRU eviction")
+
+    short = TTLCache(maxsize=10, ttl=0.05)
+    short.set("q", [0.1, 0.2])
+    time.sleep(0.1)
+    assert short.get("q") is None
+    print("✅ Entries expire after TTL")
+
+    assert cache.stats()["hits"] >= 3
+    print("✅ Hit/miss stats")
+
+if __name__ == "__main__":
+    test_ttl_cache()
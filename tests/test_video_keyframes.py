@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import numpy as np
+import cv2
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.video import extract_keyframes, contact_sheet
+
+def _write_video(path, colors, seconds_each=3, fps=10):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (320, 180))
+    for color in colors:
+        for _ in range(seconds_each * fps):
+            frame = np.full((180, 320, 3), color, dtype=np.uint8)
+            writer.write(frame)
+    writer.release()
+
+def test_video_keyframes():
+    print("🧪 Testing Scene-Change Keyframe Selection...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video = os.path.join(tmp, "cuts.mp4")
+        # Three shots: blue, green, red (BGR)
+        _write_video(video, [(255, 0, 0), (0, 255, 0), (0, 0, 255)])
+
+        keyframes = extract_keyframes(video, max_frames=6, sample_fps=1.0, threshold=0.35)
+        starts = [int(k.timestamp) for k in keyframes]
+        assert starts == [0, 3, 6], starts
+        assert [k.label for k in keyframes] == ["0:00", "0:03", "0:06"]
+        print("✅ One keyframe per shot, in time order")
+
+        assert len(extract_keyframes(video, max_frames=2)) == 2
+        print("✅ Capped at max_frames")
+
+        static = os.path.join(tmp, "static.mp4")
+        _write_video(static, [(40, 40, 40)], seconds_each=6)
+        keyframes = extract_keyframes(static, max_frames=6)
+        assert len(keyframes) == 3 and keyframes[0].timestamp == 0, [k.timestamp for k in keyframes]
+        print("✅ Static clip falls back to first / middle / last")
+
+        sheet = contact_sheet(keyframes)
+        assert sheet.size[0] == 1024, sheet.size
+        print("✅ Contact sheet tiles keyframes")
+
+        assert extract_keyframes(os.path.join(tmp, "missing.mp4")) == []
+        print("✅ Unreadable video returns no keyframes")
+
+if __name__ == "__main__":
+    test_video_keyframes()
@@ -0,0 +1,71 @@
+import os
+import sys
+import uuid
+import tempfile
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import services.vision_cache as vision_cache_module
+from services.vision_cache import vision_cache
+
+def test_vision_cache():
+    print("🧪 Testing Vision Output Cache...")
+    # Throwaway SQLite so the test never touches decade_journey.db
+    tmp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir.name, 'test.db')}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    original_session = vision_cache_module.SessionLocal
+    vision_cache_module.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    provider_model = f"test:{uuid.uuid4().hex[:8]}"
+    calls = []
+
+    def caption(text):
+        def compute():
+            calls.append(text)
+            return text
+        return compute
+
+    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as f:
+        f.write(uuid.uuid4().bytes)
+        photo = f.name
+    try:
+        first = vision_cache.get_or_compute("caption", photo, ["지민", "Alex"], "v1", provider_model, caption("A beach day."))
+        again = vision_cache.get_or_compute("caption", photo, ["Alex", "지민"], "v1", provider_model, caption("unused"))
+        assert first == again == "A beach day." and calls == ["A beach day."], calls
+        print("✅ Same image + names (any order) + prompt + model -> cache hit")
+
+        vision_cache.get_or_compute("caption", photo, ["Alex"], "v1", provider_model, caption("Alex at the beach."))
+        vision_cache.get_or_compute("caption", photo, ["Alex"], "v2", provider_model, caption("Prompt v2."))
+        vision_cache.get_or_compute("caption", photo, ["Alex"], "v2", provider_model + "-other", caption("Other model."))
+        assert len(calls) == 4, calls
+        print("✅ Names, prompt version and model each change the key")
+
+        refreshed = vision_cache.get_or_compute("caption", photo, ["Alex"], "v1", provider_model, caption("Fixed."), refresh=True)
+        assert refreshed == "Fixed." and vision_cache.get_or_compute("caption", photo, ["Alex"], "v1", provider_model, caption("x")) == "Fixed."
+        print("✅ refresh re-runs the model and replaces the entry")
+
+        vision_cache.get_or_compute("scene", photo, [], "v1", provider_model, lambda: {"summary": None}, cacheable=lambda r: bool(r.get("summary")))
+        result = vision_cache.get_or_compute("scene", photo, [], "v1", provider_model, lambda: {"summary": "ok", "tags": ["해변"]})
+        assert result == {"summary": "ok", "tags": ["해변"]}
+        print("✅ Failed results are not cached")
+
+        with open(photo, "ab") as f:
+            f.write(b"edited")
+        vision_cache.get_or_compute("caption", photo, ["지민", "Alex"], "v1", provider_model, caption("Edited photo."))
+        assert calls[-1] == "Edited photo."
+        print("✅ Changed image bytes miss the cache")
+    finally:
+        os.remove(photo)
+        vision_cache_module.SessionLocal = original_session
+        engine.dispose()
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    test_vision_cache()
@@ -0,0 +1,72 @@
+import io
+import os
+import sys
+import tempfile
+from PIL import Image
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from services.vision_payload import VisionPayloadService
+
+def test_vision_payload():
+    print("🧪 Testing Vision Payload Preparer...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        photo = os.path.join(tmp, "photo.webp")
+        Image.new("RGBA", (4000, 3000), (200, 120, 40, 255)).save(photo, "WEBP")
+        service = VisionPayloadService(cache_dir=os.path.join(tmp, "cache"), quality=80)
+
+        data, mime = service.prepare(photo, "groq")
+        assert mime == "image/jpeg"
+        with Image.open(io.BytesIO(data)) as img:
+            assert img.format == "JPEG" and max(img.size) == 1120, (img.format, img.size)
+        print("✅ WebP re-encoded as JPEG at the Groq input size")
+
+        assert len(os.listdir(service.cache_dir)) == 1
+        again, _ = service.prepare(photo, "groq")
+        assert again == data and len(os.listdir(service.cache_dir)) == 1
+        service.prepare(photo, "gemini")
+        assert len(os.listdir(service.cache_dir)) == 2, "One cached payload per provider size"
+        print("✅ Prepared bytes cached per file hash and size")
+
+        assert service.data_url(photo).startswith("data:image/jpeg;base64,")
+        part = service.gemini_part(photo)
+        assert part["mime_type"] == "image/jpeg" and part["data"]
+        print("✅ Groq data URL and Gemini inline part")
+
+        broken = os.path.join(tmp, "broken.png")
+        with open(broken, "wb") as f:
+            f.write(b"not an image")
+        data, mime = service.prepare(broken, "gemini")
+        assert data == b"not an image" and mime == "image/png"
+        print("✅ Undecodable files are sent as-is with their real type")
+
+def test_payload_cache_bounds():
+    print("🧪 Testing Vision Payload Cache Bounds...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        os.makedirs(cache_dir)
+        service = VisionPayloadService(cache_dir=cache_dir, max_bytes=3000)
+        for i, digest in enumerate(["aaa", "bbb", "ccc", "ddd"]):
+            path = os.path.join(cache_dir, f"{digest}_1120_q85.jpg")
+            with open(path, "wb") as f:
+                f.write(b"x" * 1000)
+            os.utime(path, (1000 + i, 1000 + i)) # aaa is the least recently used
+
+        removed, freed = service.prune()
+        assert (removed, freed) == (2, 2000), (removed, freed)
+        assert sorted(os.listdir(cache_dir)) == ["ccc_1120_q85.jpg", "ddd_1120_q85.jpg"]
+        print("✅ Least recently used payloads pruned below the budget")
+
+        with open(os.path.join(cache_dir, "ccc_1536_q85.jpg"), "wb") as f:
+            f.write(b"y")
+        service.remove("ccc")
+        assert os.listdir(cache_dir) == ["ddd_1120_q85.jpg"]
+        print("✅ Deleting a photo drops all of its cached payloads")
+
+if __name__ == "__main__":
+    test_vision_payload()
+    test_payload_cache_bounds()
@@ -0,0 +1,140 @@
+import os
+import sys
+import tempfile
+from datetime import date
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# In-memory database: importing services.config must not create decade_journey.db
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+from services import weather
+from services.weather import WeatherService
+from services.config import WEATHER_MAX_GAP_DAYS
+
+class _NoDB:
+    """
+    Stand-in session: nothing cached in SQLite, writes discarded.
+    """
+    def query(self, *args):
+        return self
+    def filter(self, *args):
+        return self
+    def all(self):
+        return []
+    def first(self):
+        return None
+    def merge(self, obj):
+        pass
+    def commit(self):
+        pass
+    def rollback(self):
+        pass
+    def close(self):
+        pass
+
+class _Response:
+    status_code = 200
+    def __init__(self, daily):
+        self._daily = daily
+    def json(self):
+        return {"daily": self._daily}
+
+def test_split_ranges():
+    print("🧪 Testing Weather Range Splitting...")
+    service = WeatherService()
+
+    d = lambda day: date.fromordinal(date(2023, 1, 1).toordinal() + day)
+    days = [d(0), d(1), d(3), d(3 + WEATHER_MAX_GAP_DAYS), d(4 + 2 * WEATHER_MAX_GAP_DAYS + 1)]
+    assert service._split_ranges(days) == [
+        (d(0), d(3 + WEATHER_MAX_GAP_DAYS)),
+        (d(4 + 2 * WEATHER_MAX_GAP_DAYS + 1), d(4 + 2 * WEATHER_MAX_GAP_DAYS + 1)),
+    ], service._split_ranges(days)
+    print(f"✅ Gaps up to {WEATHER_MAX_GAP_DAYS} days share a request, longer gaps split")
+
+    assert service._split_ranges([d(5)]) == [(d(5), d(5))]
+    print("✅ Single day")
+
+def test_prefetch():
+    print("🧪 Testing Weather Prefetch Batching...")
+    original_session, original_get = weather.SessionLocal, weather.requests.get
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append((params["latitude"], params["longitude"], params["start_date"], params["end_date"]))
+        # 2023-07-03 is not in the archive yet
+        return _Response({
+            "time": ["2023-07-01", "2023-07-02", "2023-07-03"],
+            "weathercode": [0, 61, None],
+            "temperature_2m_max": [30.1, 24.5, None],
+        })
+
+    weather.SessionLocal = _NoDB
+    weather.requests.get = fake_get
+    try:
+        service = WeatherService()
+        points = [
+            (37.51, 127.02, "2023-07-01"), (37.54, 127.04, "2023-07-03"), # same 0.1° cell
+            (37.52, 127.03, "2023-07-02 10:00:00"),
+            (33.50, 126.53, "2023-07-01"), # another cell
+            (None, 127.0, "2023-07-01"), (37.5, 127.0, "not-a-date"), # skipped
+        ]
+        assert service.prefetch(points) == 2, calls
+        assert (37.5, 127.0, "2023-07-01", "2023-07-03") in calls, calls
+        print("✅ One request per cell and date range")
+
+        assert service.get_weather(37.51, 127.02, "2023-07-02") == "Rain 🌧️, 24.5°C"
+        assert service.prefetch(points[:3]) == 0
+        print("✅ Fetched days are served from memory")
+
+        assert service.get_weather(37.51, 127.02, "2023-07-03") is None
+        assert len(calls) == 2, "Fresh empty day should not be refetched"
+        for key in service._empty_until:
+            service._empty_until[key] = 0 # Expire the empty-day TTL
+        assert service.prefetch(points[:3]) == 1
+        print("✅ Empty archive days are retried once their TTL expires")
+    finally:
+        weather.SessionLocal, weather.requests.get = original_session, original_get
+
+def test_miss_fetches_nearby_range():
+    print("🧪 Testing Weather Miss Window...")
+    tmp_dir = tempfile.TemporaryDirectory()
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir.name, 'test.db')}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    db = Session()
+    for day, weather_info in [
+        ("2023-07-05 09:00:00", None), ("2023-07-10", None), # Same trip: fetched with the miss
+        ("2023-06-20", "Clear Sky ☀️, 25°C"), # Already enriched
+        ("2021-03-01", None), ("2023-09-30", None), # Other years/months: left to enrich_pending
+    ]:
+        db.add(models.TimelineEvent(date=day, latitude=37.52, longitude=127.01, weather_info=weather_info))
+    db.commit()
+    db.close()
+
+    original_session, original_get = weather.SessionLocal, weather.requests.get
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append((params["start_date"], params["end_date"]))
+        return _Response({"time": []})
+
+    weather.SessionLocal = Session
+    weather.requests.get = fake_get
+    try:
+        WeatherService().get_weather(37.51, 127.02, "2023-07-01")
+        assert calls == [("2023-07-01", "2023-07-10")], calls
+        print(f"✅ A miss only fetches pending dates within {WEATHER_MAX_GAP_DAYS} days")
+    finally:
+        weather.SessionLocal, weather.requests.get = original_session, original_get
+        engine.dispose()
+        tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    test_split_ranges()
+    test_prefetch()
+    test_miss_fetches_nearby_range()
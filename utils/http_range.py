@@ -0,0 +1,57 @@
+import os
+
+UPLOAD_ROOT = "static/uploads"
+MEDIA_PREFIX = "/media/"
+
+def media_url(static_url: str) -> str:
+    """
+    Maps an upload URL (/static/uploads/...) to its range-streaming route (/media/...).
+    Anything else is returned unchanged.
+    """
+    if static_url and static_url.startswith(f"/{UPLOAD_ROOT}/"):
+        return MEDIA_PREFIX + static_url[len(UPLOAD_ROOT) + 2:]
+    return static_url
+
+def resolve_upload_path(relative_path: str):
+    """
+    Filesystem path for a /media/ request, or None if it escapes the upload directory.
+    """
+    root = os.path.realpath(UPLOAD_ROOT)
+    path = os.path.realpath(os.path.join(root, relative_path))
+    if os.path.commonpath([root, path]) != root:
+        return None
+    return path
+
+def parse_range(header: str, size: int):
+    """
+    Parses a single-range `Range: bytes=...` header into inclusive (start, end).
+    Returns None when the whole file should be sent (no header, other units,
+    malformed or multi-range requests may be ignored per RFC 9110).
+    Raises ValueError when the range cannot be satisfied (respond 416).
+    """
+    if not header:
+        return None
+    unit, _, spec = header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, dash, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not dash or not (first or last) or any(part and not part.isdigit() for part in (first, last)):
+        return None # Malformed: ignore it and send the whole file
+
+    if first:
+        start = int(first)
+        if start >= size:
+            raise ValueError(f"Range starts past end of file ({start} >= {size})")
+        end = int(last) if last else size - 1
+        if end < start:
+            return None
+    else:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        start, end = max(size - length, 0), size - 1
+
+    return start, min(end, size - 1)
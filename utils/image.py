@@ -1,7 +1,18 @@
 import os
+import hashlib
 from PIL import Image
 from PIL.ExifTags import TAGS, GPSTAGS
 
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    SHA-256 of a file's bytes (same value as TimelineEvent.file_hash).
+    """
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(chunk_size), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
 def get_decimal_from_dms(dms, ref):
     """
     Convert DMS (Degrees Minutes Seconds) to decimal format.
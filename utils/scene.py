@@ -0,0 +1,78 @@
+import json
+import re
+
+# Combined scene analysis: one vision request returns everything the
+# pipeline used to collect with separate tag and caption calls.
+
+# Bump when the prompt or the parsed shape changes (invalidates cached scene results)
+SCENE_PROMPT_VERSION = "scene-json-1"
+
+def _json_instructions(subject: str, caption_length: str) -> str:
+    return (
+        f"Analyze {subject} and answer with a single JSON object with these keys:\n"
+        '"tags": 5-10 English tags for the content, scene, objects, and especially the MOOD '
+        "(e.g., Joyful, Melancholic) and FACIAL EXPRESSIONS (e.g., Happy, Surprised);\n"
+        '"tags_ko": the Korean translation of each tag, in the same order;\n'
+        f'"caption": a warm, narrative description in {caption_length} covering the setting, action, '
+        "people's expressions and the overall atmosphere, mentioning identified people naturally;\n"
+        '"caption_ko": the Korean translation of the caption;\n'
+        '"mood": one English word for the overall mood;\n'
+        '"ocr": any visible text transcribed verbatim, or "" if there is none.\n'
+        "Return ONLY the JSON object."
+    )
+
+def build_scene_prompt(names: list[str] = None) -> str:
+    people_context = ""
+    if names:
+        people_context = f"The following people are in this photo: {', '.join(names)}. "
+    return f"{people_context}{_json_instructions('this photo', '1-2 sentences')}"
+
+def build_video_prompt(timestamps: list[str], names: list[str] = None, contact_sheet: bool = False) -> str:
+    """
+    Same JSON keys as build_scene_prompt, for the keyframes of one video.
+    """
+    people_context = ""
+    if names:
+        people_context = f"The following people appear in this video: {', '.join(names)}. "
+    if contact_sheet:
+        frames = f"This image is a grid of {len(timestamps)} keyframes from one video, in time order (left to right, top to bottom) at {', '.join(timestamps)}. "
+    else:
+        frames = f"These {len(timestamps)} images are keyframes from one video, in time order at {', '.join(timestamps)}. "
+    return f"{people_context}{frames}{_json_instructions('the whole video', '2-3 sentences of what happens over the video,')}"
+
+def parse_scene_response(text: str) -> dict:
+    """
+    Parses the combined JSON answer into the analyze_scene result shape
+    ({"tags", "summary", "mood", "ocr"}), matching the legacy formats:
+    mixed English + Korean tags, and the Korean caption on a '🇰🇷 ' line.
+    Raises ValueError if the answer is not usable JSON.
+    """
+    if not text:
+        raise ValueError("Empty scene response")
+
+    # Some models wrap JSON in a markdown fence despite being asked not to
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Scene response is not JSON: {e}") from e
+    if not isinstance(data, dict) or not data.get("caption"):
+        raise ValueError("Scene response has no caption")
+
+    def as_list(value):
+        if isinstance(value, str):
+            value = value.split(",")
+        return [str(v).strip() for v in value or [] if str(v).strip()]
+
+    tags = list(dict.fromkeys(as_list(data.get("tags")) + as_list(data.get("tags_ko"))))
+
+    summary = str(data["caption"]).strip()
+    if data.get("caption_ko"):
+        summary = f"{summary}\n🇰🇷 {str(data['caption_ko']).strip()}"
+
+    return {
+        "tags": tags,
+        "summary": summary,
+        "mood": (str(data.get("mood") or "").strip() or None),
+        "ocr": str(data.get("ocr") or "").strip(),
+    }